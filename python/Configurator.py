@@ -1,3 +1,80 @@
 import os
 
-ROOT_FOLDER ='/Users/alansaw/Python Notes'
+# Settings for the notes app. Each one can be changed without editing this file:
+#   1. an environment variable NOTES_<NAME>, e.g. NOTES_ROOT_FOLDER=~/notes
+#   2. a line "<NAME> = value" in the config file (NOTES_CONFIG, default ~/.config/notes/notes.conf)
+#   3. the default below
+# Nothing is looked up when this module is imported, only the first time a setting is used,
+# so short-lived commands don't pay for settings they never read.
+
+CONFIG_FILE = os.path.join('~', '.config', 'notes', 'notes.conf')
+
+DEFAULTS = {
+    'ROOT_FOLDER': os.path.join('~', 'Python Notes'), #where the .note files live
+    'LOAD_WORKERS': 8, #threads used to read notes in bulk (search index builds, catalog refreshes), 1 = one at a time
+    'PARSE_PROCESSES': 0, #processes that read and parse notes in bulk loads so YAML parsing uses several cores, 0 = use the threads
+    'STORAGE_BACKEND': 'folder', #'folder' keeps one .note file per note in ROOT_FOLDER, 'sqlite' uses SQLITE_PATH, 'pack' reads PACK_PATH (read-only), 'sharded' spreads the notes over subfolders of ROOT_FOLDER
+    'SQLITE_PATH': None, #None = notes.sqlite3 inside ROOT_FOLDER
+    'SHARDS': 16, #subfolders a new 'sharded' notebook spreads its notes over (see sharded_notebook.py)
+    'PACK_PATH': None, #None = notes.pack inside ROOT_FOLDER, written by python pack.py export
+    'SERVER_HOST': '127.0.0.1', #where python server.py listens
+    'SERVER_PORT': 8000,
+    'PAGE_SIZE': 50, #notes per page when the API request doesn't say ?limit=
+    'KEEP_HISTORY': 1, #1 = every save of a folder notebook note is kept in .history/ (see history.py), 0 = no history
+    'WATCH_INTERVAL': 1.0, #seconds the menu and the server may answer from memory before looking at the folder again
+    'PERF': 0, #1 = time the hot paths from the start (see perf.py), shown by "stats --perf" and the menu's stats
+    'PROFILE': None, #a file name = run the program under cProfile and write its stats there on exit
+}
+PATHS = {'ROOT_FOLDER', 'SQLITE_PATH', 'PACK_PATH', 'PROFILE'} #settings that get ~ expanded
+
+_settings = {} #resolved values, filled on first use
+_config_file = None #parsed config file, read at most once
+
+
+def _read_config_file():
+    global _config_file
+    if _config_file is None:
+        _config_file = {}
+        path = os.path.expanduser(os.environ.get('NOTES_CONFIG', CONFIG_FILE))
+        try:
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith('#') and '=' in line:
+                        name, value = line.split('=', 1)
+                        _config_file[name.strip().upper()] = value.strip().strip('\'"')
+        except FileNotFoundError:
+            pass
+    return _config_file
+
+
+def get(name):#the current value of a setting
+    if name not in _settings:
+        default = DEFAULTS[name]
+        value = os.environ.get(f'NOTES_{name}')
+        if value is None:
+            value = _read_config_file().get(name)
+        if value is None:
+            value = default
+        elif isinstance(default, (int, float)):#text from the environment or the file -> number
+            value = type(default)(value)
+        if name == 'SQLITE_PATH' and value is None:
+            value = os.path.join(get('ROOT_FOLDER'), 'notes.sqlite3')
+        if name == 'PACK_PATH' and value is None:
+            value = os.path.join(get('ROOT_FOLDER'), 'notes.pack')
+        if name in PATHS and value is not None:
+            value = os.path.expanduser(value)
+        _settings[name] = value
+    return _settings[name]
+
+
+def reset():#forget resolved settings, e.g. after changing the environment in a test
+    global _config_file
+    _settings.clear()
+    _config_file = None
+
+
+def __getattr__(name):#Configurator.ROOT_FOLDER etc. still work, they are resolved on first access
+    if name in DEFAULTS:
+        return get(name)
+    raise AttributeError(f"module 'Configurator' has no attribute '{name}'")
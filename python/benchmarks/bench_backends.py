@@ -0,0 +1,50 @@
+# Folder notebook vs. SQLite notebook: import time and latency of list/search/stats/tag counts.
+# python benchmarks/bench_backends.py [sizes...]     (default: 1000 10000)
+import os
+import sys
+import tempfile
+import time
+
+from corpus import write_corpus
+from notes import Notebook
+from sqlite_notebook import SQLiteNotebook, copy_notes
+
+QUERIES = ['memory', 'data AND structures', '"linked list"', 'algo*']
+REPEAT = 10
+
+
+def timed(function, repeat=REPEAT):
+    function()#warm up: builds the folder notebook's index and catalog
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def bench(count):
+    with tempfile.TemporaryDirectory() as workdir:
+        folder = os.path.join(workdir, 'notes')
+        os.mkdir(folder)
+        write_corpus(folder, count)
+        notebooks = [('folder', Notebook(folder))]
+
+        start = time.perf_counter()
+        database = SQLiteNotebook(os.path.join(workdir, 'notes.sqlite3'))
+        copy_notes(notebooks[0][1], database)
+        print(f'{count:>7} notes  import into sqlite {time.perf_counter() - start:.2f}s')
+        notebooks.append(('sqlite', database))
+
+        for name, notebook in notebooks:
+            print(f'    {name}')
+            print(f'        list_notes   {timed(notebook.list_notes):9.3f}ms')
+            print(f'        get_stats    {timed(notebook.get_stats):9.3f}ms')
+            print(f'        tag_counts   {timed(notebook.tag_counts):9.3f}ms')
+            for query in QUERIES:
+                print(f'        search {query!r:22} {timed(lambda: notebook.search_notes(query)):9.3f}ms')
+        database.close()
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000]
+    for count in sizes:
+        bench(count)
@@ -0,0 +1,37 @@
+# Serial vs. pooled Notebook.iter_notes at several corpus sizes and worker counts.
+# python benchmarks/bench_bulk_load.py [sizes...]     (default: 1000 10000)
+import sys
+import tempfile
+import time
+
+from corpus import write_corpus
+from notes import Notebook
+
+SETTINGS = [#(threads, parse processes)
+    (1, 0),
+    (4, 0),
+    (8, 0),
+    (16, 0),
+    (8, 2),
+    (8, 4),
+]
+
+
+def bench(count):
+    with tempfile.TemporaryDirectory() as folder:
+        write_corpus(folder, count)
+        notebook = Notebook(folder)
+        print(f'{count:>7} notes')
+        for header_only in (False, True):
+            for workers, processes in SETTINGS:
+                start = time.perf_counter()
+                loaded = sum(1 for _ in notebook.iter_notes(header_only=header_only, workers=workers, processes=processes))
+                elapsed = time.perf_counter() - start
+                mode = 'header' if header_only else 'full'
+                print(f'    {mode:6} threads={workers:<3} processes={processes:<2} {elapsed:7.2f}s  {loaded / elapsed:9.0f} notes/s')
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000]
+    for count in sizes:
+        bench(count)
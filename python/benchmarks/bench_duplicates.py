@@ -0,0 +1,77 @@
+# Duplicate detection (duplicates.py): the first find_duplicates() reads every note and makes its
+# signature, later ones only reread changed notes. Copies and edited copies are planted in the corpus
+# to check that they are found, and LSH is compared with comparing every pair of signatures.
+# python benchmarks/bench_duplicates.py [count]     (default: 20000 notes, 2% copies, 2% edited copies)
+import os
+import random
+import sys
+import tempfile
+import time
+
+from corpus import write_corpus
+from duplicates import similarity, THRESHOLD
+from notes import Note, Notebook
+
+PAIRWISE_SAMPLE = 1000 #notes compared pair by pair, the time is scaled up to the whole notebook
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main(count):
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as folder:
+        files = write_corpus(folder, count, body_words=120, spread=0.5)
+        notebook = Notebook(folder)
+        copies = rng.sample(files, count // 50)
+        edited = rng.sample([file for file in files if file not in copies], count // 50)
+        for i, file in enumerate(copies):
+            note = notebook.get_note(file)
+            notebook.save_note(Note(note.title, note.content, note.tags), f'copy-{i:06d}')
+        for i, file in enumerate(edited):#a couple of words changed, one added
+            note = notebook.get_note(file)
+            words = note.content.split()
+            for _ in range(2):
+                words[rng.randrange(len(words))] = 'edited'
+            notebook.save_note(Note(note.title, ' '.join(words) + ' addition', note.tags), f'edit-{i:06d}')
+        total = len(files) + len(copies) + len(edited)
+        notebook.catalog()
+
+        groups, cold = timed(notebook.find_duplicates)
+        notebook._signatures = None#as in a new process: the cache is read from .signatures.json
+        _, warm = timed(notebook.find_duplicates)
+        _, memory = timed(notebook.find_duplicates)
+        for file in rng.sample(files, count // 100):
+            note = notebook.get_note(file)
+            notebook.save_note(Note(note.title, note.content + ' more', note.tags), file[:-len('.note')])
+        _, changed = timed(notebook.find_duplicates)
+        size = os.path.getsize(os.path.join(folder, '.signatures.json')) / 2 ** 20
+
+        grouped = {file: group for group in groups for file in group['files']}
+        found_copies = sum(1 for i, file in enumerate(copies) if f'copy-{i:06d}.note' in grouped.get(file, {'files': ()})['files'])
+        found_edits = sum(1 for i, file in enumerate(edited) if f'edit-{i:06d}.note' in grouped.get(file, {'files': ()})['files'])
+        print(f'{total} notes, {len(copies)} copies and {len(edited)} edited copies planted, cache {size:.1f} MB')
+        print(f'    first run (read every note)     {cold * 1000:9.0f} ms')
+        print(f'    new process, nothing changed    {warm * 1000:9.0f} ms')
+        print(f'    same process, nothing changed   {memory * 1000:9.0f} ms')
+        print(f'    after changing 1% of the notes  {changed * 1000:9.0f} ms')
+        print(f'    found {found_copies}/{len(copies)} copies and {found_edits}/{len(edited)} edited copies, '
+              f'{len(groups)} groups in all')
+
+        signatures = [signature for digest, signature in notebook.signatures().values() if signature]
+        sample = signatures[:PAIRWISE_SAMPLE]
+        start = time.perf_counter()
+        for i, a in enumerate(sample):
+            for b in sample[i + 1:]:
+                similarity(a, b) >= THRESHOLD
+        pairs = len(sample) * (len(sample) - 1) / 2
+        per_pair = (time.perf_counter() - start) / pairs
+        everything = len(signatures) * (len(signatures) - 1) / 2
+        print(f'    every pair instead of LSH: {everything:.3g} comparisons, about {per_pair * everything:.0f} s')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
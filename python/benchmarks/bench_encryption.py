@@ -0,0 +1,59 @@
+# Encrypted vs. plaintext notes: what unlocking costs (scrypt, once per session) and the load/save
+# throughput of plain, 'body' and 'note' encryption, for many small notes and for one big note.
+# python benchmarks/bench_encryption.py [count] [big MB]     (default: 2000 notes, 16 MB)
+import os
+import random
+import sys
+import tempfile
+import time
+
+from corpus import seed_words
+import encryption
+from notes import Note, Notebook
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main(count, big_mb):
+    rng = random.Random(0)
+    words = seed_words()
+    bodies = [' '.join(rng.choice(words) for _ in range(120)) for _ in range(count)]
+    size = sum(len(body) for body in bodies) / 2 ** 20
+    with tempfile.TemporaryDirectory() as folder:
+        notebook = Notebook(folder)
+        _, first = timed(lambda: notebook.unlock('benchmark passphrase'))
+        _, again = timed(lambda: notebook.unlock('benchmark passphrase'))
+        print(f'unlock: first {first * 1000:.1f} ms (scrypt), again {again * 1000:.3f} ms (key kept for the session)')
+
+        print(f'{count} notes, {size:.1f} MB of bodies')
+        for mode in (None, 'body', 'note'):
+            def save():
+                for i, body in enumerate(bodies):
+                    note = Note(f'note {i}', body, ['bench'])
+                    note.encryption = mode
+                    notebook.save_note(note, f'{mode}-{i}')
+            def load():
+                for i in range(count):
+                    Note.load_note(f'{folder}/{mode}-{i}.note').content
+            _, saved = timed(save)
+            _, loaded = timed(load)
+            print(f'    {str(mode):5} save {saved * 1000:8.1f} ms {size / saved:6.1f} MB/s   '
+                  f'load {loaded * 1000:8.1f} ms {size / loaded:6.1f} MB/s')
+
+        big = ' '.join(rng.choice(words) for _ in range(big_mb * 2 ** 20 // 6))
+        print(f'one {len(big) / 2 ** 20:.0f} MB note ({encryption.CHUNK // 1024} KB chunks, plain saves also index the body)')
+        for mode in (None, 'body'):
+            note = Note('big', big)
+            note.encryption = mode
+            _, saved = timed(lambda: notebook.save_note(note, f'big-{mode}'))
+            _, loaded = timed(lambda: Note.load_note(f'{folder}/big-{mode}.note').content)
+            mb = os.path.getsize(f'{folder}/big-{mode}.note') / 2 ** 20
+            print(f'    {str(mode):5} save {saved * 1000:8.1f} ms   load {loaded * 1000:8.1f} ms   file {mb:.1f} MB')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000, int(sys.argv[2]) if len(sys.argv) > 2 else 16)
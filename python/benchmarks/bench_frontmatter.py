@@ -0,0 +1,53 @@
+# Notes/sec for parsing and writing YAML headers: PyYAML (pure Python), PyYAML + libyaml, and the frontmatter codec.
+# python benchmarks/bench_frontmatter.py [count]     (default: 20000)
+import sys
+import time
+
+import yaml
+
+import corpus #puts the notes folder on sys.path
+import frontmatter
+
+HEADER = {
+    'title': 'Data Structures Overview',
+    'created': '2025-11-19T14:07:21.863265Z',
+    'modified': '2025-11-19T14:07:21.866347Z',
+    'tags': ['coursework', 'computer science', 'algorithms'],
+    'author': 'Student001',
+    'status': 'complete',
+    'priority': 2,
+}
+CLoader = getattr(yaml, 'CSafeLoader', None)
+CDumper = getattr(yaml, 'CSafeDumper', None)
+
+
+def rate(function, argument, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        function(argument)
+    return count / (time.perf_counter() - start)
+
+
+def main(count):
+    text = yaml.dump(HEADER)
+    parsers = [
+        ('yaml.safe_load', yaml.safe_load),
+        ('yaml CSafeLoader', (lambda t: yaml.load(t, Loader=CLoader)) if CLoader else None),
+        ('frontmatter.load', frontmatter.load),
+    ]
+    writers = [
+        ('yaml.dump', yaml.dump),
+        ('yaml CSafeDumper', (lambda m: yaml.dump(m, Dumper=CDumper)) if CDumper else None),
+        ('frontmatter.dump', frontmatter.dump),
+    ]
+    for label, rows, argument in (('parse', parsers, text), ('write', writers, HEADER)):
+        print(f'{label}:')
+        for name, function in rows:
+            if function is None:
+                print(f'    {name:18} (libyaml not installed)')
+                continue
+            print(f'    {name:18} {rate(function, argument, count):10.0f} notes/s')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
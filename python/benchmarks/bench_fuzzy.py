@@ -0,0 +1,77 @@
+# Typo tolerant search and title autocompletion (fuzzy.py): building the trigram index over the search
+# index's words, then the latency of fuzzy searches for misspelt words and of title completions.
+# python benchmarks/bench_fuzzy.py [count] [extra words]     (default: 100000 notes, 200000 made-up words)
+import random
+import sys
+import tempfile
+import time
+
+from corpus import write_corpus
+from notes import Notebook
+
+QUERIES = 200
+
+
+def typo(rng, word):#one swapped, dropped, doubled or changed letter
+    i = rng.randrange(len(word) - 1)
+    kind = rng.randrange(4)
+    if kind == 0:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    if kind == 1:
+        return word[:i] + word[i + 1:]
+    if kind == 2:
+        return word[:i] + word[i] + word[i:]
+    return word[:i] + rng.choice('aeiou') + word[i + 1:]
+
+
+def latency(function, inputs):#(p50, p95, max) in ms
+    times = []
+    for value in inputs:
+        start = time.perf_counter()
+        function(value)
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return times[len(times) // 2], times[len(times) * 95 // 100], times[-1]
+
+
+def show(label, result):
+    print(f'    {label:36} p50 {result[0]:7.2f} ms   p95 {result[1]:7.2f} ms   max {result[2]:7.2f} ms')
+
+
+def main(count, extra_words):
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as folder:
+        write_corpus(folder, count, body_words=60, extra_words=extra_words)
+        notebook = Notebook(folder)
+        notebook.watch()#like the menu and the server: changes come from the watcher, nothing is statted per query
+        index = notebook.search_index()
+        start = time.perf_counter()
+        index.similar('warmup')
+        print(f'{count} notes, {len(index.postings)} different words, trigram index built in '
+              f'{(time.perf_counter() - start) * 1000:.0f} ms (once, then kept up to date)')
+        start = time.perf_counter()
+        notebook.complete_titles('warmup')
+        print(f'sorted titles and title words made in {(time.perf_counter() - start) * 1000:.0f} ms '
+              f'(kept until a note changes)')
+
+        words = [word for word in rng.sample(sorted(index.postings), QUERIES * 5) if len(word) >= 5 and word.isalpha()][:QUERIES]
+        misspelt = [typo(rng, word) for word in words]
+        show('exact search, correct words', latency(lambda word: notebook.search_notes(word), words))
+        show('exact search, misspelt words', latency(lambda word: notebook.search_notes(word), misspelt))
+        index._fuzzy = {}
+        show('fuzzy search, misspelt words', latency(lambda word: notebook.search_notes(word, fuzzy=True), misspelt))
+        index._fuzzy = {}
+        show('fuzzy ranked top 10, no snippets', latency(lambda word: notebook.search_ranked(word, 10, False, fuzzy=True), misspelt))
+        found = sum(1 for word, wrong in zip(words, misspelt) if word in index.similar(wrong))
+        print(f'    the right word was among the corrections for {found} of {len(words)} typos')
+
+        titles = [title for _, title in notebook.list_titles(limit=None)]
+        prefixes = [title[:rng.randint(2, 8)] for title in rng.sample(titles, QUERIES)]
+        later = [title.split()[-1][:rng.randint(2, 5)] for title in rng.sample(titles, QUERIES)]
+        show('complete titles, title prefix', latency(lambda text: notebook.complete_titles(text), prefixes))
+        show('complete titles, later word prefix', latency(lambda text: notebook.complete_titles(text), later))
+        show('complete titles, misspelt word', latency(lambda text: notebook.complete_titles(text), misspelt))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000, int(sys.argv[2]) if len(sys.argv) > 2 else 200000)
@@ -0,0 +1,60 @@
+# Note history: what keeping every version of a big, often edited note costs on disk, per save and per restore.
+# python benchmarks/bench_history.py [edits] [lines]     (default: 500 edits of a 2000 line note)
+import os
+import sys
+import tempfile
+import time
+
+import corpus
+import history
+from notes import Note, Notebook
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def make_lines(count, rng, words):
+    return [' '.join(rng.choice(words) for _ in range(12)) for _ in range(count)]
+
+
+def main(edits, line_count):
+    rng = corpus.random.Random(0)
+    words = corpus.seed_words()
+    lines = make_lines(line_count, rng, words)
+    print(f'{edits} edits of a {line_count} line note, a snapshot every {history.SNAPSHOT_EVERY} versions')
+    with tempfile.TemporaryDirectory() as folder:
+        notebook = Notebook(folder)
+        note = Note('Big note', '\n'.join(lines))
+        start = time.perf_counter()
+        for edit in range(edits):
+            for _ in range(3):#a few lines changed, one added per save
+                lines[rng.randrange(len(lines))] = ' '.join(rng.choice(words) for _ in range(12))
+            lines.insert(rng.randrange(len(lines)), ' '.join(rng.choice(words) for _ in range(12)))
+            note.content = '\n'.join(lines)
+            note.save('big', folder, durable=False)
+        save_time = time.perf_counter() - start
+
+        note_size = os.path.getsize(os.path.join(folder, 'big.note'))
+        log_size = os.path.getsize(history.history_path(folder, 'big.note'))
+        versions = notebook.history('big.note')
+        print(f'    note file        {note_size / 1024:9.1f} KB')
+        print(f'    history log      {log_size / 1024:9.1f} KB  ({log_size / note_size:.1f}x the note, '
+              f'{edits}x would be {edits * note_size / 1024 / 1024:.1f} MB)')
+        print(f'    save             {save_time / edits * 1000:9.2f} ms per edit (note + history)')
+        _, listing = timed(lambda: notebook.history('big.note'))
+        print(f'    history()        {listing * 1000:9.2f} ms for {len(versions)} versions')
+        log = history.NoteHistory(folder, 'big.note')
+        for label, version in (('oldest', 1), ('middle', edits // 2), ('newest', edits),
+                               ('worst (before a snapshot)', max(v['version'] for v in versions if v['kind'] == 'snapshot') - 1 or 1)):
+            _, elapsed = timed(lambda: log.text(version))
+            print(f'    text of {label:26} {elapsed * 1000:7.2f} ms  (version {version})')
+        _, elapsed = timed(lambda: notebook.restore('big.note', 1))
+        print(f'    restore(version 1) {elapsed * 1000:7.2f} ms')
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(args[0] if args else 500, args[1] if len(args) > 1 else 2000)
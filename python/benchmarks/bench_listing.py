@@ -0,0 +1,45 @@
+# Sorted, paged listing: first page (heapq top-k), a page deep inside (full sort, then kept) and the next
+# request for that page, against sorting every filename like the menus used to.
+# python benchmarks/bench_listing.py [count]     (default: 100000)
+import os
+import sys
+import tempfile
+import time
+
+from corpus import write_corpus
+from notes import Notebook
+
+PAGE = 20
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main(count):
+    with tempfile.TemporaryDirectory() as folder:
+        write_corpus(folder, count)
+        setup = Notebook(folder)#the sidecars exist, like every run after the first
+        setup.catalog()
+        setup.rebuild_tag_index()
+        notebook = Notebook(folder)
+        _, load = timed(notebook.header_table)
+        print(f'{count} notes, catalog + header table loaded in {load:.1f} ms')
+        _, refresh = timed(lambda: notebook.list_titles('title', 0, PAGE))
+        print(f'    first page without watch()      {refresh:8.2f} ms (stats every note to see what changed)')
+        notebook.watch()#the menu and the server: the watcher says what changed, pages come from memory
+        _, old = timed(lambda: sorted(os.listdir(folder), key=str.lower)[:PAGE])
+        print(f'    listdir + sort every filename   {old:8.2f} ms')
+        for by in ('title', 'created', 'modified', 'priority'):
+            _, first = timed(lambda: notebook.list_titles(by, 0, PAGE))
+            _, deep = timed(lambda: notebook.list_titles(by, count // 2, PAGE))
+            _, again = timed(lambda: notebook.list_titles(by, count // 2 + PAGE, PAGE))
+            print(f'    {by:9} first page {first:8.2f} ms   page in the middle {deep:8.2f} ms   next page {again:6.2f} ms')
+        _, filtered = timed(lambda: notebook.list_titles('title', 0, PAGE, tag='python'))
+        print(f'    tag=python, first page by title  {filtered:8.2f} ms (tag index loaded from its snapshot)')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
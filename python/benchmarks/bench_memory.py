@@ -0,0 +1,59 @@
+# Bytes per note kept in memory, measured with tracemalloc.
+#   notes:   Note objects from load_header, as a plain class with a __dict__, string timestamps and a new
+#            string per tag (how Note stored them before) vs. the Note class with __slots__.
+#   headers: the list of header dictionaries (note_headers) vs. the columnar HeaderTable.
+# python benchmarks/bench_memory.py [count]     (default: 20000)
+import gc
+import sys
+import tempfile
+import tracemalloc
+
+from corpus import write_corpus
+from notes import Note, Notebook
+from header_table import HeaderTable
+
+
+def fresh(text):#a new copy of a string, like every YAML parse used to make
+    return text.encode('utf-8').decode('utf-8') if isinstance(text, str) else text
+
+
+class DictNote():#the old Note layout: a __dict__ per note, the timestamps as text, every tag its own string
+    def __init__(self, note):
+        self.title = fresh(note.title)
+        self._content = None
+        self._body_source = (fresh(note._body_source[0]),) + note._body_source[1:]
+        self.tags = [fresh(tag) for tag in note.tags]
+        self.author = fresh(note.author)
+        self.status = fresh(note.status)
+        self.priority = note.priority
+        self.created = fresh(note.created)
+        self.modified = fresh(note.modified)
+
+
+def measure(build):#(object, bytes it holds on to)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, used
+
+
+def main(count):
+    with tempfile.TemporaryDirectory() as folder:
+        files = write_corpus(folder, count)
+        notebook = Notebook(folder)
+        _, dicts = measure(lambda: [DictNote(Note.load_header(f'{folder}/{file}')) for file in files])
+        _, slots = measure(lambda: [Note.load_header(f'{folder}/{file}') for file in files])
+        catalog = notebook.catalog()
+        headers, header_dicts = measure(notebook.note_headers)
+        table, columns = measure(lambda: HeaderTable(catalog.entries))
+        print(f'{count} notes, bytes per note')
+        print(f'    Note objects   before {dicts / count:8.0f}   after {slots / count:8.0f}')
+        print(f'    note headers   dicts  {header_dicts / count:8.0f}   table {columns / count:8.0f}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,42 @@
+# Pack files vs. the notes folder: export/import time, pack size, and cold start of a read-only copy
+# (first note_headers() and first search without any sidecar files).
+# python benchmarks/bench_pack.py [count]     (default: 20000)
+import os
+import sys
+import tempfile
+import time
+
+from corpus import write_corpus
+from notes import Notebook
+from pack import PackNotebook
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main(count):
+    with tempfile.TemporaryDirectory() as folder:
+        os.mkdir(f'{folder}/notes')
+        write_corpus(f'{folder}/notes', count)
+        size = sum(entry.stat().st_size for entry in os.scandir(f'{folder}/notes'))
+        print(f'{count} notes, {size / 1e6:.1f} MB of .note files')
+        _, seconds = timed(lambda: Notebook(f'{folder}/notes').note_headers())
+        print(f'    folder   cold headers {seconds:6.2f}s')
+        _, seconds = timed(lambda: Notebook(f'{folder}/notes').search_notes('python'))
+        print(f'    folder   cold search  {seconds:6.2f}s')
+        for compression in (None, 'gzip'):
+            path = f'{folder}/notes-{compression}.pack'
+            _, export_seconds = timed(lambda: Notebook(f'{folder}/notes').export_pack(path, compression))
+            os.mkdir(f'{folder}/copy-{compression}')
+            _, import_seconds = timed(lambda: Notebook(f'{folder}/copy-{compression}').import_pack(path))
+            _, headers = timed(lambda: PackNotebook(path).note_headers())
+            _, search = timed(lambda: PackNotebook(path).search_notes('python'))
+            print(f'    pack {str(compression):5} {os.path.getsize(path) / 1e6:6.1f} MB  export {export_seconds:5.2f}s  '
+                  f'import {import_seconds:5.2f}s  cold headers {headers:6.2f}s  cold search {search:6.2f}s')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,49 @@
+# What the perf.py timers cost: a bare call vs. a @timed call with the timers off and on,
+# and a full pass of header loads + searches with them off and on.
+# python benchmarks/bench_perf.py [count]     (default: 5000 notes)
+import sys
+import tempfile
+import time
+
+from corpus import write_corpus
+import perf
+from notes import Note, Notebook
+
+CALLS = 1000000
+
+
+def per_call(function):
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        function()
+    return (time.perf_counter() - start) / CALLS * 1e9
+
+
+def main(count):
+    def bare():
+        return None
+    wrapped = perf.timed('bench')(bare)
+    print(f'bare call            {per_call(bare):7.1f} ns')
+    perf.disable()
+    print(f'@timed, timers off   {per_call(wrapped):7.1f} ns')
+    perf.enable()
+    print(f'@timed, timers on    {per_call(wrapped):7.1f} ns')
+
+    with tempfile.TemporaryDirectory() as folder:
+        files = write_corpus(folder, count)
+        notebook = Notebook(folder)
+        notebook.search_notes('memory')#index built outside the timing
+        for enabled in (False, True):
+            perf.enable() if enabled else perf.disable()
+            start = time.perf_counter()
+            for file in files:
+                Note.load_header(f'{folder}/{file}')
+            for _ in range(200):
+                notebook.search_notes('data structures')
+            print(f'{count} header loads + 200 searches, timers {"on " if enabled else "off"} '
+                  f'{(time.perf_counter() - start) * 1000:8.1f} ms')
+    perf.disable()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,64 @@
+# Relevance and latency of ranked search over the test-notes corpus copied many times.
+# Each query is the title of one sample note, so the relevant results are that note's copies.
+# precision@10 = share of the top 10 that are copies of the right note: ranked search vs. the old
+# alphabetical list of matches. Latency is the average over all queries.
+# python benchmarks/bench_ranked_search.py [sizes...]     (default: 1000 20000)
+import os
+import sys
+import tempfile
+import time
+
+from corpus import SEED_FOLDER
+from notes import Note, Notebook
+
+TOP = 10
+
+
+def replicate(folder, count):#count .note files, copies of the sample notes in turn -> {title: sample name}
+    samples = sorted(os.listdir(SEED_FOLDER))
+    texts = {}
+    for name in samples:
+        with open(os.path.join(SEED_FOLDER, name), encoding='utf-8') as f:
+            texts[name] = f.read()
+    for i in range(count):
+        name = samples[i % len(samples)]
+        with open(os.path.join(folder, f'{name[:-3]}-{i:06d}.note'), 'w', encoding='utf-8') as f:
+            f.write(texts[name])
+    return {Note.load_note(os.path.join(SEED_FOLDER, name)).title: name[:-3] for name in samples}
+
+
+def timed(function, queries):#(average seconds per query, results)
+    start = time.perf_counter()
+    results = [function(query) for query in queries]
+    return (time.perf_counter() - start) / len(queries), results
+
+
+def precision(results, queries):
+    scores = []
+    for query, files in zip(queries, results):
+        top = files[:TOP]
+        scores.append(sum(file.startswith(queries[query] + '-') for file in top) / max(len(top), 1))
+    return sum(scores) / len(scores)
+
+
+def bench(count):
+    with tempfile.TemporaryDirectory() as folder:
+        queries = replicate(folder, count)
+        notebook = Notebook(folder)
+        start = time.perf_counter()
+        notebook.rebuild_index()
+        print(f'{count:>7} notes  (index built in {time.perf_counter() - start:.2f}s)')
+        runs = [
+            ('unranked', lambda query: notebook.search_notes(query)),
+            ('ranked', lambda query: [result['file'] for result in notebook.search_ranked(query, TOP, snippets=False)]),
+            ('ranked+snippets', lambda query: [result['file'] for result in notebook.search_ranked(query, TOP)]),
+        ]
+        for name, function in runs:
+            seconds, results = timed(function, list(queries))
+            print(f'    {name:16} precision@{TOP} {precision(results, queries):5.2f}   {seconds * 1000:8.2f} ms/query')
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 20000]
+    for count in sizes:
+        bench(count)
@@ -0,0 +1,39 @@
+# Query latency of Notebook.search_notes backed by the inverted index.
+# python benchmarks/bench_search_index.py [sizes...]     (default: 1000 10000 100000)
+import sys
+import tempfile
+import time
+
+from corpus import write_corpus
+from notes import Notebook
+
+QUERIES = ['memory', 'data structures', 'queue AND stack', '"linked list"', 'algo*', 'zzznotthere']
+REPEAT = 20
+
+
+def bench(count):
+    with tempfile.TemporaryDirectory() as folder:
+        write_corpus(folder, count)
+        notebook = Notebook(folder)
+
+        start = time.perf_counter()
+        notebook.rebuild_index()
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        Notebook(folder).search_notes('memory')#cold start: a new process loading the snapshot
+        cold = time.perf_counter() - start
+
+        print(f'{count:>7} notes  build {build:8.2f}s  cold load+query {cold * 1000:8.1f}ms')
+        for query in QUERIES:
+            start = time.perf_counter()
+            for _ in range(REPEAT):
+                hits = notebook.search_notes(query)
+            latency = (time.perf_counter() - start) / REPEAT
+            print(f'    {query!r:22} {latency * 1000:8.3f}ms  {len(hits):>6} hits')
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    for count in sizes:
+        bench(count)
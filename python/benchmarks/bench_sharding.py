@@ -0,0 +1,70 @@
+# Directory size: the same notes in one flat folder and spread over 16 and 256 shards (sharded_notebook.py).
+# Times what depends on how many files a directory has (listdir, stat and open of one note, saving a new
+# one) and the queries that fan out over the shards (list_notes, search_notes, get_stats).
+# python benchmarks/bench_sharding.py [count]     (default: 50000 notes)
+import os
+import random
+import sys
+import tempfile
+import time
+
+from corpus import write_corpus
+from notes import Note, Notebook
+from sharded_notebook import ShardedNotebook, migrate
+
+LOOKUPS = 2000
+REPEAT = 5
+
+
+def per_call(function, inputs):#mean ms per call
+    start = time.perf_counter()
+    for value in inputs:
+        function(value)
+    return (time.perf_counter() - start) * 1000 / len(inputs)
+
+
+def best(function):#fastest of REPEAT runs in ms, the first run also builds whatever is cached
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times)
+
+
+def main(count):
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        layouts = [('flat', None), ('16 shards', 16), ('256 shards', 256)]
+        print(f'{count} notes, {LOOKUPS} random lookups')
+        print(f'    {"layout":12} {"listdir":>10} {"stat":>9} {"get_note":>9} {"save":>9} {"list_notes":>11} {"search":>9} {"get_stats":>10}')
+        for name, shards in layouts:
+            folder = os.path.join(tmp, name.replace(' ', '-'))
+            os.makedirs(folder)
+            files = write_corpus(folder, count, body_words=40)
+            if shards:
+                migrate(folder, shards=shards)
+                notebook = ShardedNotebook(folder)
+                folders = [shard.notes_folder for shard in notebook.shards]
+                where = lambda file: notebook._shard_for(file).notes_folder
+            else:
+                notebook = Notebook(folder)
+                folders = [folder]
+                where = lambda file: folder
+            picked = rng.sample(files, LOOKUPS)
+            listdir = best(lambda: [os.listdir(path) for path in folders])
+            stat = per_call(lambda file: os.stat(os.path.join(where(file), file)), picked)
+            get = per_call(notebook.get_note, picked)
+            save = per_call(lambda i: notebook.save_note(Note(f'new {i}', 'new note'), f'new-{i:06d}'), range(200))
+            notebook.search_notes('warmup')#builds the indexes and the catalog once
+            notebook.get_stats()
+            listing = best(notebook.list_notes)
+            search = best(lambda: notebook.search_notes('memory'))
+            stats = best(notebook.get_stats)
+            print(f'    {name:12} {listdir:8.1f}ms {stat:7.4f}ms {get:7.4f}ms {save:7.3f}ms {listing:9.1f}ms {search:7.2f}ms {stats:8.1f}ms')
+            if shards:
+                notebook.close()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,127 @@
+# The benchmark suite: builds a synthetic notebook in a temporary folder (bodies made from the words of the
+# test-notes/ samples) and times what every user does: list_notes, get_note, search_notes, get_stats, save
+# and delete_note. Prints a table, --json writes the numbers to a file and --compare checks them against an
+# earlier run, so a change that makes something slower shows up (exit code 1) before it is merged.
+# python benchmarks/bench_suite.py [--notes 1000 10000] [--body-words 120] [--spread 1.0] [--tags 50]
+#                                  [--repeat 50] [--json results.json] [--compare baseline.json] [--tolerance 0.25]
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+
+import corpus
+from notes import Note, Notebook
+
+QUERIES = ['memory', 'data structures', 'queue AND stack', '"linked list"', 'algo*', 'zzznotthere']
+
+
+def summarize(latencies):#seconds per call -> the numbers we keep, in milliseconds
+    latencies = sorted(latencies)
+    total = sum(latencies)
+    return {
+        'calls': len(latencies),
+        'mean_ms': round(total / len(latencies) * 1000, 4),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 4),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 4),
+        'ops_per_s': round(len(latencies) / total, 1) if total else None,
+    }
+
+
+def measure(function, arguments):#calls function once per argument, returns summarize() of the call times
+    latencies = []
+    for argument in arguments:
+        start = time.perf_counter()
+        function(argument)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+def bench(count, args):
+    rng = random.Random(args.seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        start = time.perf_counter()
+        files = corpus.write_corpus(folder, count, args.body_words, args.seed, args.spread, corpus.make_tags(args.tags))
+        results['generate'] = summarize([time.perf_counter() - start])
+
+        # cold: a new process with no sidecar files yet, the first call builds the catalog/indexes
+        notebook = Notebook(folder)
+        results['get_stats (cold)'] = measure(lambda _: notebook.get_stats(), [None])
+        results['search_notes (cold)'] = measure(lambda _: notebook.search_notes('memory'), [None])
+
+        notebook = Notebook(folder)#sidecars on disk now, like every later run of the app
+        results['load sidecars'] = measure(lambda _: (notebook.get_stats(), notebook.search_notes('memory')), [None])
+        results['list_notes'] = measure(lambda _: notebook.list_notes(), range(args.repeat))
+        results['get_note'] = measure(notebook.get_note, [rng.choice(files) for _ in range(args.repeat)])
+        results['search_notes'] = measure(notebook.search_notes, [QUERIES[i % len(QUERIES)] for i in range(args.repeat)])
+        results['get_stats'] = measure(lambda _: notebook.get_stats(), range(args.repeat))
+
+        words = corpus.seed_words()
+        new_notes = [(Note(f'Bench note {i}', ' '.join(rng.choice(words) for _ in range(args.body_words)),
+                           rng.sample(corpus.TAGS, 2)), f'bench-{i:05d}') for i in range(args.repeat)]
+        results['save'] = measure(lambda item: notebook.save_note(*item), new_notes)
+        results['delete_note'] = measure(notebook.delete_note, [filename for _, filename in new_notes])
+    return results
+
+
+def compare(current, baseline, tolerance):#prints the changes, returns the (size, operation) pairs that got slower
+    slower = []
+    for size, operations in current.items():
+        for name, numbers in operations.items():
+            old = baseline.get(size, {}).get(name)
+            if not old or not old['p50_ms']:
+                continue
+            ratio = numbers['p50_ms'] / old['p50_ms']
+            flag = 'SLOWER' if ratio > 1 + tolerance else 'faster' if ratio < 1 - tolerance else ''
+            print(f'{size:>7} {name:22} {old["p50_ms"]:10.3f}ms -> {numbers["p50_ms"]:10.3f}ms  {ratio:6.2f}x  {flag}')
+            if flag == 'SLOWER':
+                slower.append((size, name))
+    return slower
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='time the common notebook operations on synthetic notebooks')
+    parser.add_argument('--notes', type=int, nargs='+', default=[1000, 10000], help='notebook sizes to test')
+    parser.add_argument('--body-words', type=int, default=120, help='typical words per note body')
+    parser.add_argument('--spread', type=float, default=1.0, help='0 = every body the same length, higher = more varied')
+    parser.add_argument('--tags', type=int, default=50, help='size of the tag vocabulary')
+    parser.add_argument('--repeat', type=int, default=50, help='calls timed per operation')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--compare', help='results file of an earlier run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='p50 changes smaller than this are noise')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for count in args.notes:
+        results[str(count)] = bench(count, args)
+        print(f'{count:>7} notes          calls    mean ms     p50 ms     p95 ms      ops/s')
+        for name, numbers in results[str(count)].items():
+            print(f'    {name:22} {numbers["calls"]:5} {numbers["mean_ms"]:10.3f} {numbers["p50_ms"]:10.3f}'
+                  f' {numbers["p95_ms"]:10.3f} {numbers["ops_per_s"] or 0:10.1f}')
+
+    report = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {name: value for name, value in vars(args).items() if name not in ('json', 'compare')},
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\ncompared with {args.compare} ({baseline['date']})")
+        if compare(results, baseline['results'], args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,39 @@
+# Notes written per second: one Notebook.save_note per note vs. Notebook.save_many batches.
+# python benchmarks/bench_writes.py [counts...]     (default: 1000 5000)
+import sys
+import tempfile
+import time
+
+import corpus
+from notes import Note, Notebook
+
+
+def make_notes(count, seed=0):
+    rng = corpus.random.Random(seed)
+    words = corpus.seed_words()
+    return [(Note(' '.join(rng.choice(words) for _ in range(3)), ' '.join(rng.choice(words) for _ in range(120)),
+                  rng.sample(corpus.TAGS, rng.randint(0, 3))), f'note-{i:06d}') for i in range(count)]
+
+
+def bench(count):
+    print(f'{count:>7} notes')
+    for mode in ('single, no fsync', 'single', 'save_many'):
+        notes = make_notes(count)
+        with tempfile.TemporaryDirectory() as folder:
+            notebook = Notebook(folder)
+            notebook.search_notes('x')#the indexes exist, so every save also appends to their journals
+            notebook.notes_with_tag('x')
+            start = time.perf_counter()
+            if mode == 'save_many':
+                notebook.save_many(notes)
+            else:
+                for note, filename in notes:
+                    note.save(filename, folder, durable=(mode == 'single'))
+            elapsed = time.perf_counter() - start
+        print(f'    {mode:18} {elapsed:7.2f}s  {count / elapsed:9.0f} notes/s')
+
+
+if __name__ == '__main__':
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 5000]
+    for count in counts:
+        bench(count)
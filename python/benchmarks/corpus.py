@@ -0,0 +1,69 @@
+import os
+import math
+import random
+import re
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))#so the benchmarks can import notes.py from the folder above
+
+SEED_FOLDER = os.path.join(os.path.dirname(os.path.dirname(HERE)), 'test-notes')#sample notes shipped with the repo
+TAGS = ['python', 'java', 'coursework', 'ideas', 'todo', 'reading', 'work', 'personal', 'algorithms', 'recipes']
+
+
+def seed_words():#every word in the sample notes, used as the vocabulary for fake notes
+    words = []
+    for name in sorted(os.listdir(SEED_FOLDER)):
+        with open(os.path.join(SEED_FOLDER, name), encoding='utf-8') as f:
+            words.extend(re.findall(r'[A-Za-z]+', f.read().split('---', 2)[-1]))
+    return words
+
+
+def make_tags(count):#a tag vocabulary of any size: the usual TAGS first, then tag-10, tag-11, ...
+    return (TAGS + [f'tag-{i}' for i in range(len(TAGS), count)])[:count]
+
+
+def body_length(rng, body_words, spread):#words in one note body; spread > 0 draws it from a log-normal around body_words
+    if not spread:
+        return body_words
+    return max(1, int(rng.lognormvariate(math.log(body_words), spread)))
+
+
+def made_up_words(count, seed=0):#count different pronounceable words ('tavopi', 'kemu', ...) for a big vocabulary
+    rng = random.Random(seed)
+    syllables = [c + v for c in 'bdfgklmnprstvz' for v in 'aeiou']
+    words = set()
+    while len(words) < count:
+        words.add(''.join(rng.choice(syllables) for _ in range(rng.randint(2, 5))))
+    return sorted(words)
+
+
+def write_corpus(folder, count, body_words=120, seed=0, spread=0.0, tags=None, extra_words=0):#writes count .note files into folder, returns their filenames
+    # spread: 0 = every body has body_words words, 1.0 = a few notes 10x longer and many much shorter, like real notebooks
+    # tags: the vocabulary notes pick 0-3 tags from (default TAGS, see make_tags for bigger ones)
+    # extra_words: 1 in 5 body words comes from this many made-up words (a few common, most rare), the sample
+    #              notes alone only have ~600 different words, real notebooks have 100,000s
+    rng = random.Random(seed)
+    words = seed_words()
+    vocabulary = tags or TAGS
+    extra = made_up_words(extra_words, seed)
+    def word():
+        if extra and rng.random() < 0.2:
+            return extra[int(len(extra) * rng.random() ** 3)]
+        return rng.choice(words)
+    files = []
+    for i in range(count):
+        title = ' '.join(word() for _ in range(3))
+        tags = rng.sample(vocabulary, rng.randint(0, 3))
+        body = ' '.join(word() for _ in range(body_length(rng, body_words, spread)))
+        filename = f'note-{i:06d}.note'
+        with open(os.path.join(folder, filename), 'w', encoding='utf-8') as f:
+            f.write('---\n')
+            f.write(f"created: '2025-01-01T00:00:00.{i % 1000000:06d}Z'\n")
+            f.write(f"modified: '2025-01-01T00:00:00.{i % 1000000:06d}Z'\n")
+            f.write('tags: []\n' if not tags else 'tags:\n' + ''.join(f'- {tag}\n' for tag in tags))
+            f.write(f'title: {title}\n')
+            f.write('---\n\n')
+            f.write(body)
+        files.append(filename)
+    return files
@@ -0,0 +1,99 @@
+# Load test for server.py: many keep-alive clients hammering the API, reports p50/p99 latency and requests/sec.
+# python benchmarks/load_test.py [--url http://127.0.0.1:8000] [--clients 50] [--requests 5000] [--notes 2000]
+# Without --url it starts a server on a temporary synthetic notebook and stops it afterwards.
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from urllib.parse import urlsplit
+
+from corpus import write_corpus, HERE
+
+PATHS = ['/api/notes', '/api/notes?offset=100&limit=20', '/api/tags', '/api/notes/tag/python',
+         '/api/search?q=memory', '/api/search?q=data%20AND%20structures', '/api/notes/note-000042']
+
+
+async def client(host, port, paths, count, latencies, gzip):
+    reader, writer = await asyncio.open_connection(host, port)
+    extra = 'Accept-Encoding: gzip\r\n' if gzip else ''
+    for i in range(count):
+        path = paths[i % len(paths)]
+        start = time.perf_counter()
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\n{extra}\r\n'.encode('latin-1'))
+        await writer.drain()
+        head = await reader.readuntil(b'\r\n\r\n')
+        length = 0
+        for line in head.split(b'\r\n'):
+            if line.lower().startswith(b'content-length:'):
+                length = int(line.split(b':', 1)[1])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def run(host, port, clients, requests, gzip):
+    latencies = []
+    per_client = max(requests // clients, 1)
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, PATHS[i % len(PATHS):] + PATHS[:i % len(PATHS)], per_client, latencies, gzip)
+                           for i in range(clients)))
+    return latencies, time.perf_counter() - start
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def wait_for(host, port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('server did not start')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url')
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--notes', type=int, default=2000)
+    parser.add_argument('--gzip', action='store_true')
+    args = parser.parse_args()
+
+    server = folder = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        folder = tempfile.TemporaryDirectory()
+        write_corpus(folder.name, args.notes)
+        with socket.socket() as probe:#find a free port
+            probe.bind(('127.0.0.1', 0))
+            host, port = probe.getsockname()
+        server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(HERE), 'server.py'), str(port), folder.name])
+        wait_for(host, port)
+        asyncio.run(run(host, port, 1, len(PATHS), args.gzip))#warm up the index and catalog
+    try:
+        latencies, elapsed = asyncio.run(run(host, port, args.clients, args.requests, args.gzip))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+            folder.cleanup()
+    print(f'{len(latencies)} requests, {args.clients} clients, {elapsed:.2f}s')
+    print(f'    {len(latencies) / elapsed:9.0f} requests/s')
+    print(f'    p50 {percentile(latencies, 0.50) * 1000:8.2f}ms')
+    print(f'    p99 {percentile(latencies, 0.99) * 1000:8.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
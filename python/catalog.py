@@ -0,0 +1,93 @@
+import os # scandir/stat to find which notes changed
+import sys # sys.intern for tag strings
+import json # the catalog is one JSON file
+
+from perf import timed
+
+
+# The catalog keeps the header of every note (title, tags, author, ...) in one sidecar file.
+# Each entry remembers the size and mtime of the note it was read from, so refresh() only
+# has to stat the folder and reparse the notes whose size or mtime changed.
+
+FIELDS = ['title', 'tags', 'author', 'status', 'priority', 'created', 'modified']
+
+
+class Catalog():
+    FILENAME = '.catalog.json'
+    VERSION = 1
+
+    def __init__(self, notes_folder):#constructor
+        self.notes_folder = notes_folder
+        self.path = os.path.join(notes_folder, self.FILENAME)
+        self.entries = {} #file -> {'mtime', 'size', 'title', 'tags', ...}
+        self.loaded = False
+        self.version = 0 #goes up whenever entries change, so things built from them know when to rebuild
+
+    def load(self):#one read for the whole folder
+        self.loaded = True
+        self.version += 1
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):#no catalog yet, or a damaged one: refresh() fills it again
+            self.entries = {}
+            return
+        self.entries = data.get('entries', {}) if data.get('version') == self.VERSION else {}
+        for entry in self.entries.values():#json.load makes a new string for every tag of every note
+            entry['tags'] = [sys.intern(tag) for tag in entry['tags']]
+
+    def save(self):
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'entries': self.entries}, f, separators=(',', ':'))
+        os.replace(temp_path, self.path)#never leaves a half written catalog behind
+
+    @timed('Catalog.refresh')
+    def refresh(self, load_notes):#load_notes(filenames) -> (filename, Note) pairs, only called with new or changed notes
+        if not self.loaded:
+            self.load()
+        seen = set()
+        changed = {}
+        for entry in os.scandir(self.notes_folder):
+            if not entry.name.endswith('.note'):
+                continue
+            seen.add(entry.name)
+            changed[entry.name] = entry.stat()
+        removed = [name for name in self.entries if name not in seen]#notes deleted since last time
+        return self.update(changed, removed, load_notes)
+
+    def update(self, changed, removed, load_notes):#changed = {file: os.stat_result}, removed = [file], e.g. from a FolderWatcher
+        if not self.loaded:
+            self.load()
+        removed = [name for name in removed if self.entries.pop(name, None) is not None]
+        changed = {name: st for name, st in changed.items() if not self._current(name, st)}
+        if not changed and not removed:
+            return False
+        for name, note in load_notes(list(changed)):
+            self.entries[name] = self._record(changed.pop(name), note)
+        for name, st in changed.items():#load_notes skipped these, they are corrupted
+            self.entries[name] = {'mtime': st.st_mtime_ns, 'size': st.st_size, 'broken': True, 'tags': []}
+        self.version += 1
+        self.save()
+        return True
+
+    def _current(self, name, st):#the entry was read from a file with this size and mtime
+        cached = self.entries.get(name)
+        return cached is not None and cached['mtime'] == st.st_mtime_ns and cached['size'] == st.st_size
+
+    def _record(self, st, note):
+        return dict(header_record(note), mtime=st.st_mtime_ns, size=st.st_size)
+
+
+def header_record(note):#the FIELDS of a note as JSON-able values
+    record = {}
+    for field in FIELDS:
+        value = getattr(note, field)
+        if value is not None and not isinstance(value, (str, int, list)):#e.g. unquoted dates that YAML turned into datetime
+            value = str(value)
+        record[field] = value
+    record['tags'] = [sys.intern(str(tag)) for tag in record['tags'] or []]
+    if getattr(note, 'encryption', None) == 'note':#only what the file shows, even when the note was decrypted
+        from encryption import ENCRYPTED_TITLE
+        record.update(title=ENCRYPTED_TITLE, tags=[], author=None, status=None, priority=None)
+    return record
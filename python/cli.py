@@ -0,0 +1,334 @@
+import sys
+import json
+import shlex # splits batch lines like a shell would
+import argparse
+from contextlib import nullcontext
+
+import perf
+from notes import Note, Notebook, open_notebook, SAVE_BATCH
+
+
+# Non-interactive commands for scripts, cron jobs and editor hooks:
+#
+#   python notes.py list [--tag TAG ... [--any]] python notes.py search "query" [--fuzzy]
+#   python notes.py show ID                     python notes.py stats [--perf]
+#   python notes.py create ID --title T ...     python notes.py tags
+#   python notes.py edit ID [--content C ...]   python notes.py reindex
+#   python notes.py delete ID
+#
+# --json prints one JSON document, --ndjson prints one JSON line per item.
+# --batch reads one command per line from stdin and runs them all in this process against one
+# Notebook, e.g. a bulk import of thousands of notes. A line is either the command as you would type
+# it (create ideas --title "Ideas") or a JSON object ({"op": "create", "id": "ideas", "title": "Ideas"}).
+# Every result is printed as one JSON line: {"op": ..., "ok": true, "result": ...}.
+
+NOTE_FIELDS = ('title', 'content', 'tags', 'author', 'status', 'priority')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='notes', description='Personal notes manager')
+    parser.add_argument('--folder', help='use this notes folder instead of the configured storage')
+    parser.add_argument('--backend', choices=['folder', 'sqlite', 'pack', 'sharded'], help='storage backend (default: Configurator.STORAGE_BACKEND)')
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('--json', dest='output', action='store_const', const='json', help='print JSON')
+    output.add_argument('--ndjson', dest='output', action='store_const', const='ndjson', help='print one JSON object per line')
+    parser.add_argument('--batch', action='store_true', help='read commands from stdin, one per line')
+    commands = parser.add_subparsers(dest='op')
+    add_commands(commands)
+    return parser
+
+
+def add_commands(commands):
+    listing = commands.add_parser('list', help='list notes')
+    listing.add_argument('--tag', action='append', help='only notes with this tag (repeat for several tags)')
+    listing.add_argument('--any', dest='match', action='store_const', const='any', default='all',
+                         help='with several --tag: notes with any of them instead of all of them')
+    listing.add_argument('--sort', choices=['title', 'created', 'modified', 'priority', 'file'], help='order of the notes (default: file)')
+    listing.add_argument('--reverse', action='store_true', help='newest/largest first')
+    listing.add_argument('--offset', type=int, default=0, help='skip this many notes')
+    listing.add_argument('--limit', type=int, help='at most this many notes')
+
+    show = commands.add_parser('show', help='print a note')
+    show.add_argument('id')
+
+    for name in ('create', 'edit'):
+        command = commands.add_parser(name, help=f'{name} a note')
+        command.add_argument('id', help='note filename without .note')
+        command.add_argument('--title')
+        command.add_argument('--content', help="note body, '-' reads it from stdin")
+        command.add_argument('--tags', type=lambda text: [tag.strip() for tag in text.split(',') if tag.strip()], help='comma-separated')
+        command.add_argument('--author')
+        command.add_argument('--status')
+        command.add_argument('--priority')
+
+    delete = commands.add_parser('delete', help='delete a note')
+    delete.add_argument('id')
+
+    search = commands.add_parser('search', help='search titles, tags and content, best matches first')
+    search.add_argument('query')
+    search.add_argument('--limit', type=int, help='only the best LIMIT matches')
+    search.add_argument('--fuzzy', action='store_true', help='also match words with a typo or two')
+
+    history = commands.add_parser('history', help="a note's saved versions, oldest first")
+    history.add_argument('id')
+
+    restore = commands.add_parser('restore', help='bring back an older version of a note (or a deleted note)')
+    restore.add_argument('id')
+    restore.add_argument('version', type=int)
+
+    stats = commands.add_parser('stats', help='note statistics')
+    stats.add_argument('--perf', action='store_true', help='also show where the time went (see perf.py)')
+    commands.add_parser('tags', help='every tag with its number of notes')
+    commands.add_parser('reindex', help='rebuild the search and tag indexes from the note files')
+    duplicates = commands.add_parser('duplicates', help='groups of notes with the same or almost the same text')
+    duplicates.add_argument('--threshold', type=float, help='how alike near copies must be, 0-1 (default 0.8)')
+
+
+class CommandError(Exception):
+    pass
+
+
+class BatchParser(argparse.ArgumentParser):#a bad batch line is reported and skipped, not the end of the program
+    def error(self, message):
+        raise CommandError(message)
+
+    def print_help(self, file=None):#--help would print into the JSON results and then exit
+        raise CommandError(f'no help in a batch, run: {self.prog} --help')
+
+    def exit(self, status=0, message=None):
+        raise CommandError(message or f'{self.prog} wanted to exit')
+
+
+def run_command(notebook, op, params, interactive=True):#runs one command, returns something JSON can print
+    # interactive=False (a batch): nothing that waits for a person, like edit without fields opening nano
+    if op == 'list':
+        headers = notebook.note_headers()
+        tags = params.get('tag')
+        if params.get('sort') or params.get('offset') or params.get('limit') is not None:#one sorted page, see Notebook.list_notes
+            if tags and params.get('match') == 'any':
+                raise CommandError("--any can't be combined with --sort, --offset or --limit")
+            files = notebook.list_notes(params.get('sort') or 'file', params.get('offset') or 0, params.get('limit'),
+                                        params.get('reverse', False), **({'tags': [tags] if isinstance(tags, str) else tags} if tags else {}))
+            by_file = {header['file']: header for header in headers}
+            return [dict(by_file[file], id=note_id(file)) for file in files if file in by_file]
+        if tags:
+            files = set(notebook.notes_with_tags([tags] if isinstance(tags, str) else tags, params.get('match', 'all')))
+            headers = [header for header in headers if header['file'] in files]
+        return [dict(header, id=note_id(header['file'])) for header in headers]
+    if op == 'show':
+        return dict(load(notebook, params['id']).to_dict(), id=params['id'])
+    if op == 'create':
+        return save(notebook, new_note(params), params)
+    if op == 'edit':
+        note = load(notebook, params['id'])
+        if not any(params.get(field) is not None for field in NOTE_FIELDS):#nothing to change: open the note in nano
+            if not interactive:
+                raise CommandError(f"nothing to change in '{params['id']}', give at least one of --{', --'.join(NOTE_FIELDS)}")
+            import subprocess
+            notebook.edit_note(f"{params['id']}.note", lambda path: subprocess.call(['nano', path]))
+            return {'id': params['id']}
+        return save(notebook, note, params)
+    if op == 'delete':
+        load(notebook, params['id'])#a clear error for unknown notes
+        notebook.delete_note(params['id'])
+        return {'id': params['id'], 'deleted': True}
+    if op == 'search':
+        results = notebook.search_ranked(params['query'], limit=params.get('limit'), fuzzy=bool(params.get('fuzzy')))
+        return [dict(result, id=note_id(result['file'])) for result in results]
+    if op in ('history', 'restore') and not notebook.keeps_history:
+        raise CommandError(f'{type(notebook).__name__} keeps no note history, use a folder notebook for history/restore')
+    if op == 'history':
+        return notebook.history(f"{params['id']}.note")
+    if op == 'restore':
+        try:
+            note = notebook.restore(f"{params['id']}.note", int(params['version']))
+        except KeyError:
+            raise CommandError(f"note '{params['id']}' has no version {params['version']}")
+        return {'id': params['id'], 'title': note.title, 'modified': note.modified}
+    if op == 'stats':
+        if params.get('perf'):
+            perf.enable()#times this command too, on top of whatever ran before it with PERF=1 or in the batch
+        stats = notebook.get_stats()
+        result = {'total_notes': stats['total_notes'], 'total_tags': stats['total_tags'],
+                  'top_tags': notebook.top_tags(10)}
+        if params.get('perf'):
+            result['perf'] = perf.snapshot()
+        return result
+    if op == 'tags':
+        return dict(sorted(notebook.tag_counts().items(), key=lambda item: str(item[0]).lower()))
+    if op == 'reindex':
+        notebook.rebuild_index()
+        notebook.rebuild_tag_index()
+        return {'notes': len(notebook.list_notes())}
+    if op == 'duplicates':
+        groups = notebook.find_duplicates(params.get('threshold'))
+        return [dict(group, ids=[note_id(file) for file in group['files']]) for group in groups]
+    raise CommandError(f'unknown command {op!r}')
+
+
+def note_id(file):
+    return file[:-len('.note')] if file.endswith('.note') else file
+
+
+def load(notebook, id):
+    try:
+        return notebook.get_note(f'{id}.note')
+    except FileNotFoundError:
+        raise CommandError(f"note '{id}' not found")
+
+
+def new_note(params):#the Note a create command makes, not saved yet
+    if not params.get('title'):
+        raise CommandError('create needs --title')
+    return fill(Note(params['title'], ''), params)
+
+
+def fill(note, params):
+    for field in NOTE_FIELDS:
+        value = params.get(field)
+        if field == 'content' and value == '-':
+            value = sys.stdin.read().strip()
+        if field == 'tags' and value is not None and not (isinstance(value, list) and all(isinstance(tag, str) for tag in value)):
+            raise CommandError('tags must be a list of strings')#a batch JSON line can hold anything
+        if value is not None:
+            setattr(note, field, value)
+    return note
+
+
+def save(notebook, note, params):
+    notebook.save_note(fill(note, params), params['id'])
+    return saved(note, params)
+
+
+def saved(note, params):#what create and edit answer
+    return {'id': params['id'], 'title': note.title, 'modified': note.modified}
+
+
+def print_result(op, result, output):
+    if output == 'json':
+        print(json.dumps(result, default=str))
+    elif output == 'ndjson':
+        for item in (result if isinstance(result, list) else [result]):
+            print(json.dumps(item, default=str))
+    else:
+        print_text(op, result)
+
+
+def print_text(op, result):#the same information, for people
+    if op == 'list':
+        for header in result:
+            print(f"{header['id']}\t{header['title']}")
+    elif op == 'search':
+        for match in result:
+            print(match['id'])
+    elif op == 'show':
+        print(f"--- {result['metadata']['title']} ---")
+        print(f"Created: {result['metadata']['created']}")
+        print(f"Tags: {result['metadata']['tags']}")
+        print()
+        print(result['content'])
+    elif op == 'stats':
+        print(f"Total Notes: {result['total_notes']}")
+        print(f"Unique tags: {result['total_tags']}")
+        for tag, count in result['top_tags']:
+            print(f' {tag}: {count} notes')
+        if 'perf' in result:
+            print()
+            print('\n'.join(perf.format_snapshot(result['perf'])))
+    elif op == 'tags':
+        for tag, count in result.items():
+            print(f'{tag}: {count}')
+    elif op == 'delete':
+        print(f"Note '{result['id']}.note' deleted")
+    elif op == 'reindex':
+        print(f"Indexed {result['notes']} note(s)")
+    elif op == 'duplicates':
+        for group in result:
+            print(('same\t' if group['exact'] else f"{group['similarity']:.2f}\t") + ' '.join(group['ids']))
+    elif op == 'history':
+        for version in result:
+            print(f"{version['version']}\t{version['modified']}\t{version['kind']}")
+    else:
+        print(f"Note '{result['id']}.note' saved")
+
+
+def run_batch(notebook, lines, out=sys.stdout):#one JSON result line per command line, keeps going after errors
+    # A run of create lines is saved with one save_many() (one folder sync and one index update per
+    # SAVE_BATCH notes instead of per note), the results are still written one per line, in order.
+    commands = BatchParser(prog='notes', add_help=False)
+    add_commands(commands.add_subparsers(dest='op'))
+    failures = 0
+    creates = [] #(params, Note) of the create lines waiting for save_many()
+    def write(op, ok, value):
+        out.write(json.dumps({'op': op, 'ok': ok, 'result' if ok else 'error': value}, default=str) + '\n')
+        return 0 if ok else 1
+    def save_creates():
+        failed = 0
+        try:
+            notebook.save_many([(note, params['id']) for params, note in creates])
+        except Exception:#one of them can't be saved: the ones save_many didn't get to are saved one by one
+            pass
+        for params, note in creates:
+            if note._disk_modified is not None:#written by save_many, saving it again would add a version
+                write('create', True, saved(note, params))
+                continue
+            try:
+                notebook.save_note(note, params['id'])
+                failed += write('create', True, saved(note, params))
+            except Exception as error:
+                failed += write('create', False, f'{type(error).__name__}: {error}')
+        creates.clear()
+        return failed
+    with notebook.batch() if hasattr(notebook, 'batch') else nullcontext():#SQLite: one transaction for the whole batch
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            op = None
+            try:
+                if line.startswith('{'):
+                    params = json.loads(line)
+                    op = params.pop('op', None)
+                else:
+                    params = vars(commands.parse_args(shlex.split(line)))
+                    op = params.pop('op')
+                if op == 'create':
+                    creates.append((params, new_note(params)))
+                    if len(creates) >= SAVE_BATCH:
+                        failures += save_creates()
+                    continue
+                if creates:#earlier creates are saved before anything that could read them
+                    failures += save_creates()
+                failures += write(op, True, run_command(notebook, op, params, interactive=False))
+            except (CommandError, ValueError, KeyError, OSError) as error:
+                failures += write(op, False, str(error))
+            except Exception as error:#a bad value in a JSON line, e.g. {"op": "list", "tag": 5}
+                failures += write(op, False, f'{type(error).__name__}: {error}')
+        if creates:
+            failures += save_creates()
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    perf.setup()
+    notebook = Notebook(args.folder) if args.folder else open_notebook(args.backend)
+    if args.batch:
+        return run_batch(notebook, sys.stdin)
+    if not args.op:
+        parser.print_help()
+        return 2
+    params = vars(args)
+    op = params.pop('op')
+    try:
+        result = run_command(notebook, op, params)
+    except CommandError as error:
+        print(f'notes: {error}', file=sys.stderr)
+        return 1
+    print_result(op, result, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
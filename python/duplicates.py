@@ -0,0 +1,168 @@
+import os
+import json # the signature cache is one JSON file
+import base64 # signatures are stored as text in that file
+import hashlib # blake2b for the content hash and the shingle hashes
+from array import array # a signature is NUM_HASHES 32 bit numbers
+
+from search_index import tokenize
+
+
+# Finding copies without comparing every note with every other note.
+#
+# Exact copies have the same content hash (the body with runs of whitespace made one space).
+# Near copies (a fixed typo, an added line) are found with MinHash: the body is cut into shingles of
+# SHINGLE words, and a note's signature is NUM_HASHES minimums over the hashes of its shingles. Two
+# signatures agree in about the same fraction of places as the two shingle sets overlap (Jaccard).
+# The signature is made in one pass over the shingles ("one permutation hashing": the low bits of a
+# shingle's hash pick one of the NUM_HASHES places, the high bits are the value; a place no shingle
+# landed in borrows the next filled place's value, see signature()).
+#
+# LSH: the signature is cut into BANDS bands of ROWS numbers. Notes that share a whole band land in the
+# same bucket, and only notes in the same bucket are compared: each one against the first note of the
+# bucket, so a bucket of 1000 copies costs 999 comparisons, not 500,000. Two notes that are 80% alike
+# share at least one band 99.9% of the time, unrelated notes practically never do.
+#
+# The signatures of a folder are kept in .signatures.json with the note's modified time (and file
+# mtime/size), so only new or changed notes are read again. Encrypted notes are left out, a hash of
+# their text would tell what they contain.
+
+SHINGLE = 3 #words per shingle
+NUM_HASHES = 64
+BANDS = 16
+ROWS = NUM_HASHES // BANDS
+THRESHOLD = 0.8 #estimated Jaccard similarity from which two notes count as near copies
+SPREAD = 0x9E3779B1 #added per place a borrowed value moved, so borrowed values don't all agree
+
+
+def content_hash(text):#same hash for bodies that only differ in spacing
+    return hashlib.blake2b(' '.join(text.split()).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def shingles(text):#'a b c d' -> {'a b c', 'b c d'}, a body shorter than SHINGLE words is one shingle
+    words = tokenize(text)
+    if len(words) <= SHINGLE:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + SHINGLE]) for i in range(len(words) - SHINGLE + 1)}
+
+
+def signature(text):#MinHash signature of text as bytes (NUM_HASHES 32 bit numbers), None without words
+    lowest = [None] * NUM_HASHES
+    blake2b = hashlib.blake2b
+    for shingle in shingles(text):
+        value = int.from_bytes(blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+        place, value = value % NUM_HASHES, value >> 32
+        if lowest[place] is None or value < lowest[place]:
+            lowest[place] = value
+    filled = [place for place in range(NUM_HASHES) if lowest[place] is not None]
+    if not filled:
+        return None
+    values = array('I', [0] * NUM_HASHES)
+    following = filled[0] + NUM_HASHES #the first filled place, one round further
+    for place in range(NUM_HASHES - 1, -1, -1):#walking backwards, the next filled place is always known
+        if lowest[place] is not None:
+            following = place
+        values[place] = (lowest[following % NUM_HASHES] + (following - place) * SPREAD) & 0xFFFFFFFF#an empty place takes the next filled one's value
+    return values.tobytes()
+
+
+def similarity(a, b):#estimated Jaccard similarity of two signatures, 0.0 .. 1.0
+    return sum(x == y for x, y in zip(memoryview(a).cast('I'), memoryview(b).cast('I'))) / NUM_HASHES
+
+
+def fingerprint(note):#(content hash, signature) of a note, (None, None) for encrypted or empty notes
+    if getattr(note, 'encryption', None) or not (note.content or '').strip():
+        return None, None
+    return content_hash(note.content), signature(note.content)
+
+
+def find_duplicates(fingerprints, threshold=None):#fingerprints = {file: (content hash, signature)} -> groups of copies
+    # Returns [{'files': [...], 'exact': True/False, 'similarity': lowest similarity in the group}],
+    # exact groups are the same text, near groups have at least two different texts.
+    threshold = THRESHOLD if threshold is None else threshold
+    copies = {} #content hash -> files with that text
+    signatures = {}
+    for file, (digest, signature) in sorted(fingerprints.items()):
+        if digest is not None:
+            copies.setdefault(digest, []).append(file)
+            signatures.setdefault(digest, signature)
+    parent = {digest: digest for digest in copies} #union-find over the different texts
+    lowest = {}
+    def root(digest):
+        while parent[digest] != digest:
+            parent[digest] = parent[parent[digest]]
+            digest = parent[digest]
+        return digest
+    buckets = {}
+    size = ROWS * 4 #bytes per band
+    for digest, signature in signatures.items():
+        if signature is None:
+            continue
+        for band in range(BANDS):
+            first = buckets.setdefault((band, signature[band * size:(band + 1) * size]), digest)
+            if first == digest or root(first) == root(digest):
+                continue
+            score = similarity(signatures[first], signature)
+            if score >= threshold:
+                a, b = root(first), root(digest)
+                parent[b] = a
+                lowest[a] = min(lowest.get(a, 1.0), lowest.pop(b, 1.0), score)
+    groups = {}
+    for digest in copies:
+        groups.setdefault(root(digest), []).append(digest)
+    found = []
+    for top, digests in groups.items():
+        files = sorted(file for digest in digests for file in copies[digest])
+        if len(files) > 1:
+            found.append({'files': files, 'exact': len(digests) == 1, 'similarity': round(lowest.get(top, 1.0), 2)})
+    found.sort(key=lambda group: group['files'][0])
+    return found
+
+
+class SignatureCache():
+    FILENAME = '.signatures.json'
+    VERSION = 1
+
+    def __init__(self, notes_folder):#constructor, notes_folder=None keeps the signatures in memory only (a database, a pack)
+        self.path = None if notes_folder is None else os.path.join(notes_folder, self.FILENAME)
+        self.entries = None #file -> [stamp, content hash, signature], loaded on first use
+
+    def load(self):
+        self.entries = {}
+        if self.path is None:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):#no cache yet, or a damaged one: everything is read again
+            return
+        if data.get('version') == self.VERSION:
+            self.entries = {file: [stamp, digest, signature and base64.b64decode(signature)]
+                            for file, (stamp, digest, signature) in data['entries'].items()}
+
+    def save(self):
+        if self.path is None:
+            return
+        entries = {file: [stamp, digest, signature and base64.b64encode(signature).decode('ascii')]
+                   for file, (stamp, digest, signature) in self.entries.items()}
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'entries': entries}, f, separators=(',', ':'))
+        os.replace(temp_path, self.path)
+
+    def update(self, stamps, load_notes):#stamps = {file: its modified (and mtime/size)}, load_notes(files) -> (file, Note) pairs
+        # Returns {file: (content hash, signature)} for every note; only notes whose stamp changed are loaded.
+        if self.entries is None:
+            self.load()
+        removed = [file for file in self.entries if file not in stamps]
+        for file in removed:
+            del self.entries[file]
+        changed = [file for file, stamp in stamps.items() if file not in self.entries or self.entries[file][0] != stamp]
+        if changed:
+            for file, note in load_notes(changed):
+                self.entries[file] = [stamps[file], *fingerprint(note)]
+            for file in changed:
+                if self.entries.get(file, [None])[0] != stamps[file]:#unreadable, not tried again until it changes
+                    self.entries[file] = [stamps[file], None, None]
+        if changed or removed:
+            self.save()
+        return {file: (digest, signature) for file, (stamp, digest, signature) in self.entries.items()}
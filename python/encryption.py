@@ -0,0 +1,207 @@
+import os
+import io
+import json # the notebook's .encryption file
+import hmac # checks the passphrase without decrypting a note
+import base64
+import struct
+import hashlib # scrypt turns the passphrase into a key, it is in the standard library
+
+import frontmatter
+
+
+# Optional encryption of notes with AES-256-GCM (needs the cryptography package, nothing else does).
+#
+#   note.encryption = 'body'   the header stays readable, so titles and tags are still listed, searched and
+#                              counted; only the body is encrypted and it is never put in the search index
+#   note.encryption = 'note'   everything but created/modified is encrypted: the file shows ENCRYPTED_TITLE and
+#                              no tags, and the indexes and the catalog never see the real header either
+#
+# The key comes from a passphrase through scrypt, which is slow on purpose (~0.1 s and 32 MB). Notebook.unlock()
+# runs it once and keeps the key in memory for the rest of the session, every note after that costs only AES.
+# A notebook has one salt (in .encryption next to the notes, together with a passphrase check), and every
+# encrypted note names it in its header (kdf: scrypt.n.r.p.salt), so a note copied to another notebook
+# still says how to get its key.
+#
+# The body is encrypted in CHUNK sized pieces, one base64 line each:
+#   line 0      random nonce prefix (a new one on every save)
+#   line 1..n   AES-GCM(chunk i), nonce = prefix + i, the last chunk is marked so a cut-off file is detected
+# so a big note is encrypted and decrypted a chunk at a time, straight from the file, without a second
+# copy of the whole text in between.
+
+ENCRYPTED_TITLE = '(encrypted note)'
+SETTINGS_FILE = '.encryption'
+SCRYPT = (2 ** 15, 8, 1) #n, r, p
+CHUNK = 64 * 1024 #plaintext bytes per line
+PREFIX = 8 #random bytes of the 12 byte nonce, the other 4 count the chunks
+LAST = b'last' #authenticated with the final chunk
+MODES = ('body', 'note')
+
+
+class LockedError(Exception):#an encrypted note was opened or saved before Notebook.unlock(passphrase)
+    pass
+
+
+class DecryptionError(Exception):#wrong passphrase, or the note was changed or cut short
+    pass
+
+
+def _aesgcm(key):#cryptography is optional, only needed for encrypted notes
+    try:
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    except ImportError:
+        raise RuntimeError('encrypted notes need the cryptography package (pip install cryptography)')
+    return AESGCM(key)
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def new_kdf():#'scrypt.n.r.p.salt' with a fresh random salt
+    n, r, p = SCRYPT
+    return f'scrypt.{n}.{r}.{p}.{_b64(os.urandom(16))}'
+
+
+def derive(kdf, passphrase):#the expensive part, Keyring makes sure it runs once per salt
+    name, n, r, p, salt = kdf.split('.')
+    if name != 'scrypt':
+        raise ValueError(f'unknown key derivation {name!r}')
+    n, r, p = int(n), int(r), int(p)
+    return hashlib.scrypt(passphrase.encode('utf-8'), salt=_unb64(salt), n=n, r=r, p=p, maxmem=256 * n * r + 2 ** 20, dklen=32)
+
+
+class Keyring():#the session's passphrase and the keys derived from it, one per salt
+
+    def __init__(self, passphrase):#constructor
+        self.passphrase = passphrase
+        self.keys = {} #kdf string -> 32 byte key
+
+    def key(self, kdf):
+        key = self.keys.get(kdf)
+        if key is None:
+            key = self.keys[kdf] = derive(kdf, self.passphrase)
+        return key
+
+
+_keyring = None #set by unlock_notebook(), cleared by lock()
+
+
+def lock():#forget the passphrase and every key
+    global _keyring
+    _keyring = None
+
+
+def key_for(kdf):
+    if _keyring is None:
+        raise LockedError('this note is encrypted, unlock the notebook with its passphrase first')
+    return _keyring.key(kdf)
+
+
+# --- the notebook's salt ---
+
+def _check(key):
+    return hmac.new(key, b'notes passphrase check', hashlib.sha256).hexdigest()
+
+
+def notebook_kdf(notes_folder):#the kdf new encrypted notes of this folder use, None before the first unlock
+    try:
+        with open(os.path.join(notes_folder, SETTINGS_FILE), encoding='utf-8') as f:
+            return json.load(f)['kdf']
+    except FileNotFoundError:
+        return None
+
+
+def unlock_notebook(notes_folder, passphrase):#checks the passphrase (or sets it up the first time), derives and caches the key
+    global _keyring
+    path = os.path.join(notes_folder, SETTINGS_FILE)
+    try:
+        with open(path, encoding='utf-8') as f:
+            settings = json.load(f)
+    except FileNotFoundError:
+        settings = None
+    keyring = Keyring(passphrase) if _keyring is None or _keyring.passphrase != passphrase else _keyring
+    if settings is None:#first unlock: this passphrase becomes the notebook's
+        from notes import write_atomic
+        kdf = new_kdf()
+        settings = {'kdf': kdf, 'check': _check(keyring.key(kdf))}
+        write_atomic(path, json.dumps(settings))
+    if not hmac.compare_digest(_check(keyring.key(settings['kdf'])), settings['check']):
+        raise DecryptionError('wrong passphrase')
+    _keyring = keyring
+    return settings['kdf']
+
+
+# --- chunks ---
+
+def seal_lines(data, key):#bytes -> base64 lines (without newlines), one chunk at a time
+    cipher = _aesgcm(key)
+    prefix = os.urandom(PREFIX)
+    yield _b64(prefix)
+    view = memoryview(data)
+    count = max(1, -(-len(data) // CHUNK))
+    for i in range(count):
+        nonce = prefix + struct.pack('>I', i)
+        yield _b64(cipher.encrypt(nonce, view[i * CHUNK:(i + 1) * CHUNK], LAST if i == count - 1 else None))
+
+
+def open_lines(lines, key):#base64 lines (from a file or a string) -> plaintext bytes chunks
+    cipher = _aesgcm(key)
+    from cryptography.exceptions import InvalidTag
+    lines = (line.strip() for line in lines)
+    lines = (line.decode('ascii') if isinstance(line, bytes) else line for line in lines if line)
+    try:
+        prefix = _unb64(next(lines))
+        if len(prefix) != PREFIX:
+            raise ValueError
+        pending = next(lines)
+        i = 0
+        for line in lines:
+            yield cipher.decrypt(prefix + struct.pack('>I', i), _unb64(pending), None)
+            pending = line
+            i += 1
+        yield cipher.decrypt(prefix + struct.pack('>I', i), _unb64(pending), LAST)
+    except (StopIteration, ValueError, InvalidTag):
+        raise DecryptionError('the note could not be decrypted: wrong passphrase, or the file was changed or cut short')
+
+
+# --- notes ---
+
+def _clear_metadata(note):#what stays readable in the .note file
+    if note.encryption == 'note':
+        metadata = {'title': ENCRYPTED_TITLE, 'created': note.created, 'modified': note.modified, 'tags': []}
+    else:
+        metadata = note.metadata()
+    metadata.update(encrypted=note.encryption, kdf=note._kdf)
+    return metadata
+
+
+def seal_text(note):#the .note file text of an encrypted note
+    if note._sealed:#never opened (e.g. saved while locked): the encrypted part goes back as it was
+        lines = [note._content]
+    else:
+        if note.encryption not in MODES:
+            raise ValueError(f"encryption must be one of {MODES}, not {note.encryption!r}")
+        if note._kdf is None:
+            raise LockedError('unlock the notebook before saving encrypted notes')
+        plain = note.plain_text() if note.encryption == 'note' else note.content
+        lines = seal_lines(plain.encode('utf-8'), key_for(note._kdf))
+    return '---\n' + frontmatter.dump(_clear_metadata(note)) + '---\n\n' + '\n'.join(lines) + '\n'
+
+
+def open_note(note, lines=None):#decrypts a sealed note in place, lines = the encrypted body (default: note._content)
+    if lines is None:
+        lines = io.StringIO(note._content)
+    plain = b''.join(open_lines(lines, key_for(note._kdf))).decode('utf-8')
+    if note.encryption == 'note':#the whole note was encrypted, header included
+        from notes import Note
+        inner = Note.read(io.BytesIO(plain.encode('utf-8')))
+        for field in ('title', 'tags', 'author', 'status', 'priority', 'created', 'modified'):
+            setattr(note, field, getattr(inner, field))
+        plain = inner.content
+    note._content = plain
+    note._sealed = False
+    return note
@@ -0,0 +1,133 @@
+import re # recognises the simple header lines we can handle without a YAML parser
+
+from perf import timed
+
+
+# The app writes the same small, flat header for every note:
+#
+#   created: '2025-11-19T14:07:21.863265Z'
+#   modified: '2025-11-19T14:07:21.863265Z'
+#   tags:
+#   - testing
+#   title: My Test Note
+#
+# load() and dump() handle that shape by hand, which is many times faster than PyYAML's pure
+# Python parser/emitter. Anything unusual (nested values, dates that aren't quoted, long or
+# non-ASCII text, comments, ...) goes to full YAML. Reading uses the libyaml C parser when it's installed.
+# dump() gives exactly the bytes yaml.dump() would, so notes round-trip unchanged. That is why writing
+# falls back to the Python emitter: the C one wraps long double-quoted text differently.
+# PyYAML itself is only imported the first time a header needs it, it is slow to import.
+
+KEY_RE = re.compile(r'([A-Za-z_][A-Za-z0-9_]*):(?: (.*))?$')
+PLAIN_RE = re.compile(r"[A-Za-z_](?:[A-Za-z0-9_.,/()'+-]| (?=[A-Za-z0-9_.,/()'+-]))*")#text YAML reads back as the same string and writes without quotes
+QUOTABLE_RE = re.compile(r'[0-9][0-9:.TZ+-]*')#timestamps and numbers kept as text, YAML writes these in single quotes
+STR_TAG = 'tag:yaml.org,2002:str'
+INT_RE = re.compile(r'-?[1-9][0-9]*|0')
+RESERVED = {'yes', 'no', 'true', 'false', 'on', 'off', 'null'}#plain words YAML turns into booleans / None
+MAX_PLAIN = 60 #longer text with spaces may get wrapped by yaml.dump, leave that to yaml
+
+
+class Fallback(Exception):#the fast path can't handle this header
+    pass
+
+
+@timed('frontmatter.load')
+def load(text):#YAML header text -> dictionary
+    try:
+        return _fast_load(text)
+    except Fallback:
+        import yaml #full YAML, only for headers the fast path doesn't understand
+        return yaml.load(text, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))#the C version needs libyaml, PyYAML ships without it on some systems
+
+
+def dump(metadata):#dictionary -> YAML header text, same output as yaml.dump(metadata)
+    try:
+        return _fast_dump(metadata)
+    except Fallback:
+        import yaml
+        return yaml.dump(metadata, Dumper=yaml.SafeDumper)
+
+
+def _resolves_to_text(value):#would YAML read this bare value back as text (and not a date, number, ...)?
+    import yaml
+    return yaml.resolver.Resolver().resolve(yaml.ScalarNode, value, (True, False)) == STR_TAG
+
+
+def _fast_load(text):
+    metadata = {}
+    list_key = None #the key that '- item' lines belong to
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        if line.startswith('- ') or line.startswith('  - '):
+            if list_key is None:
+                raise Fallback
+            if metadata[list_key] is None:
+                metadata[list_key] = []
+            metadata[list_key].append(_load_scalar(line.split('- ', 1)[1]))
+            continue
+        match = KEY_RE.match(line)
+        if match is None or match.group(1) in metadata:
+            raise Fallback
+        key, value = match.groups()
+        list_key = None
+        if value is None or value.strip() == '':#'tags:' followed by '- item' lines (or nothing, which YAML reads as None)
+            metadata[key] = None
+            list_key = key
+        elif value.startswith('[') and value.rstrip().endswith(']'):#tags: [a, b] as in the README
+            inner = value.rstrip()[1:-1].strip()
+            metadata[key] = [_load_scalar(item.strip()) for item in inner.split(',')] if inner else []
+        else:
+            metadata[key] = _load_scalar(value)
+    if not metadata:
+        raise Fallback
+    return metadata
+
+
+def _load_scalar(value):
+    value = value.rstrip()
+    if len(value) >= 2 and value[0] == "'" and value[-1] == "'":
+        inner = value[1:-1]
+        if "'" in inner.replace("''", ''):#a quote that isn't escaped, not a single scalar
+            raise Fallback
+        return inner.replace("''", "'")
+    if value in ('null', 'Null', 'NULL', '~'):
+        return None
+    if INT_RE.fullmatch(value):
+        return int(value)
+    if PLAIN_RE.fullmatch(value) and value.lower() not in RESERVED:
+        return value
+    raise Fallback
+
+
+def _fast_dump(metadata):
+    lines = []
+    for key in sorted(metadata):
+        if not isinstance(key, str) or not PLAIN_RE.fullmatch(key):
+            raise Fallback
+        value = metadata[key]
+        if isinstance(value, list):
+            if not value:
+                lines.append(f'{key}: []\n')
+                continue
+            lines.append(f'{key}:\n')
+            lines.extend(f'- {_dump_scalar(item)}\n' for item in value)
+        else:
+            lines.append(f'{key}: {_dump_scalar(value)}\n')
+    return ''.join(lines)
+
+
+def _dump_scalar(value):
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        raise Fallback
+    if isinstance(value, int):
+        return str(value)
+    if not isinstance(value, str):
+        raise Fallback
+    if PLAIN_RE.fullmatch(value) and value.lower() not in RESERVED and (len(value) <= MAX_PLAIN or ' ' not in value):
+        return value
+    if QUOTABLE_RE.fullmatch(value) and not _resolves_to_text(value):
+        return f"'{value}'"#e.g. a timestamp kept as text
+    raise Fallback
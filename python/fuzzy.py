@@ -0,0 +1,123 @@
+from collections import Counter
+
+
+# Typo tolerant word lookup: which indexed words are within a few typos of a query word.
+# Every word is cut into trigrams ('python' -> $py pyt yth tho hon on$, the $ marks the ends) and
+# TrigramIndex keeps trigram -> word length -> words. One typo changes at most 4 of a word's trigrams
+# (3 for a wrong, missing or extra letter, 4 for two swapped letters), so a word within k typos shares at
+# least trigrams(query) - 4k of them with the query. Only words that do (and whose length is within k)
+# are checked with the real edit distance, the rest of the vocabulary is never looked at. When that bound
+# is 0 or less (4 letter words with one typo, 8 letter words with two) the filter can't rule anything out,
+# so every word of the right length is checked; TrigramIndex keeps the words by length for that.
+#
+# With two typos allowed the trigram filter lets through almost every word of the right length, so
+# similar() first looks for words one typo away (cheap, and what most typos are) and only tries two when
+# that finds nothing.
+#
+# The indexes keep one TrigramIndex over their distinct words, not over every note, so it stays small
+# (a word used in 10,000 notes is in it once) and a typo is fixed before the note lookup.
+
+FUZZY_WEIGHT = 0.5 #score factor per typo, so exact matches rank above corrected ones
+
+
+def trigrams(word):#'cat' -> {'$ca', 'cat', 'at$'}
+    padded = f'${word}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_typos(word):#how many typos a query word may have: none for short words (too many false hits), then 1, then 2
+    if len(word) < 4:
+        return 0
+    return 1 if len(word) < 8 else 2
+
+
+def one_typo(a, b):#distance(a, b, 1) <= 1 without the table: skip the common start and end, look at what is left
+    if abs(len(a) - len(b)) > 1:
+        return False
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a, b = a[start:end_a], b[start:end_b]
+    return len(a) + len(b) <= 1 or (len(a) == len(b) == 1) or (len(a) == len(b) == 2 and a == b[::-1])
+
+
+def distance(a, b, limit):#edit distance counting a swap of two letters as one typo (OSA), anything over limit -> limit + 1
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if limit == 1 and a != b:
+        return 1 if one_typo(a, b) else 2
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        smallest = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            smallest = min(smallest, value)
+        if smallest > limit:#every path is already too long
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class TrigramIndex():
+
+    def __init__(self, words=()):#constructor
+        self.grams = {} #trigram -> {word length: [words]}
+        self.lengths = {} #word length -> set of words, for queries too short for the trigram filter
+        for word in words:
+            self.add(word)
+
+    def add(self, word):#word must not be in the index yet
+        length = len(word)
+        self.lengths.setdefault(length, set()).add(word)
+        for gram in trigrams(word):
+            self.grams.setdefault(gram, {}).setdefault(length, []).append(word)
+
+    def remove(self, word):
+        length = len(word)
+        self.lengths[length].discard(word)
+        if not self.lengths[length]:
+            del self.lengths[length]
+        for gram in trigrams(word):
+            words = self.grams[gram][length]
+            words.remove(word)
+            if not words:
+                del self.grams[gram][length]
+                if not self.grams[gram]:
+                    del self.grams[gram]
+
+    def similar(self, word, typos=None):#{indexed word: typos} for the words within typos of word (the word itself too)
+        # typos=None: max_typos(word), but a second typo only when no word is the same or one typo away
+        if typos is None:
+            typos = max_typos(word)
+            found = self.similar(word, min(typos, 1))
+            if typos < 2 or found:
+                return found
+        grams = trigrams(word)
+        lengths = range(len(word) - typos, len(word) + typos + 1)
+        needed = len(grams) - 4 * typos
+        if needed > 0:
+            shared = Counter()
+            for gram in grams:
+                by_length = self.grams.get(gram)
+                if by_length:
+                    for length in lengths:
+                        shared.update(by_length.get(length, ()))
+            candidates = [candidate for candidate, count in shared.items() if count >= needed]
+        else:#the typos can change every trigram ('tset' shares none with 'test'): check every word of those lengths
+            candidates = [candidate for length in lengths for candidate in self.lengths.get(length, ())]
+        found = {}
+        for candidate in candidates:
+            typo_count = 0 if candidate == word else distance(word, candidate, typos)
+            if typo_count <= typos:
+                found[candidate] = typo_count
+        return found
@@ -0,0 +1,208 @@
+import sys
+from array import array # one machine integer per note instead of one Python object
+from bisect import bisect_left # finding a file's row
+from datetime import datetime, timedelta, timezone
+
+
+# The catalog's note headers stored by column instead of one dictionary per note.
+# Row i is one note: files[i], titles[i], created[i], ... Tags are numbered (tag_names[id]) and the
+# tags of row i are tag_ids[tag_starts[i]:tag_starts[i + 1]]. Author, status and priority are numbered
+# the same way, there are only a handful of different values. Timestamps are microseconds since 1970 (UTC).
+# Bulk work over every note (stats, sorting) walks these arrays without creating anything per note.
+
+NO_TIME = -2 ** 63 #created/modified missing or unreadable, sorts first
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+TOP_K_RATIO = 8 #a page ending before 1/8 of the rows is picked with heapq instead of sorting everything
+
+
+def to_micros(value):#header timestamp (text or datetime) -> microseconds since 1970 UTC, NO_TIME when we can't read it
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+        except ValueError:
+            return NO_TIME
+    if not isinstance(value, datetime):
+        return NO_TIME
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // MICROSECOND
+
+
+class Column():#dictionary encoded column: codes[i] is the number of row i's value in values
+    def __init__(self):
+        self.values = []
+        self.codes = array('I')
+        self._numbers = {}
+
+    def append(self, value):
+        key = (type(value), value)#keeps 1 and '1' apart
+        number = self._numbers.get(key)
+        if number is None:
+            number = self._numbers[key] = len(self.values)
+            self.values.append(value)
+        self.codes.append(number)
+
+    def __getitem__(self, row):
+        return self.values[self.codes[row]]
+
+
+class HeaderTable():
+
+    def __init__(self, entries):#entries = Catalog.entries
+        self.files = []
+        self.titles = []
+        self.created = array('q')
+        self.modified = array('q')
+        self.tag_names = []
+        self.tag_ids = array('I')
+        self.tag_starts = array('I', [0])
+        self.authors = Column()
+        self.statuses = Column()
+        self.priorities = Column()
+        self._orders = {} #(column, reverse) -> sorted row numbers, made on first use
+        self._keys = {} #column -> sort key of every row, see sort_key
+        self._sorted_titles = None #title keys in title order, for title_prefix
+        self._title_words = None #word -> rows with it in their title, for title_matches
+        self._title_vocabulary = None #those words sorted, for prefixes
+        numbers = {}
+        for file, entry in sorted(entries.items()):
+            self.files.append(sys.intern(file))
+            self.titles.append(entry.get('title'))
+            self.created.append(to_micros(entry.get('created')))
+            self.modified.append(to_micros(entry.get('modified')))
+            for tag in entry['tags']:
+                number = numbers.get(tag)
+                if number is None:
+                    number = numbers[tag] = len(self.tag_names)
+                    self.tag_names.append(tag)
+                self.tag_ids.append(number)
+            self.tag_starts.append(len(self.tag_ids))
+            self.authors.append(entry.get('author'))
+            self.statuses.append(entry.get('status'))
+            self.priorities.append(entry.get('priority'))
+
+    def __len__(self):
+        return len(self.files)
+
+    def tags(self, row):
+        return [self.tag_names[number] for number in self.tag_ids[self.tag_starts[row]:self.tag_starts[row + 1]]]
+
+    def tag_counts(self):#Counter of tag -> number of times it is used
+        from collections import Counter
+        counts = [0] * len(self.tag_names)
+        for number in self.tag_ids:
+            counts[number] += 1
+        return Counter(dict(zip(self.tag_names, counts)))
+
+    def sort_key(self, by):#row -> value to sort rows by: title, file, created, modified or priority
+        # The keys are worked out once per column and kept, so sorting and heapq only do list lookups.
+        # Rows are in filename order and both sorted() and heapq are stable, so ties stay in filename order.
+        keys = self._keys.get(by)
+        if keys is None:
+            if by == 'title':
+                keys = [str(title or file).lower() for title, file in zip(self.titles, self.files)]
+            elif by in ('created', 'modified', 'file'):
+                keys = {'created': self.created, 'modified': self.modified, 'file': self.files}[by]
+            elif by == 'priority':#numbers (1 = most important) first, then text, notes without a priority last
+                values = [priority_key(value) for value in self.priorities.values]
+                keys = [values[code] for code in self.priorities.codes]
+            else:
+                raise ValueError(f"can't sort by {by!r}")
+            self._keys[by] = keys
+        return keys.__getitem__
+
+    def order(self, by='title', reverse=False):#every row number sorted by a column, kept until the table is rebuilt
+        order = self._orders.get((by, reverse))
+        if order is None:
+            order = self._orders[(by, reverse)] = sorted(range(len(self.files)), key=self.sort_key(by), reverse=reverse)
+        return order
+
+    def page(self, by='title', offset=0, limit=None, reverse=False, rows=None):#row numbers of one page, rows = only these rows (a filter)
+        # With a sorted order already made, a page is a slice of it. Otherwise a small first page comes
+        # from heapq (k smallest of n, no full sort); anything bigger sorts once and keeps the order.
+        end = None if limit is None else offset + limit
+        total = len(self.files) if rows is None else len(rows)
+        order = self._orders.get((by, reverse))
+        if order is None and end is not None and end * TOP_K_RATIO < total:
+            import heapq
+            pick = heapq.nlargest if reverse else heapq.nsmallest
+            return pick(end, range(len(self.files)) if rows is None else rows, key=self.sort_key(by))[offset:end]
+        if order is None and rows is not None:#a filtered subset: sort just that
+            return sorted(rows, key=self.sort_key(by), reverse=reverse)[offset:end]
+        order = self.order(by, reverse)
+        if rows is not None:
+            order = [row for row in order if row in rows]
+        return order[offset:end]
+
+    def title_prefix(self, prefix, limit=None):#rows whose title starts with prefix (ignoring case), in title order
+        order = self.order('title')
+        if self._sorted_titles is None:
+            key = self.sort_key('title')
+            self._sorted_titles = [key(row) for row in order]
+        prefix = prefix.lower()
+        rows = []
+        for i in range(bisect_left(self._sorted_titles, prefix), len(order)):
+            if len(rows) == limit or not self._sorted_titles[i].startswith(prefix):
+                break
+            rows.append(order[i])
+        return rows
+
+    def _index_titles(self):#word -> rows, made on first use
+        if self._title_words is None:
+            from search_index import tokenize #the same words the search index has
+            self._title_words = {}
+            for row, title in enumerate(self.titles):
+                for word in tokenize(str(title or '')):
+                    rows = self._title_words.setdefault(word, [])
+                    if not rows or rows[-1] != row:
+                        rows.append(row)
+            self._title_vocabulary = sorted(self._title_words)
+        return self._title_words
+
+    def title_words(self, prefix):#the words in titles that start with prefix
+        self._index_titles()
+        words = []
+        for i in range(bisect_left(self._title_vocabulary, prefix), len(self._title_vocabulary)):
+            if not self._title_vocabulary[i].startswith(prefix):
+                break
+            words.append(self._title_vocabulary[i])
+        return words
+
+    def title_matches(self, words, endings):#{row: 0 or 1} for titles with words followed by one of endings, 0 = at the start of the title
+        title_words = self._index_titles()
+        endings = set(endings)
+        if words:#every word must be in the title, start from the rarest
+            lists = sorted((title_words.get(word, []) for word in words), key=len)
+            candidates = set(lists[0]).intersection(*lists[1:])
+        else:
+            candidates = set()
+            for ending in endings:
+                candidates.update(title_words.get(ending, ()))
+        from search_index import tokenize
+        matches = {}
+        for row in candidates:#check the order on the title itself, candidates are few
+            tokens = tokenize(str(self.titles[row] or ''))
+            for start in range(len(tokens) - len(words)):
+                if tokens[start + len(words)] in endings and tokens[start:start + len(words)] == words:
+                    matches[row] = 0 if start == 0 else 1
+                    break
+        return matches
+
+    def row(self, file):#row number of a file, None when the table doesn't have it
+        row = bisect_left(self.files, file)#files are in sorted order
+        return row if row < len(self.files) and self.files[row] == file else None
+
+    def rows_where(self, field, value):#set of rows whose author, status or priority is value (compared as text)
+        column = {'author': self.authors, 'status': self.statuses, 'priority': self.priorities}[field]
+        wanted = {code for code, candidate in enumerate(column.values) if str(candidate) == str(value)}
+        return {row for row, code in enumerate(column.codes) if code in wanted}
+
+
+def priority_key(value):
+    if value is None:
+        return (2, 0, '')
+    try:
+        return (0, float(value), '')
+    except (TypeError, ValueError):
+        return (1, 0, str(value).lower())
@@ -0,0 +1,204 @@
+import os
+import json # one JSON line per version
+import difflib # line diffs between versions
+
+from sidecar import locked
+
+
+# Every save of a note appends a version to .history/<note file>.log in the notes folder:
+#   {"v": 3, "modified": ..., "base": 0, "delta": [[start, end] or [lines], ...]}
+#   {"v": 4, "modified": ..., "base": 812, "snapshot": "whole text"}
+#   {"v": 5, "modified": ..., "base": 812, "deleted": true}
+# A delta rebuilds its version from the one before it: [start, end] copies those lines of the previous
+# version, a list of lines is new text. "base" is the byte offset of the last snapshot (the whole text).
+# A new snapshot is written once the deltas since the last one add up to CHAIN_FACTOR times the note's size,
+# or after SNAPSHOT_EVERY versions, so rebuilding any version reads a bounded part of the log however long
+# the history gets, and small edits of a big note don't pay for a full copy every few saves.
+# Next to the log, <note file>.log.idx holds the byte offset of every version's line (OFFSET_SIZE bytes
+# each, version 1 first), so text() jumps to the version and its snapshot instead of reading the log
+# from the start. A missing or short index (a log from before the index, a crash between the two
+# writes) is rebuilt from the log.
+
+HISTORY_FOLDER = '.history'
+SNAPSHOT_EVERY = 100 #most deltas replayed to rebuild a version
+CHAIN_FACTOR = 2 #log bytes read to rebuild a version, at most about (1 + CHAIN_FACTOR) x the note
+TAIL_CHUNK = 4096 #bytes read from the end of a log at a time to find its last line
+OFFSET_SIZE = 8 #bytes per offset in the .idx file, little endian
+
+
+def history_path(notes_folder, file):
+    return os.path.join(notes_folder, HISTORY_FOLDER, file + '.log')
+
+
+def make_delta(old, new):#old/new = lists of lines -> delta that turns old into new
+    delta = []
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            delta.append([i1, i2])
+        elif j2 > j1:#replace or insert, deleted lines simply aren't copied
+            delta.append(new[j1:j2])
+    return delta
+
+
+def apply_delta(old, delta):
+    new = []
+    for part in delta:
+        if len(part) == 2 and isinstance(part[0], int):
+            new.extend(old[part[0]:part[1]])
+        else:
+            new.extend(part)
+    return new
+
+
+class NoteHistory():
+
+    def __init__(self, notes_folder, file):#constructor, file = 'name.note'
+        self.file = file
+        self.path = history_path(notes_folder, file)
+        self.index_path = self.path + '.idx'
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def record(self, text, modified=None, deleted=False):#append a version, returns its number
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with locked(self.path, remove=True):
+            last = self._last_record(repair=True)
+            version = last['v'] + 1 if last else 1
+            record = {'v': version, 'modified': modified}
+            if deleted:
+                record.update(base=last['base'] if last else 0, deleted=True)
+            else:
+                chain = self._read_lines(last['base']) if last else [] #the last snapshot and the deltas after it
+                delta = None
+                if last and not last.get('deleted') and len(chain) < SNAPSHOT_EVERY:
+                    delta = make_delta(self._replay(chain, last['v']), text.splitlines(keepends=True))
+                    chain_size = sum(len(line) for line in chain[1:]) + len(json.dumps(delta))
+                    if chain_size > CHAIN_FACTOR * len(text):
+                        delta = None #the deltas would cost more to replay than a fresh snapshot
+                if delta is None:
+                    with open(self.path, 'ab') as f:
+                        record.update(base=f.tell(), snapshot=text)
+                else:
+                    record.update(base=last['base'], delta=delta)
+            with open(self.path, 'ab') as f:
+                offset = f.tell()
+                f.write((json.dumps(record, separators=(',', ':'), default=str) + '\n').encode('utf-8'))
+            self._add_offset(version, offset)
+        return version
+
+    def versions(self):#[{'version', 'modified', 'kind', 'bytes'}] oldest first
+        versions = []
+        for line in self._read_lines(0):
+            record = json.loads(line)
+            kind = 'deleted' if record.get('deleted') else 'snapshot' if 'snapshot' in record else 'delta'
+            versions.append({'version': record['v'], 'modified': record['modified'], 'kind': kind, 'bytes': len(line)})
+        return versions
+
+    def text(self, version):#the note's text as of that version (KeyError if there is no such version, or it is a deletion)
+        target = self._record_at(version)
+        if target is None or target.get('deleted'):
+            raise KeyError(f'{self.file} has no version {version}')
+        return ''.join(self._replay(self._read_lines(target['base']), version))
+
+    # --- reading the log ---
+
+    def _read_lines(self, offset):
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                return [line for line in f if line.endswith(b'\n')]
+        except FileNotFoundError:
+            return []
+
+    def _record_at(self, version):#the log line of version, found through the .idx file (None if there is no such version)
+        if version < 1:
+            return None
+        for rebuilt in (False, True):
+            if rebuilt:#written by hand, from before the index, or a save crashed in between
+                with locked(self.path, remove=True):
+                    offset = self._rebuild_offsets(version)
+            else:
+                offset = self._offset(version)
+            if offset is None:
+                continue
+            try:
+                with open(self.path, 'rb') as f:
+                    f.seek(offset)
+                    line = f.readline()
+            except FileNotFoundError:
+                return None
+            if line.startswith(b'{"v":%d,' % version) and line.endswith(b'\n'):
+                return json.loads(line)
+        return None
+
+    def _offset(self, version):#from the .idx file, None if it doesn't go that far
+        try:
+            with open(self.index_path, 'rb') as f:
+                f.seek((version - 1) * OFFSET_SIZE)
+                data = f.read(OFFSET_SIZE)
+        except FileNotFoundError:
+            return None
+        return int.from_bytes(data, 'little') if len(data) == OFFSET_SIZE else None
+
+    def _add_offset(self, version, offset):#called with the log locked, right after the version's line was written
+        try:
+            size = os.path.getsize(self.index_path)
+        except FileNotFoundError:
+            size = 0
+        if size == (version - 1) * OFFSET_SIZE:
+            with open(self.index_path, 'ab') as f:
+                f.write(offset.to_bytes(OFFSET_SIZE, 'little'))
+        else:#no index yet, or it missed a version
+            self._rebuild_offsets()
+
+    def _rebuild_offsets(self, version=None):#writes the .idx file from the whole log, returns version's offset
+        offsets = []
+        try:
+            with open(self.path, 'rb') as f:
+                offset = 0
+                for line in f:
+                    if line.endswith(b'\n'):
+                        offsets.append(offset)
+                    offset += len(line)
+        except FileNotFoundError:
+            return None
+        temp_path = self.index_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(b''.join(offset.to_bytes(OFFSET_SIZE, 'little') for offset in offsets))
+        os.replace(temp_path, self.index_path)
+        return offsets[version - 1] if version is not None and version <= len(offsets) else None
+
+    def _last_record(self, repair=False):#the last complete line of the log, without reading the rest
+        # A crash in the middle of an append leaves a line without '\n' at the end. It is skipped, and with
+        # repair=True (record() holds the lock) cut off, so the next version doesn't get glued onto it.
+        try:
+            with open(self.path, 'r+b' if repair else 'rb') as f:
+                end = f.seek(0, os.SEEK_END)
+                data = b''
+                position = end
+                while position > 0 and data.count(b'\n') < 2:
+                    step = min(TAIL_CHUNK, position)
+                    position -= step
+                    f.seek(position)
+                    data = f.read(step) + data
+                complete = data.rfind(b'\n') + 1
+                if repair and complete < len(data):
+                    f.truncate(end - (len(data) - complete))
+        except FileNotFoundError:
+            return None
+        lines = data[:complete].splitlines()
+        return json.loads(lines[-1]) if lines else None
+
+    def _replay(self, chain, version):#lines of version, replaying the log lines in chain (its snapshot first)
+        lines = None
+        for line in chain:
+            record = json.loads(line)
+            if 'snapshot' in record:
+                lines = record['snapshot'].splitlines(keepends=True)
+            elif 'delta' in record:
+                lines = apply_delta(lines, record['delta'])
+            if record['v'] == version:
+                return lines
+        raise KeyError(f'{self.file}: version {version} is missing from the history log')
@@ -1,15 +1,179 @@
+import io # restore() and refresh_note() parse notes from bytes
 import sys #provides access to system-specific parameters and functions
 import os # acts as a bridge between python and the OS allowing you to interact with file systems, manage processes, and access environment variables
-import yaml #reads and parses YAML data
-import tempfile #creates a temporary file
-import subprocess #allows other applications to run within python
-from Configurator import ROOT_FOLDER #file path
-from collections import Counter #counts
-from datetime import datetime #gives us the time/ date
+import itertools # numbers for temporary file names
+import Configurator #settings (notes folder, storage, workers), each one is looked up the first time it's used
+from datetime import datetime, timedelta #gives us the time/ date
+from contextlib import contextmanager #with blocks that undo what they set up, see Application.title_completion
+# Slow imports (tempfile, subprocess, concurrent.futures, collections, yaml) happen inside the functions that
+# need them, so a short command like "python notes.py search x" doesn't pay for the menu or the bulk loader.
+import frontmatter #reads and writes the YAML header, fast path for the fields we write ourselves
+from search_index import SearchIndex, snippet, tokenize #on-disk inverted index so search doesn't reread every note
+from tag_index import TagIndex #tag -> notes, so tag lookups and counts don't reread every note
+from catalog import Catalog, FIELDS #cached note headers so list/stats don't reread every note
+from sidecar import locked #advisory lock for saves that check for conflicting changes
+import perf #timers around the hot paths, see perf.py
+from perf import timed
+
+
+SIDECAR_INDEXES = [SearchIndex, TagIndex] #indexes kept next to the notes and updated on every save/delete
+
+
+def record_save(notes_folder, filename, note):#tell every sidecar index that filename now holds note
+    for index in SIDECAR_INDEXES:
+        index.record_save(notes_folder, filename, note)
+
+
+def record_saves(notes_folder, saved):#saved = [(filename, Note)], one journal write per index
+    for index in SIDECAR_INDEXES:
+        index.record_saves(notes_folder, saved)
+
+
+def record_delete(notes_folder, filename):
+    for index in SIDECAR_INDEXES:
+        index.record_delete(notes_folder, filename)
+
+
+@timed('history')
+def record_version(notes_folder, filename, text, modified=None, deleted=False):#appends to the note's history (see history.py)
+    if not Configurator.get('KEEP_HISTORY'):
+        return
+    from history import NoteHistory #difflib is only needed once something is saved
+    NoteHistory(notes_folder, filename).record(text, modified, deleted)
+
+
+class ConflictError(Exception):#Note.save(check=True): the file was changed by someone else after we loaded it
+    pass
+
+
+SAVE_BATCH = 500 #notes Notebook.save_many writes before it syncs the folder
+TEMP_IDS = itertools.count() #keeps temporary file names unique between threads
+
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def pack_time(value):#'2025-05-18T09:15:00.123456Z' -> microseconds since 1970 (an int is 28 bytes, the text 76)
+    # Only timestamps that unpack_time turns back into exactly the same text are packed,
+    # anything else (datetimes from YAML, other formats) is kept as it is, so saving a note never changes it.
+    if isinstance(value, str) and value.endswith('Z'):
+        try:
+            moment = datetime.fromisoformat(value[:-1])
+        except ValueError:
+            return value
+        if moment.tzinfo is None:
+            micros = (moment - EPOCH) // MICROSECOND
+            if unpack_time(micros) == value:
+                return micros
+        return value
+    if isinstance(value, int):#a number in the YAML itself, keep it apart from our packed times
+        return (value,)
+    return value
+
+
+def unpack_time(value):#the other way, packed int -> ISO text
+    if isinstance(value, int):
+        return (EPOCH + timedelta(microseconds=value)).isoformat() + 'Z'
+    if isinstance(value, tuple):
+        return value[0]
+    return value
+
+
+def intern_tags(tags):#one copy of each tag string in memory, however many notes use it
+    if isinstance(tags, list):
+        return [sys.intern(tag) if isinstance(tag, str) else tag for tag in tags]
+    return tags
+
+
+@timed('write_atomic')
+def write_atomic(path, text, durable=True):#readers (and a crash) see the old file or the new one, never half of one
+    folder, name = os.path.split(path)
+    temp_path = os.path.join(folder, f'.{name}.{os.getpid()}.{next(TEMP_IDS)}.tmp')#hidden and not .note, so nobody lists it
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+            if durable:#the data is on disk before the rename makes it the note
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def sync_folder(folder):#makes the renames in folder survive a crash
+    if not hasattr(os, 'O_DIRECTORY'):#Windows can't open a folder, NTFS journals the rename itself
+        return
+    fd = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+HEADER_CHUNK = 512 #bytes read at a time while looking for the end of the YAML header
+LOAD_CHUNK = 64 #notes handed to a worker process at a time by Notebook.iter_notes
+
+
+def read_header(file):#file opened in binary mode -> (yaml text, rest of the closing line, byte offset where the body continues)
+    first = file.readline()
+    if not first.startswith(b'---'):
+        raise ValueError('note has no YAML header')
+    lines = [first[3:]] #older notes have the YAML right after the dashes on the same line
+    while True:
+        line = file.readline()
+        if not line:
+            raise ValueError('YAML header is never closed with ---')
+        if line.startswith(b'---'):#the closing dashes, the body may start right after them
+            return b''.join(lines).decode('utf-8'), line[3:].decode('utf-8'), file.tell()
+        lines.append(line)
+
+
+def load_chunk(notes_folder, files, header_only):#[(filename, Note)] for the readable notes in files, module level so a process pool can run it
+    load = Note.load_header if header_only else Note.load_note
+    notes = []
+    for file in files:
+        try:
+            notes.append((file, load(f'{notes_folder}/{file}')))
+        except Exception:#corrupted notes are skipped
+            pass
+    return notes
+
+
+def chunked(items, size):#[1, 2, 3, 4, 5], 2 -> [1, 2], [3, 4], [5]
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def read_body(filepath, body_start, body_offset, mtime, size):#the note body, given where load_header stopped
+    with open(filepath, 'rb') as file:
+        st = os.fstat(file.fileno())
+        if (st.st_mtime_ns, st.st_size) != (mtime, size):#the file changed since the header was read, find the body again
+            _, body_start, body_offset = read_header(file)
+        file.seek(body_offset)
+        return (body_start + file.read().decode('utf-8')).strip()
 
 
 class Note():
+    # __slots__: no per-note __dict__, which matters when a server keeps 100k notes in memory.
+    __slots__ = ('title', '_content', '_body_source', 'tags', 'author', 'status', 'priority', '_created', '_modified', '_disk_modified',
+                 'encryption', '_kdf', '_sealed')
+
     def __init__(self, title, content, tags=None, author=None, status=None, priority=None):#constructor
+        self._body_source = None #(path, ...) when the body hasn't been read yet, see load_header
+        self._sealed = False #True while _content is still the encrypted text, see encryption.py
+        self.encryption = None #None, 'body' or 'note': what of this note is stored encrypted
+        self._kdf = None #which key it is encrypted with
         self.title = title
         self.content = content
         self.tags = tags if tags else []
@@ -18,43 +182,145 @@ class Note():
         self.priority = priority
         self.created = datetime.now().isoformat() + 'Z' #zulu
         self.modified = datetime.now().isoformat() + 'Z'
-
-    def save(self,filename): #We need to take the information the user gave us and save it as a properly formatted note file with YAML metadata.
-        self.modified = datetime.now().isoformat() + 'Z'#Use datetime to get the current time and save it to ISO format 'Z' shows UTC time
+        self._disk_modified = None #packed modified of the file this note was loaded from or last saved to, None = a new note
+
+    @property
+    def created(self):#timestamps are kept packed (see pack_time) and turned back into text when asked for
+        return unpack_time(self._created)
+
+    @created.setter
+    def created(self, value):
+        self._created = pack_time(value)
+
+    @property
+    def modified(self):
+        return unpack_time(self._modified)
+
+    @modified.setter
+    def modified(self, value):
+        self._modified = pack_time(value)
+
+    @timed('Note.save')
+    def save(self,filename, notes_folder=None, touch=True, durable=True, check=False): #We need to take the information the user gave us and save it as a properly formatted note file with YAML metadata.
+        # touch=False keeps the old timestamp, e.g. when copying notes between storage backends.
+        # durable=False skips the fsyncs (tests, scratch folders). The file is still replaced in one step.
+        # check=True raises ConflictError instead of overwriting a change someone else saved after we loaded the note.
+        notes_folder = notes_folder or Configurator.get('ROOT_FOLDER')
+        filepath = f'{notes_folder}/{filename}.note'#Creates the file path
+        if check:
+            with locked(f'{notes_folder}/.{filename}.note', remove=True):#other check=True savers of this note wait here
+                self.check_unchanged(filepath)
+                self.write(filepath, touch, durable)
+        else:
+            self.write(filepath, touch, durable)
+        if durable:
+            sync_folder(notes_folder)
+        record_save(notes_folder, f'{filename}.note', self)#keeps the search index current without a rescan
+
+    def write(self, filepath, touch=True, durable=True):#the file part of save(), without the folder sync and the indexes
+        if self.encryption and not self._sealed:#encrypted with this notebook's key, see encryption.py
+            from encryption import notebook_kdf
+            self._kdf = notebook_kdf(os.path.dirname(filepath)) or self._kdf
+        if touch:
+            self.modified = datetime.now().isoformat() + 'Z'#Use datetime to get the current time and save it to ISO format 'Z' shows UTC time
+        text = self.to_text()
+        write_atomic(filepath, text, durable)# Writes YAML + Content
+        self._disk_modified = self._modified
+        record_version(os.path.dirname(filepath), os.path.basename(filepath), text, self.modified)#every save is a version we can go back to
+
+    def check_unchanged(self, filepath):#ConflictError when the file's modified isn't the one we loaded
+        try:
+            on_disk = Note.load_header(filepath)._modified
+        except FileNotFoundError:
+            on_disk = None
+        if on_disk != self._disk_modified:
+            raise ConflictError(f"{os.path.basename(filepath)} was changed on disk since it was loaded")
+
+    def to_text(self):#the note exactly as it is stored in its .note file
+        if self.encryption:
+            from encryption import seal_text
+            return seal_text(self)
+        return self.plain_text()
+
+    def plain_text(self):#the note as text, before any encryption
+        yaml_string = frontmatter.dump(self.metadata())#convert to YAML by going from dictionary -> YAML
+        return '---\n' + yaml_string + '---\n\n' + self.content #We construct the contents together like Lego Blocks. Kris suggested '---' to make YAMLs look nice.
+
+    def metadata(self):#the YAML header fields
         metadata = {
             'title': self.title,
             'created': self.created,
             'modified': self.modified,
             'tags': self.tags
             }
-        yaml_string = yaml.dump(metadata)#convert to YAML by going from dictionary -> YAML
-        full_content = '---' + yaml_string + '---' + self.content #We construct the contents together like Lego Blocks. Kris suggested '---' to make YAMLs look nice.
-
-        with open(f'{ROOT_FOLDER}/{filename}.note', 'w') as f:#Creates the file path and Writes it
-            f.write(full_content)# Writes YAML + Content
+        for field in ('author', 'status', 'priority'):#optional fields are only written when they are set
+            if getattr(self, field) is not None:
+                metadata[field] = getattr(self, field)
+        return metadata
+
+    @property
+    def content(self):#the body is only read from disk the first time somebody asks for it
+        if self._body_source is not None:
+            self._content = read_body(*self._body_source)
+            self._body_source = None
+        if self._sealed:#encrypted: decrypted the first time too, LockedError before Notebook.unlock()
+            from encryption import open_note
+            open_note(self)
+        return self._content
+
+    @content.setter
+    def content(self, value):
+        self._content = value
+        self._body_source = None #an explicit value wins over the file
+        self._sealed = False
 
     @classmethod #Needed, because load _note does not use a regular "method".It CREATES a new Note Instance from FILE
+    @timed('Note.load_note')
     def load_note(cls,filepath):#This function reads a note file and separates it into two parts: the information ABOUT the note, and the actual note content
-        with open(filepath, 'r') as file:
-            content = file.read() #We grab piece 1 (the metadata) and piece 2 (the content). We use .strip() to remove any extra spaces or blank lines from the content.
-            parts = content.split('---')#splits the content into pieces
-            yaml_part = parts[1]#the meta data between the dashes
-            content_part = parts[2].strip()#displays the actual content
-
-            metadata = yaml.safe_load(yaml_part)#Converts YAML text into a python Dictionary, so python can read the file.
-
-            note = cls(#cls = "the class itself" a "note factory" note becomes an object
-                title = metadata['title'],
-                content = content_part,
-                tags = metadata.get('tags', []),
-                author=metadata.get('author'),
-                status=metadata.get('status'),
-                priority=metadata.get('priority')
+        with open(filepath, 'rb') as file:
+            return cls.read(file)
+
+    @classmethod
+    def read(cls, file):#the note in a file opened in binary mode, or any file-like object (e.g. io.BytesIO of a pack record)
+        yaml_part, body_start, _ = read_header(file)#the meta data between the dashes
+        metadata = frontmatter.load(yaml_part)#Converts YAML text into a python Dictionary, so python can read the file.
+        if metadata.get('encrypted'):
+            import encryption
+            if encryption._keyring is not None:#unlocked: decrypt chunk by chunk straight from the file
+                return encryption.open_note(cls.from_metadata(metadata, ''), itertools.chain([body_start], file))
+        content_part = (body_start + file.read().decode('utf-8')).strip()#everything after the closing dashes, even if it has --- in it
+        return cls.from_metadata(metadata, content_part)
+
+    @classmethod
+    @timed('Note.load_header')
+    def load_header(cls, filepath):#Like load_note, but stops reading at the closing '---'. note.content is read later, on first use.
+        with open(filepath, 'rb', buffering=HEADER_CHUNK) as file:#small buffer, so a big note costs a few hundred bytes here
+            yaml_part, body_start, body_offset = read_header(file)
+            st = os.fstat(file.fileno())
+
+        metadata = frontmatter.load(yaml_part)
+        note = cls.from_metadata(metadata, None)
+        note._body_source = (filepath, body_start, body_offset, st.st_mtime_ns, st.st_size)
+        return note
 
-    )
+    @classmethod
+    def from_metadata(cls, metadata, content):#dictionary from the YAML header + body text -> Note
+        note = cls(#cls = "the class itself" a "note factory" note becomes an object
+            title = metadata['title'],
+            content = content,
+            tags = intern_tags(metadata.get('tags', [])),
+            author=metadata.get('author'),
+            status=metadata.get('status'),
+            priority=metadata.get('priority')
+        )
 
         note.created = metadata['created']
         note.modified = metadata ['modified']
+        note._disk_modified = note._modified
+        if metadata.get('encrypted'):#content is the encrypted text until somebody reads it
+            note.encryption = metadata['encrypted']
+            note._kdf = metadata.get('kdf')
+            note._sealed = True
 
         return note
 
@@ -83,11 +349,29 @@ class Note():
     }
 
 class Notebook():
+    keeps_history = True #history()/restore() work, False for backends without .history logs (the cli refuses them there)
+    encrypts_notes = True #notes with note.encryption can be saved, the menu only offers encryption where they can
 
     def __init__(self, notes_folder): #constructor
         self.notes_folder = notes_folder
-
-    def list_notes(self):#"Create a new list called notes by taking each file f from files, but only if that file ends with '.note'"
+        self._search_index = None #loaded on the first search
+        self._tag_index = None #loaded on the first tag lookup
+        self._catalog = None #loaded on the first list/stats call
+        self._watcher = None #set by watch()
+        self._header_table = None #built from the catalog on first use
+        self._header_table_version = None
+        self._signatures = None #duplicates.SignatureCache, loaded by the first find_duplicates()
+
+    @timed('list_notes')
+    def list_notes(self, sort_by=None, offset=0, limit=None, reverse=False, **filters):#"Create a new list called notes by taking each file f from files, but only if that file ends with '.note'"
+        # Without arguments: every note file, in the folder's order. With sort_by ('title', 'created', 'modified',
+        # 'priority' or 'file'), offset/limit or filters (tag=..., author=..., status=..., priority=...) the page
+        # comes from the catalog's header table instead, see list_titles.
+        if sort_by or offset or limit is not None or filters:
+            return [file for file, title in self.list_titles(sort_by or 'file', offset, limit, reverse, **filters)]
+        if self._watcher is not None:#watch mode: the watcher already knows every note
+            self._sync()
+            return list(self._watcher.files)
         files = os.listdir(self.notes_folder) #Looks into everything in the ROOT_FOLDER
         notes = [f for f in files if f.endswith('.note')] #filters everything that doesn't end in .note
         return notes
@@ -96,50 +380,312 @@ class Notebook():
         filepath = f'{self.notes_folder}/{filename}'#The path into the Root_folder and look for the file name
         return Note.load_note(filepath)#read it and create a note object
 
-    def search_notes(self, query):
-        files = self.list_notes()
-        matching_files = []
-        query_words = query.lower().split() #split query into individual keywords
+    @timed('search_notes')
+    def search_notes(self, query, fuzzy=False):#fuzzy=True: words a typo or two away match too, see fuzzy.py
+        return self.search_index().search(query, fuzzy)#looks the words up in the index instead of opening every note
+
+    @timed('search_ranked')
+    def search_ranked(self, query, limit=10, snippets=True, fuzzy=False):#[{'file', 'score', 'snippet'}] best match first, see search_index.py
+        results = [{'file': file, 'score': round(score, 4)} for file, score in self.search_index().ranked(query, limit, fuzzy)]
+        if snippets:#only the notes we return are opened
+            for result in results:
+                result['snippet'] = self.snippet(result['file'], query, fuzzy)
+        return results
+
+    def snippet(self, file, query, fuzzy=False):#a few words of the note around the query's matches, highlighted
+        try:
+            note = self.get_note(file)
+        except FileNotFoundError:#deleted since the index saw it
+            return ''
+        groups = self.search_index().parse(query, fuzzy)#the corrected words are highlighted, not the typos
+        if note.encryption:#the body wasn't searched, and isn't shown
+            return snippet(note.title or '', groups)
+        return snippet(note.content or note.title or '', groups)
+
+    def complete_titles(self, text, limit=10):#[(filename, title)] for autocompletion, best first
+        # Titles starting with text come first (in title order), then titles with a later word starting like
+        # the last word of text, then titles where that word has a typo (see fuzzy.py). The last word is
+        # still being typed, so it is a prefix, the words before it must be there as they are.
+        table = self.header_table()
+        rows = table.title_prefix(text.lstrip(), limit)
+        tokens = tokenize(text)
+        if len(rows) < limit and tokens:
+            *words, last = tokens
+            matches = table.title_matches(words, table.title_words(last))
+            if not matches:
+                matches = dict.fromkeys(table.title_matches(words, self.search_index().similar(last)), 2)
+            for row in rows:
+                matches.pop(row, None)
+            key = table.sort_key('title')
+            import heapq
+            rows += heapq.nsmallest(limit - len(rows), matches, key=lambda row: (matches[row], key(row)))
+        return [(table.files[row], table.titles[row] or table.files[row]) for row in rows]
+
+    def search_index(self):#loads the index once, then only replays what changed since
+        self._sync()
+        if self._search_index is None:
+            self._search_index = SearchIndex(self.notes_folder)
+            if not self._search_index.load():#first search in this folder (or the index was damaged)
+                self.rebuild_index()
+        elif not self._search_index.refresh():#the snapshot was removed behind our back
+            self.rebuild_index()
+        return self._search_index
+
+    def rebuild_index(self):#reads every note once and writes a fresh index
+        if self._search_index is None:
+            self._search_index = SearchIndex(self.notes_folder)
+        self._search_index.rebuild(self.iter_notes())
+        return self._search_index
+
+    def tag_index(self):#same as search_index(), for the tag index
+        self._sync()
+        if self._tag_index is None:
+            self._tag_index = TagIndex(self.notes_folder)
+            if not self._tag_index.load():
+                self.rebuild_tag_index()
+        elif not self._tag_index.refresh():
+            self.rebuild_tag_index()
+        return self._tag_index
+
+    def rebuild_tag_index(self):
+        if self._tag_index is None:
+            self._tag_index = TagIndex(self.notes_folder)
+        self._tag_index.rebuild(self.iter_notes(header_only=True))#tags are in the header, the bodies aren't needed
+        return self._tag_index
+
+    def notes_with_tag(self, tag):#sorted note files with this tag, case doesn't matter
+        return sorted(self.tag_index().notes(tag))
+
+    def notes_with_tags(self, tags, match='all'):#notes with every tag (match='all') or any of them (match='any')
+        return sorted(self.tag_index().matching(tags, match))
+
+    def top_tags(self, n=10):#[(tag, count)] for the n most used tags
+        return self.tag_index().top(n)
+
+    def iter_notes(self, files=None, header_only=False, workers=None, processes=None):#yields (filename, Note) as each load finishes
+        # workers threads read the files, which keeps a slow (network) disk busy with several requests at once.
+        # processes > 0 hands batches of notes to a process pool instead, so the YAML parsing runs on more than one core.
+        # The order of the results is whatever finishes first. Corrupted notes are skipped like before.
+        if files is None:
+            files = self.list_notes()
+        workers = Configurator.get('LOAD_WORKERS') if workers is None else workers
+        processes = Configurator.get('PARSE_PROCESSES') if processes is None else processes
+
+        if processes:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = ProcessPoolExecutor(processes)
+            jobs = (pool.submit(load_chunk, self.notes_folder, chunk, header_only) for chunk in chunked(files, LOAD_CHUNK))
+            limit = processes * 2
+        elif workers > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            pool = ThreadPoolExecutor(workers)
+            jobs = (pool.submit(load_chunk, self.notes_folder, [file], header_only) for file in files)
+            limit = workers * 4
+        else:#plain loop, no pool to start
+            for chunk in chunked(files, LOAD_CHUNK):
+                yield from load_chunk(self.notes_folder, chunk, header_only)
+            return
 
-        for file in files:
+        from concurrent.futures import wait, FIRST_COMPLETED
+        try:
+            pending = set()
+            for job in jobs:
+                pending.add(job)
+                if len(pending) >= limit:#only keep a few loads queued, so 100k notes don't all sit in memory at once
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        finally:#also runs when the caller stops early
+            pool.shutdown(cancel_futures=True)
+
+    def load_all(self, **options):#{filename: Note} for every readable note, same options as iter_notes
+        return dict(self.iter_notes(**options))
+
+    def refresh_note(self, file):#a note was changed outside of Note.save (e.g. in nano), update the indexes and the history
+        try:
+            with open(f'{self.notes_folder}/{file}', 'rb') as f:
+                data = f.read()
+            note = Note.read(io.BytesIO(data))
+        except Exception:
+            record_delete(self.notes_folder, file)
+            self._seen(removed=[file])
+            return
+        record_save(self.notes_folder, file, note)
+        record_version(self.notes_folder, file, data.decode('utf-8'), note.modified)
+        self._seen([(file, note)])
+
+    def save_note(self, note, filename, touch=True, check=False):#filename without .note, like Note.save
+        note.save(filename, self.notes_folder, touch, check=check)
+        self._seen([(f'{filename}.note', note)])
+
+    def save_many(self, notes, touch=True):#notes = iterable of (Note, filename without .note), returns how many were saved
+        # Crash-safe like save_note, but the folder is synced and the indexes are told once per SAVE_BATCH notes
+        # instead of once per note, which is what makes bulk imports fast.
+        count = 0
+        for batch in chunked(notes, SAVE_BATCH):
+            saved = []
             try:
-                note = Note.load_note(f'{self.notes_folder}/{file}')#loads the file as a note object, so it doesn't crash and moves on if its corrupted
-
-                title=note.title.lower()
-                tags_string=''.join(note.tags).lower()
-                content=note.content.lower()
-
-                searchable_text = f"{title} {tags_string} {content}" #combines searchable keywords
-
-                found=False
-                for word in query_words:
-                    if word in searchable_text:
-                        found=True
-                        break
-                if found:
-                    matching_files.append(file)#finds all the matching keywords in search
-            except Exception:
-                pass
-
-        return matching_files
+                for note, filename in batch:
+                    note.write(f'{self.notes_folder}/{filename}.note', touch)
+                    saved.append((f'{filename}.note', note))
+            finally:#a note that can't be written stops the batch, the ones written before it are still indexed
+                if saved:
+                    sync_folder(self.notes_folder)
+                    record_saves(self.notes_folder, saved)
+                    self._seen(saved)
+            count += len(saved)
+        return count
+
+    def edit_note(self, file, editor):#editor(path) changes the note file in place, e.g. by running nano on it
+        editor(f'{self.notes_folder}/{file}')
+        self.refresh_note(file)#the editor doesn't go through Note.save
 
     def delete_note(self, filename):
         filepath = f'{self.notes_folder}/{filename}.note'#finds all the files in the folder with a name and adds .note
         os.remove(filepath)#action to remove note
+        record_delete(self.notes_folder, f'{filename}.note')
+        record_version(self.notes_folder, f'{filename}.note', None, datetime.now().isoformat() + 'Z', deleted=True)#the history stays, restore() brings the note back
+        self._seen(removed=[f'{filename}.note'])
+
+    # --- encryption ---
+    # A note with note.encryption = 'body' or 'note' is saved encrypted (see encryption.py). The key is
+    # derived from the passphrase once and kept until lock(), so only the first unlock is slow.
+
+    def unlock(self, passphrase):#DecryptionError on a wrong passphrase, the first unlock sets the notebook's passphrase
+        from encryption import unlock_notebook
+        unlock_notebook(self.notes_folder, passphrase)
+
+    def lock(self):
+        from encryption import lock
+        lock()
+
+    # --- history ---
+    # Every save appends the change to .history/<file>.log (see history.py), so older versions of a note,
+    # and notes that were deleted, can be brought back.
+
+    def history(self, file):#[{'version', 'modified', 'kind', 'bytes'}] oldest first, file = 'name.note'
+        from history import NoteHistory
+        return NoteHistory(self.notes_folder, file).versions()
+
+    def restore(self, file, version):#saves the note as it was in that version (as a new version), returns the Note
+        from history import NoteHistory
+        text = NoteHistory(self.notes_folder, file).text(version)
+        note = Note.read(io.BytesIO(text.encode('utf-8')))
+        self.save_note(note, file[:-len('.note')])
+        return note
 
-    def get_stats(self):
-        files = self.list_notes()
-        total_notes = len(files)#count the files
-        all_tags = []#collects all the tags
-
-        for file in files:#checks each file one by one
+    def export_pack(self, path, compression=None):#all notes into one pack file (see pack.py), compression None, 'gzip' or 'zstd'
+        from pack import export_pack
+        return export_pack(self, path, compression)
+
+    def import_pack(self, path):#the notes of a pack file back into this folder
+        from pack import import_pack
+        return import_pack(self, path)
+
+    # --- watch mode ---
+    # A long-running process (the menu, the server) calls watch() once. From then on list/search/stats
+    # answer from the catalog and indexes in memory, and only the notes the watcher reports as added,
+    # changed or deleted (by us, nano or anything else) are reread, at most every interval seconds.
+
+    def watch(self, interval=None):
+        from watcher import FolderWatcher #only long-running processes need it
+        if self._watcher is None:
+            interval = Configurator.get('WATCH_INTERVAL') if interval is None else interval
+            self.catalog()#one full refresh, the watcher takes over from here
+            self._watcher = FolderWatcher(self.notes_folder, interval)
+        return self._watcher
+
+    def unwatch(self):
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
+
+    def _sync(self):#apply what the watcher saw to the catalog and the sidecar indexes
+        if self._watcher is None:
+            return
+        changes = self._watcher.changes()
+        if not changes:
+            return
+        notes = dict(self.iter_notes(list(changes.changed)))#the search index needs the bodies too
+        for file in changes.removed:
+            record_delete(self.notes_folder, file)
+        for file, note in notes.items():
+            record_save(self.notes_folder, file, note)
+        self._catalog.update(changes.changed, changes.removed, lambda files: [(file, notes[file]) for file in files if file in notes])
+
+    def _seen(self, saved=(), removed=()):#we saved [(file, Note)] or removed [file] ourselves, the watcher doesn't need to report them
+        if self._watcher is None:
+            return
+        changed = {}
+        notes = dict(saved)
+        removed = list(removed)
+        for file in notes:
             try:
-                note = Note.load_note(f'{self.notes_folder}/{file}')#loads note file into a note object
-                all_tags.extend(note.tags) #extend(), because we want each tag individually
-            except Exception:#pass on corrupted files
-                pass
+                st = os.stat(f'{self.notes_folder}/{file}')
+            except FileNotFoundError:#deleted again right away
+                removed.append(file)
+                continue
+            self._watcher.files[file] = (st.st_mtime_ns, st.st_size)
+            changed[file] = st
+        for file in removed:
+            self._watcher.files.pop(file, None)
+        self._catalog.update(changed, removed, lambda files: [(file, notes[file]) for file in files])
+
+    def catalog(self):#note headers, only notes whose size/mtime changed get reread
+        if self._watcher is not None:#watch mode: the watcher tells us which notes changed
+            self._sync()
+            return self._catalog
+        if self._catalog is None:
+            self._catalog = Catalog(self.notes_folder)
+        self._catalog.refresh(lambda files: self.iter_notes(files, header_only=True))#the catalog only needs the YAML headers
+        return self._catalog
+
+    def note_headers(self):#[{'file': ..., 'title': ..., 'tags': ...}] for every readable note, sorted by filename
+        entries = self.catalog().entries
+        return [dict({field: entry.get(field) for field in FIELDS}, file=file)
+                for file, entry in sorted(entries.items()) if not entry.get('broken')]
+
+    def header_table(self):#the catalog by column (see header_table.py), rebuilt only after the catalog changed
+        catalog = self.catalog()
+        if self._header_table is None or self._header_table_version != catalog.version:
+            from header_table import HeaderTable
+            self._header_table = HeaderTable(catalog.entries)
+            self._header_table_version = catalog.version
+        return self._header_table
+
+    def list_titles(self, sort_by='title', offset=0, limit=None, reverse=False, **filters):#[(filename, title)] for one page of notes
+        # The first page of a big notebook doesn't sort it: heapq picks the top offset + limit rows, and a full
+        # sort is only made (and kept until the catalog changes) when somebody pages further in.
+        return [(file, title) for key, file, title in self.keyed_titles(sort_by, offset, limit, reverse, **filters)]
+
+    def keyed_titles(self, sort_by='title', offset=0, limit=None, reverse=False, **filters):#list_titles with each note's sort key, [(key, filename, title)]
+        # The keys let pages from several notebooks be merged into one, see sharded_notebook.py.
+        table = self.header_table()
+        rows = None
+        for name, value in filters.items():
+            if name in ('tag', 'tags'):
+                files = self.tag_index().matching([value] if isinstance(value, str) else value)
+                matched = {table.row(file) for file in files} - {None}
+            elif name in ('author', 'status', 'priority'):
+                matched = table.rows_where(name, value)
+            else:
+                raise ValueError(f"can't filter notes by {name!r}")
+            rows = matched if rows is None else rows & matched
+        key = table.sort_key(sort_by)
+        return [(key(row), table.files[row], table.titles[row] or table.files[row])
+                for row in table.page(sort_by, offset, limit, reverse, rows)]
+
+    @timed('get_stats')
+    def get_stats(self):
+        table = self.header_table()
+        total_notes = len(table)#count the files
+        all_tags = [table.tag_names[number] for number in table.tag_ids]#every tag of every note, no note is opened
 
-        total_tags = len(set(all_tags))#removes duplicates
+        total_tags = len(self.tag_index().files)#tags that only differ in case count once
 
         return {
             'total_notes': total_notes,
@@ -147,12 +693,54 @@ class Notebook():
             'all_tags': all_tags
         }
 
+    def tag_counts(self):#Counter of tag -> number of notes, from the tag index
+        return self.tag_index().counts()
+
+    # --- duplicates ---
+    # find_duplicates() groups notes with the same text, or almost the same (see duplicates.py). Every note's
+    # content hash and MinHash signature is cached with its stamp, so only new or changed notes are read.
+
+    def note_stamps(self):#{file: [modified, mtime, size]}, changes whenever the note does (also in nano, which keeps modified)
+        return {file: [entry.get('modified'), entry.get('mtime'), entry.get('size')]
+                for file, entry in self.catalog().entries.items() if not entry.get('broken')}
+
+    def signatures(self):#{file: (content hash, signature)} for every note
+        from duplicates import SignatureCache
+        if self._signatures is None:#next to the notes, only in memory when notes_folder is a database or a pack
+            self._signatures = SignatureCache(self.notes_folder if os.path.isdir(self.notes_folder) else None)
+        return self._signatures.update(self.note_stamps(), lambda files: self.iter_notes(files))
+
+    @timed('find_duplicates')
+    def find_duplicates(self, threshold=None):#[{'files', 'exact', 'similarity'}] groups of copies, threshold = lowest similarity (0.8)
+        from duplicates import find_duplicates
+        return find_duplicates(self.signatures(), threshold)
+
+
+def open_notebook(backend=None):#the Notebook for the storage picked in Configurator.py
+    backend = backend or Configurator.get('STORAGE_BACKEND')
+    if backend == 'folder':
+        return Notebook(Configurator.get('ROOT_FOLDER'))
+    if backend == 'sqlite':
+        from sqlite_notebook import SQLiteNotebook #only needed when the database is used
+        return SQLiteNotebook(Configurator.get('SQLITE_PATH'))
+    if backend == 'pack':#read-only
+        from pack import PackNotebook
+        return PackNotebook(Configurator.get('PACK_PATH'))
+    if backend == 'sharded':#the notes spread over subfolders of ROOT_FOLDER
+        from sharded_notebook import ShardedNotebook
+        return ShardedNotebook(Configurator.get('ROOT_FOLDER'))
+    raise ValueError(f"Unknown storage backend '{backend}' (use 'folder', 'sqlite', 'pack' or 'sharded')")
+
+MENU_PAGE = 20 #notes shown per page in the menus
+
 class Application():
 
     def __init__(self, notebook): #Constructor
         self.notebook = notebook
 
     def create_note_input(self): #Create a temporary file with a random name, file ends with.txt. Put a helpful comment in the file so its not empty
+        import tempfile #creates a temporary file
+        import subprocess #allows other applications to run within python
         filename= input('Enter note filename:')
         title= input('Enter title:')
         print()
@@ -193,7 +781,14 @@ class Application():
 
         # Create a Note object
         note = Note(title, content, tags, author, status, priority)
-        note.save(filename)
+        encrypt = ''
+        if self.notebook.encrypts_notes:
+            encrypt = input("Encrypt this note? (Enter = no, b = body only, a = all of it): ").strip().lower()
+        if encrypt in ('b', 'a'):
+            if not self.ask_passphrase():
+                return
+            note.encryption = 'body' if encrypt == 'b' else 'note'
+        self.notebook.save_note(note, filename)
 
         print()
         print(f"Note '{filename}.note' created successfully!")
@@ -220,112 +815,189 @@ class Application():
             input("Press Enter to return to menu")
 
     def list_by_tags(self):
-        stats = self.notebook.get_stats()
-        if not stats['all_tags']:
+        tag_counts = self.notebook.tag_counts()
+        if not tag_counts:
             print("No tags found!")
             input("Press Enter to return to menu")
             return
-        tag_counts = Counter(stats['all_tags'])
         sorted_tags = sorted(tag_counts.items(), key=lambda x: x[0].lower())
 
         print("All tags (alphabetically):")
         for tag, count in sorted_tags:
             print(f"  {tag}: {count} note(s)")
-        input("Press Enter to return to menu")
+        print()
+        tags = input("Enter tags to see their notes (comma-separated, or press Enter to return):")
+        tags = [tag.strip() for tag in tags.split(',') if tag.strip()]
+        if tags:
+            files = self.notebook.notes_with_tags(tags)#notes that have every tag entered
+            if not files:
+                print("No notes have all of those tags.")
+            for file in files:
+                print(f"  - {file}")
+            input("Press Enter to return to menu")
 
     def list_by_titles(self):
-        files = self.notebook.list_notes()
-        files.sort(key=str.lower)
-        print("Your notes:")
-        for file in files:
-            print(f"  - {file}")
-        input("Press Enter to return to menu")
-
-    def handle_read(self, files=None):#refactor added default parameter "files=None". The parameter is optional
-        if files is None:
-            files = self.notebook.list_notes()#Stored in files List
-            files.sort(key=str.lower) #sorts the files alphabetically
-
-        if not files: #if there are no notes
-            print("No notes found!")
+        print("Sort by:")
+        print("1. Title")
+        print("2. Newest first")
+        print("3. Recently modified")
+        print("4. Priority")
+        sort_by, reverse = {'2': ('created', True), '3': ('modified', True), '4': ('priority', False)}.get(input("Select an option (1-4, Enter = title): ").strip(), ('title', False))
+        page = 0
+        while True:
+            entries = self.notebook.list_titles(sort_by, page * MENU_PAGE, MENU_PAGE + 1, reverse)#one extra tells us there is a next page
+            if not entries and page == 0:
+                print("No notes found!")
+                input("Press Enter to return to menu")
+                return
+            print("Your notes:")
+            for file, title in entries[:MENU_PAGE]:
+                print(f"  - {title} ({file})")
+            choice = self.page_prompt("Press Enter to return to menu", page, len(entries) > MENU_PAGE)
+            if choice == 'n':
+                page += 1
+            elif choice == 'p':
+                page -= 1
+            else:
+                return
+
+    def page_prompt(self, prompt, page, more):#adds the page keys to prompt, returns 'n'/'p' to turn the page or what the user typed
+        keys = (["n = next page"] if more else []) + (["p = previous page"] if page else [])
+        choice = input(f"{prompt} ({', '.join(keys)}): " if keys else f"{prompt}: ").strip()
+        if (choice.lower() == 'n' and more) or (choice.lower() == 'p' and page):
+            return choice.lower()
+        return choice
+
+    @contextmanager
+    def title_completion(self):#Tab in input() completes note titles while inside the with block (where readline exists)
+        try:
+            import readline #line editing for input(), not on every platform
+        except ImportError:
+            yield
+            return
+        matches = []
+        def complete(text, state):
+            if state == 0:
+                matches[:] = [title for file, title in self.notebook.complete_titles(text)]
+            return matches[state] if state < len(matches) else None
+        old_completer, old_delimiters = readline.get_completer(), readline.get_completer_delims()
+        readline.set_completer(complete)
+        readline.set_completer_delims('')#the whole line is completed, titles have spaces in them
+        readline.parse_and_bind('tab: complete')
+        try:
+            yield
+        finally:
+            readline.set_completer(old_completer)
+            readline.set_completer_delims(old_delimiters)
+
+    def ask_passphrase(self):#unlocks the notebook for encrypted notes once per session, False if the user gave up
+        import encryption
+        if encryption._keyring is not None:
+            return True
+        import getpass #reads the passphrase without showing it
+        passphrase = getpass.getpass("Notebook passphrase: ")
+        try:
+            self.notebook.unlock(passphrase)
+        except encryption.DecryptionError:
+            print("Wrong passphrase.")
             input("Press Enter to return to menu")
-        else:
+            return False
+        return True
+
+    def choose_note(self, action, files=None):#numbered pages of notes (by title), returns the file the user picked or None
+        page = 0
+        while True:
+            if files is None:
+                entries = self.notebook.list_titles('title', page * MENU_PAGE, MENU_PAGE + 1)#only this page is sorted out of the catalog
+            else:#e.g. search results, already in their order
+                entries = [(file, file) for file in files[page * MENU_PAGE:(page + 1) * MENU_PAGE + 1]]
+            if not entries and page == 0: #if there are no notes
+                print("No notes found!")
+                input("Press Enter to return to menu")
+                return None
             print()
             print("Available notes:")
-            for i, file in enumerate(files, 1): #gives us each file number
-                print(f"  {i}. {file}")
-
+            for i, (file, title) in enumerate(entries[:MENU_PAGE], page * MENU_PAGE + 1): #gives us each file number
+                print(f"  {i}. {title}" + (f" ({file})" if title != file else ""))
             print()
-
-            note_choice = input("Enter note number to read: ") #user inputs choice
+            choice = self.page_prompt(f"Enter note number to {action}", page, len(entries) > MENU_PAGE) #user inputs choice
+            if choice == 'n':
+                page += 1
+                continue
+            if choice == 'p':
+                page -= 1
+                continue
             try:
-                index = int(note_choice) - 1 #convert the string into an integer
-                if 0 <= index < len(files):
-                    note = self.notebook.get_note(files[index])
-                    print(f"--- {note.title} ---")
-                    print()
-                    print(f"Created: {note.created}")
-                    print()
-                    print(f"Tags: {note.tags}")
-                    print()
-                    print(f"{note.content}")
-                    print()
-                    input("Press Enter to return to menu")
-                else:
-                    print("Invalid note number!")
-                    input("Press Enter to return to menu")
+                index = int(choice) - 1 - page * MENU_PAGE #convert the string into an integer, numbers go on across pages
             except ValueError: #validate the numbers
                 print("Please enter a valid number!")
                 input("Press Enter to return to menu")
+                return None
+            if 0 <= index < min(len(entries), MENU_PAGE):
+                return entries[index][0]
+            print("Invalid note number!")
+            input("Press Enter to return to menu")
+            return None
+
+    def handle_read(self, files=None):#refactor added default parameter "files=None". The parameter is optional
+        file = self.choose_note('read', files)
+        if file is None:
+            return
+        note = self.notebook.get_note(file)
+        if note.encryption:
+            if not self.ask_passphrase():
+                return
+            note.content #decrypts it, with 'note' also the title and tags
+        print(f"--- {note.title} ---")
+        print()
+        print(f"Created: {note.created}")
+        print()
+        print(f"Tags: {note.tags}")
+        print()
+        print(f"{note.content}")
+        print()
+        input("Press Enter to return to menu")
 
     def handle_edit(self,files=None): #refactor default parameter "files=None". The parameter is optional
-        if files is None:
-            files = self.notebook.list_notes()
-            files.sort(key=str.lower) #key= tells sort: "Before comparing, transform each item using this function"
-        if not files:
-            print("No notes found!")
+        file = self.choose_note('edit', files)
+        if file is None:
+            return
+        if self.notebook.get_note(file).encryption:
+            print("Encrypted notes can't be edited in nano, the file only has the encrypted text.")
             input("Press Enter to return to menu")
-        else:
-            print("Available notes:")
-            for i, file in enumerate(files, 1):
-                print(f"  {i}. {file}")
-            print()
+            return
+        # Open the actual file in nano
+        print(f"Opening {file} in nano...")
+        print()
+        print("Instructions:")
+        print("  - Edit your note content")
+        print("  - Save: Ctrl+O, then press Enter")
+        print("  - Exit: Ctrl+X")
+        print()
+        input("Press Enter when ready")
+        import subprocess #allows other applications to run within python
+        self.notebook.edit_note(file, lambda filepath: subprocess.call(['nano', filepath]))
 
-            note_choice = input("Enter note number to edit: ")
-            try:
-                index = int(note_choice) - 1
-                if 0 <= index < len(files):
-                    filepath = f'{self.notebook.notes_folder}/{files[index]}'
-
-                # Open the actual file in nano
-                    print(f"Opening {files[index]} in nano...")
-                    print()
-                    print("Instructions:")
-                    print("  - Edit your note content")
-                    print("  - Save: Ctrl+O, then press Enter")
-                    print("  - Exit: Ctrl+X")
-                    print()
-                    input("Press Enter when ready")
-                    subprocess.call(['nano', filepath])
-
-                    print(f"Note '{files[index]}' updated successfully!")
-                else:
-                    print("Invalid note number!")
-            except ValueError:
-                print("Please enter a valid number!")
+        print(f"Note '{file}' updated successfully!")
         input("Press Enter to return to menu")
 
     def handle_search(self):
-        query = input("Enter search keywords: ")
-        results = self.notebook.search_notes(query)
-        results.sort(key=str.lower) #key= tells sort: "Before comparing, transform each item using this function"
+        with self.title_completion():
+            query = input("Enter search keywords (Tab completes note titles): ")
+        results = self.notebook.search_ranked(query, limit=20)#best matches first
+        if not results:#maybe a typo, try the words a typo or two away
+            results = self.notebook.search_ranked(query, limit=20, fuzzy=True)
+            if results:
+                print(f"No exact matches for '{query}', showing close matches:")
 
         if not results:
             print(f"No notes found matching '{query}'")
         else:
             print(f"Found {len(results)} note(s) matching '{query}':")
-            for i, file in enumerate(results,1):
-                print(f"  {i}. {file}")
+            for i, result in enumerate(results,1):
+                print(f"  {i}. {result['file']}  (score {result['score']:.2f})")
+                if result['snippet']:
+                    print(f"     {result['snippet']}")
             print()
             print("What would you like to do?")
             print()
@@ -335,58 +1007,70 @@ class Application():
             print("Press Enter to return to menu")
 
             action = input("Select an option (1-2):")
+            files = [result['file'] for result in results]
 
             if action == '1': #Reads the note from result
-                self.handle_read(files=results)
+                self.handle_read(files=files)
 
             elif action == '2':  # Edit a note from results
-                self.handle_edit(files=results)
+                self.handle_edit(files=files)
 
 
-    def handle_delete(self):
-        files = self.notebook.list_notes()
-        files.sort(key=str.lower) #key= tells sort: "Before comparing, transform each item using this function"
-        if not files: #If no files are found
-            print("No notes found!")
-            input("Press Enter to return to menu")
+    def handle_delete(self, files=None):
+        file = self.choose_note('delete', files)
+        if file is None:
+            return
+        filename = file[:-len('.note')] #Removes the note extension
+        confirm = input(f"Are you sure you want to delete '{filename}.note'? (y/n): ")
+        if confirm.lower() == 'y':#add .lower so user can type in whatever they want.
+            self.notebook.delete_note(filename)#Actually removes the file
+            print(f"Note '{filename}.note' deleted successfully!")
         else:
-            print("Available notes:")
-            for i, file in enumerate(files, 1):#Gives us the file number
-                print(f"  {i}. {file}")
-
-            note_choice = input("Enter note number to delete: ")
-            try:
-                index = int(note_choice) - 1 #finds the note number
-                if 0 <= index < len(files): #convert and adjust, because indexes
-                    filename = files[index].replace('.note', '') #Removes the note extension
-                    confirm = input(f"Are you sure you want to delete '{filename}.note'? (y/n): ")
-                    if confirm.lower() == 'y':#add .lower so user can type in whatever they want.
-                        self.notebook.delete_note(filename)#Actually removes the file
-                        print(f"Note '{filename}.note' deleted successfully!")
-                    else:
-                        print("Deletion cancelled.")
-                else:
-                    print("Invalid note number!")
-            except ValueError:#make sure the user enters in the right numbers
-                print("Please enter a valid number!")
-            input("Press Enter to return to menu")
-            print()
+            print("Deletion cancelled.")
+        input("Press Enter to return to menu")
+        print()
 
     def handle_stats(self):
         stats = self.notebook.get_stats()
         print("===Note Statistics===")
         print(f"Total Notes: {stats['total_notes']}")
         print(f"Unique tags: {stats['total_tags']}")
-        if stats['all_tags']:
-            tag_counts = Counter(stats['all_tags'])
-            top_tags = tag_counts.most_common(10)
+        top_tags = self.notebook.top_tags(10)
+        if top_tags:
             print("Top 10 most used tags:")
             for tag, count in top_tags:
                 print(f' {tag}: {count} notes')
+        if perf.ENABLED:#PERF=1: where the time went since the menu started
+            print("Timings:")
+            print('\n'.join(perf.format_snapshot()))
 
         input("Press Enter to return to menu")
         print()
 
+    def handle_duplicates(self):
+        groups = self.notebook.find_duplicates()
+        if not groups:
+            print("No duplicate notes found.")
+            input("Press Enter to return to menu")
+            return
+        print(f"Found {len(groups)} group(s) of duplicate notes:")
+        for i, group in enumerate(groups, 1):
+            kind = "same text" if group['exact'] else f"{group['similarity']:.0%} alike"
+            print(f"  {i}. {', '.join(group['files'])}  ({kind})")
+        print()
+        choice = input("Enter a group number to read or delete its notes, or press Enter to return to menu: ")
+        if not choice.isdigit() or not 1 <= int(choice) <= len(groups):
+            return
+        files = groups[int(choice) - 1]['files']
+        print()
+        print("1. Read note")
+        print("2. Delete note")
+        action = input("Select an option (1-2):")
+        if action == '1':
+            self.handle_read(files=files)
+        elif action == '2':
+            self.handle_delete(files=files)
+
     def display_menu(self):
         print("==== Notes Manager ====")
         print("1. List notes and tags")
@@ -398,6 +1082,7 @@ class Application():
         print("7. Stats")
         print("8. Help")
         print("9. Exit")
+        print("10. Find duplicates")#added after Help and Exit, their numbers stay what people (and scripts) type
         print("====================")
 
     def handle_help(self):
@@ -413,6 +1098,7 @@ class Application():
         print("  7. Stats        - Views statistics")
         print("  8. Help         - Show this help")
         print("  9. Exit         - Quit the application")
+        print("  10. Duplicates  - Notes with the same or almost the same text")
         print()
         input("Press Enter to return to menu...")
         print()
@@ -420,7 +1106,7 @@ class Application():
     def run(self):
         while True:
             self.display_menu()
-            choice = input("Select an option (1-9): ")#Handles User inputs
+            choice = input("Select an option (1-10): ")#Handles User inputs
             print()
 
             if choice == '1':
@@ -442,11 +1128,18 @@ class Application():
             elif choice == '9':
                 print("Goodbye!")
                 break
+            elif choice == '10':
+                self.handle_duplicates()
             else:
-                print("Invalid option. Please choose 1-9.")
+                print("Invalid option. Please choose 1-10.")
 
 if __name__ == '__main__':
-    notebook = Notebook(ROOT_FOLDER)#calls back to the configurator
+    perf.setup()#PERF / PROFILE settings
+    if len(sys.argv) > 1:#python notes.py search "query" etc. runs a single command, see cli.py
+        from cli import main
+        sys.exit(main())
+    notebook = open_notebook()#calls back to the configurator
+    notebook.watch()#the menu keeps running, so keep the notes in memory and follow changes on disk
     app = Application(notebook)#Creates the new instance with __int__
     app.run()
 
@@ -0,0 +1,375 @@
+import io
+import os
+import sys
+import json # the offset index at the end of the pack
+import mmap # PackNotebook reads straight from the mapped file
+import zlib # 'gzip' compression (deflate, the algorithm gzip uses)
+import struct
+
+from catalog import Catalog, FIELDS
+from notes import Note, Notebook, chunked, write_atomic, sync_folder, record_saves, SAVE_BATCH
+from search_index import SearchIndex
+from tag_index import TagIndex
+
+
+# A whole notebook in one file, for backups, copying a notebook around and read-only replicas.
+#
+#   header   b'NOTEPACK', version, compression
+#   blocks   [stored length, raw length, payload] ...   payload = records, compressed as a whole when asked
+#            record = [name length, data length, name, data], data = the .note file exactly as it was
+#   index    JSON {name: [block offset, offset of the data in the raw block, data length, header fields]}
+#   trailer  [index offset, index length, b'NOTEPACK']
+#
+# Notes are written one after the other as they are read, only the index is kept in memory.
+# Reading looks at the trailer, loads the index and then goes straight to any note by name.
+# Appending writes new blocks, a new index and a new trailer after the old trailer, which is never
+# overwritten: a crash in the middle leaves the old trailer as the last complete one, and the reader
+# falls back to it.
+
+MAGIC = b'NOTEPACK'
+VERSION = 1
+HEADER = struct.Struct('<8sBB') #magic, version, compression
+BLOCK = struct.Struct('<II') #stored length, raw length
+RECORD = struct.Struct('<HI') #name length, data length
+TRAILER = struct.Struct('<QQ8s') #index offset, index length, magic
+BLOCK_SIZE = 256 * 1024 #raw bytes collected before a block is written (and compressed)
+BLOCK_CACHE = 8 #decompressed blocks PackReader keeps around
+COMPRESSION = {None: 0, 'gzip': 1, 'zstd': 2}
+
+
+def _zstd():#zstandard is optional, only needed for zstd packs
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd packs need the zstandard package (pip install zstandard), or use compression='gzip'")
+    return zstandard
+
+
+def compress(data, compression):
+    if compression == 'gzip':
+        return zlib.compress(data, 6)
+    if compression == 'zstd':
+        return _zstd().ZstdCompressor(level=3).compress(data)
+    return data
+
+
+def decompress(data, compression):
+    if compression == 'gzip':
+        return zlib.decompress(data)
+    if compression == 'zstd':
+        return _zstd().ZstdDecompressor().decompress(data)
+    return data
+
+
+class PackWriter():
+    # with PackWriter(path) as pack: pack.add(name, data, header) ...
+    # A new pack is written next to path and renamed over it when closed, so a crash never leaves half a pack.
+    # append=True adds to (or replaces notes in) an existing pack in place, after its last trailer.
+
+    def __init__(self, path, compression=None, append=False, block_size=BLOCK_SIZE):#constructor
+        if compression not in COMPRESSION:
+            raise ValueError(f"unknown compression {compression!r} (use None, 'gzip' or 'zstd')")
+        self.path = path
+        self.block_size = block_size
+        self.index = {} #name -> [block offset, data offset, data length, header]
+        self._block = bytearray()
+        self._block_index = [] #(name, data offset) of the records in the block being filled
+        if append and os.path.exists(path):
+            with PackReader(path) as existing:
+                self.compression = existing.compression
+                self.index = existing.index
+                end = existing.end
+            self.temp_path = None
+            self.file = open(path, 'r+b')
+            self.file.truncate(end)#only what an unfinished append left after the last trailer
+            self.file.seek(end)
+        else:
+            self.compression = compression
+            self.temp_path = f'{path}.{os.getpid()}.tmp'
+            self.file = open(self.temp_path, 'wb')
+            self.file.write(HEADER.pack(MAGIC, VERSION, COMPRESSION[compression]))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def add(self, name, data, header=None):#data = bytes of the note file, header = its catalog fields (or None)
+        encoded = name.encode('utf-8')
+        self._block += RECORD.pack(len(encoded), len(data)) + encoded
+        self._block_index.append((name, len(self._block), len(data), header))
+        self._block += data
+        if len(self._block) >= self.block_size:
+            self._flush()
+
+    def remove(self, name):#drop a note from the index (append mode), its bytes stay as dead space
+        self.index.pop(name, None)
+
+    def _flush(self):
+        if not self._block:
+            return
+        offset = self.file.tell()
+        payload = compress(bytes(self._block), self.compression)
+        self.file.write(BLOCK.pack(len(payload), len(self._block)) + payload)
+        for name, data_offset, length, header in self._block_index:
+            self.index[name] = [offset, data_offset, length, header]
+        self._block = bytearray()
+        self._block_index = []
+
+    def close(self):
+        self._flush()
+        index = json.dumps(self.index, separators=(',', ':'), default=str).encode('utf-8')
+        offset = self.file.tell()
+        self.file.write(index + TRAILER.pack(offset, len(index), MAGIC))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        if self.temp_path:
+            os.replace(self.temp_path, self.path)
+            sync_folder(os.path.dirname(os.path.abspath(self.path)))
+
+    def abort(self):#something went wrong while adding notes
+        if self.temp_path:#the old pack (if any) is untouched
+            self.file.close()
+            os.remove(self.temp_path)
+        else:#appending: keep the blocks already written, drop the half-filled one
+            self._block = bytearray()
+            self._block_index = []
+            self.close()
+
+
+class PackReader():
+
+    def __init__(self, path):#constructor
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:#empty file
+            self.file.close()
+            raise ValueError(f'{path} is not a notes pack')
+        if len(self.map) < HEADER.size + TRAILER.size:#too short to even have a header and a trailer
+            self.close()
+            raise ValueError(f'{path} is not a notes pack')
+        magic, version, compression = HEADER.unpack_from(self.map, 0)
+        self.end = self._last_trailer() if magic == MAGIC else None
+        if self.end is None:#not a pack, or an export that didn't finish
+            self.close()
+            raise ValueError(f'{path} is not a complete notes pack')
+        index_offset, index_length, end_magic = TRAILER.unpack_from(self.map, self.end - TRAILER.size)
+        if version != VERSION:
+            self.close()
+            raise ValueError(f'{path} is pack version {version}, this program reads version {VERSION}')
+        self.compression = {code: name for name, code in COMPRESSION.items()}[compression]
+        self.index_offset = index_offset
+        self.index = json.loads(self.map[index_offset:index_offset + index_length])
+        self._blocks = {} #block offset -> raw block, the most recently used last
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def _last_trailer(self):#where the last complete trailer ends, None if there is none
+        end = len(self.map)
+        if self.map[end - len(MAGIC):end] == MAGIC:#the usual case: nothing after it
+            return end
+        while True:#an append didn't finish, look for the trailer it was written after
+            position = self.map.rfind(MAGIC, HEADER.size, end - 1)
+            if position < 0:
+                return None
+            end = position + len(MAGIC)
+            if end >= HEADER.size + TRAILER.size:
+                index_offset, index_length, magic = TRAILER.unpack_from(self.map, end - TRAILER.size)
+                if HEADER.size <= index_offset and index_offset + index_length == end - TRAILER.size:#the index ends where the trailer starts
+                    try:
+                        json.loads(self.map[index_offset:index_offset + index_length])
+                        return end
+                    except ValueError:#MAGIC happened to be in a note or a compressed block
+                        pass
+
+    def names(self):
+        return list(self.index)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def header(self, name):
+        return self.index[name][3]
+
+    def read(self, name):#bytes of one note, KeyError when the pack doesn't have it
+        block_offset, data_offset, length, header = self.index[name]
+        if self.compression is None:#nothing to unpack, slice the mapped file directly
+            start = block_offset + BLOCK.size + data_offset
+            return self.map[start:start + length]
+        block = self._block(block_offset)
+        return block[data_offset:data_offset + length]
+
+    def _block(self, offset):
+        block = self._blocks.pop(offset, None)
+        if block is None:
+            stored, raw = BLOCK.unpack_from(self.map, offset)
+            block = decompress(self.map[offset + BLOCK.size:offset + BLOCK.size + stored], self.compression)
+            if len(self._blocks) >= BLOCK_CACHE:
+                del self._blocks[next(iter(self._blocks))]
+        self._blocks[offset] = block
+        return block
+
+    def items(self):#(name, bytes) for every note in the order they were written
+        for name in sorted(self.index, key=lambda name: self.index[name][:2]):
+            yield name, self.read(name)
+
+
+class PackNotebook(Notebook):
+    # A read-only Notebook on top of a pack file. Headers come from the pack's index, so listing and stats
+    # start right away; the search and tag indexes are built in memory on first use.
+    keeps_history = False #a pack is a snapshot, its notes have no .history
+
+    def __init__(self, pack_path):#constructor
+        super().__init__(pack_path)
+        self.pack = PackReader(pack_path)
+
+    def close(self):
+        self.pack.close()
+
+    def list_notes(self, sort_by=None, offset=0, limit=None, reverse=False, **filters):
+        if sort_by or offset or limit is not None or filters:#sorted pages come from the pack's headers, like a folder's catalog
+            return super().list_notes(sort_by, offset, limit, reverse, **filters)
+        return self.pack.names()
+
+    def get_note(self, filename):
+        try:
+            data = self.pack.read(filename)
+        except KeyError:
+            raise FileNotFoundError(filename)
+        return Note.read(io.BytesIO(data))
+
+    def iter_notes(self, files=None, header_only=False, workers=None, processes=None):#the pool options don't apply here
+        for file in self.list_notes() if files is None else files:
+            try:
+                yield file, self.get_note(file)
+            except Exception:#corrupted notes are skipped, like Notebook.iter_notes
+                continue
+
+    def catalog(self):#the headers stored in the pack, nothing to refresh
+        if self._catalog is None:
+            self._catalog = Catalog(self.notes_folder)
+            self._catalog.loaded = True
+            self._catalog.entries = {file: self.pack.header(file) or {'broken': True, 'tags': []} for file in self.list_notes()}
+        return self._catalog
+
+    def search_index(self):
+        if self._search_index is None:
+            self.rebuild_index()
+        return self._search_index
+
+    def rebuild_index(self):#in memory only, the pack is never written to
+        self._search_index = _memory_index(SearchIndex, self.notes_folder, self.iter_notes())
+        return self._search_index
+
+    def tag_index(self):
+        if self._tag_index is None:
+            self.rebuild_tag_index()
+        return self._tag_index
+
+    def rebuild_tag_index(self):
+        self._tag_index = _memory_index(TagIndex, self.notes_folder, self.iter_notes())
+        return self._tag_index
+
+    def watch(self, interval=None):#a pack never changes
+        return None
+
+    def _read_only(self, *args, **kwargs):
+        raise PermissionError(f'{self.notes_folder} is a read-only pack, import it into a folder to change notes')
+
+    save_note = save_many = delete_note = edit_note = refresh_note = restore = _read_only
+
+
+def _memory_index(cls, path, notes):#a sidecar index filled in memory, never saved
+    index = cls(path)
+    for file, note in notes:
+        index.add(file, index.extract(note))
+    return index
+
+
+def export_pack(notebook, path, compression=None):#every note of a folder Notebook into one pack file, returns how many
+    with PackWriter(path, compression) as pack:
+        return add_notes(pack, notebook)
+
+
+def add_notes(pack, notebook):#every note of a folder Notebook into an open PackWriter, returns how many
+    catalog = notebook.catalog()#headers for the index, only changed notes are reread
+    count = 0
+    for file in sorted(notebook.list_notes()):
+        with open(os.path.join(notebook.notes_folder, file), 'rb') as f:
+            data = f.read()
+        entry = catalog.entries.get(file, {})
+        pack.add(file, data, None if entry.get('broken') else {field: entry.get(field) for field in FIELDS})
+        count += 1
+    return count
+
+
+def import_pack(notebook, path):#writes every note of a pack into a folder Notebook as it was exported, returns how many
+    with PackReader(path) as pack:
+        for name in pack.names():#a bad name anywhere refuses the whole pack, before anything is written
+            check_name(name)
+        return write_notes(notebook, pack.items())
+
+
+def check_name(name):#ValueError unless name is a plain 'something.note' file name, so a pack can't write outside the folder
+    if os.path.basename(name) != name or name.startswith('.') or '/' in name or '\\' in name or not name.endswith('.note'):
+        raise ValueError(f'{name!r} is not a note file name')
+
+
+def write_notes(notebook, items):#items = (file, bytes of the note file), written into a folder Notebook as they are
+    count = 0
+    for batch in chunked(items, SAVE_BATCH):
+        saved = []
+        for file, data in batch:
+            check_name(file)
+            write_atomic(os.path.join(notebook.notes_folder, file), data.decode('utf-8'))
+            try:
+                saved.append((file, Note.read(io.BytesIO(data))))
+            except Exception:#copied as it is, just not indexed
+                pass
+        sync_folder(notebook.notes_folder)
+        record_saves(notebook.notes_folder, saved)
+        notebook._seen(saved)
+        count += len(batch)
+    return count
+
+
+def main(argv):#python pack.py export <notes folder> <pack> [gzip|zstd]  |  import <pack> <notes folder>  |  list <pack>
+    if len(argv) >= 3 and argv[0] == 'export':
+        count = export_pack(Notebook(argv[1]), argv[2], argv[3] if len(argv) > 3 else None)
+        print(f'Packed {count} note(s) from {argv[1]} into {argv[2]}')
+        return 0
+    if len(argv) == 3 and argv[0] == 'import':
+        os.makedirs(argv[2], exist_ok=True)
+        count = import_pack(Notebook(argv[2]), argv[1])
+        print(f'Unpacked {count} note(s) from {argv[1]} into {argv[2]}')
+        return 0
+    if len(argv) == 2 and argv[0] == 'list':
+        with PackReader(argv[1]) as pack:
+            for name in sorted(pack.names()):
+                print(name)
+        return 0
+    print('usage: python pack.py export <notes folder> <pack> [gzip|zstd]')
+    print('       python pack.py import <pack> <notes folder>')
+    print('       python pack.py list <pack>')
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,109 @@
+import time # perf_counter for the timers
+import functools # keeps the name and docstring of timed functions
+import threading # the server and the load pools time from several threads at once
+
+import Configurator
+
+
+# Where the time goes when search or stats is slow: timers around the hot paths (listing the folder,
+# reading notes, parsing YAML, the search index, stats), counted per name.
+#
+#   @timed('Note.load_note')        marks a function, costs one flag check per call while timing is off
+#   enable() / disable()            turn the timers on and off, e.g. "notes.py stats --perf"
+#   snapshot()                      {name: {'calls', 'total_ms', 'mean_ms', 'max_ms'}} since the last reset()
+#
+# setup() is called by the programs (menu, cli, server) and reads two settings:
+#   PERF=1                 timers on from the start
+#   PROFILE=<file>         runs the whole program under cProfile and writes the stats to <file> when it exits
+#                          (python -m pstats <file> to look at them), e.g. NOTES_PROFILE=/tmp/notes.prof
+
+ENABLED = False
+_timers = {} #name -> [calls, total seconds, max seconds]
+_lock = threading.Lock() #record() is a read-modify-write, two threads at once would lose calls
+_profiler = None
+
+
+def timed(name):
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def record(name, seconds):#adds one call to a timer, for code that isn't a whole function
+    with _lock:
+        timer = _timers.get(name)
+        if timer is None:
+            _timers[name] = [1, seconds, seconds]
+        else:
+            timer[0] += 1
+            timer[1] += seconds
+            if seconds > timer[2]:
+                timer[2] = seconds
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def reset():
+    with _lock:
+        _timers.clear()
+
+
+def snapshot():#the timers so far, slowest total first
+    stats = {}
+    with _lock:#a copy, so the timers can't change while we read them
+        timers = [(name, list(timer)) for name, timer in _timers.items()]
+    for name, (calls, total, longest) in sorted(timers, key=lambda item: -item[1][1]):
+        stats[name] = {'calls': calls, 'total_ms': round(total * 1000, 3),
+                       'mean_ms': round(total / calls * 1000, 4), 'max_ms': round(longest * 1000, 3)}
+    return stats
+
+
+def format_snapshot(stats=None):#lines of a table for people
+    stats = snapshot() if stats is None else stats
+    if not stats:
+        return ['(no timings recorded, turn them on with PERF=1 or --perf)']
+    lines = [f"{'':24} {'calls':>8} {'total ms':>11} {'mean ms':>10} {'max ms':>10}"]
+    for name, timer in stats.items():
+        lines.append(f"{name:24} {timer['calls']:8} {timer['total_ms']:11.3f} {timer['mean_ms']:10.4f} {timer['max_ms']:10.3f}")
+    return lines
+
+
+def setup():#reads the PERF and PROFILE settings, called once when a program starts
+    if Configurator.get('PERF'):
+        enable()
+    path = Configurator.get('PROFILE')
+    if path:
+        start_profile(path)
+
+
+def start_profile(path):#cProfile for the rest of the program, written to path at exit
+    global _profiler
+    import atexit
+    import cProfile
+    if _profiler is not None:
+        return
+    _profiler = cProfile.Profile()
+    atexit.register(_write_profile, _profiler, path)
+    _profiler.enable()
+
+
+def _write_profile(profiler, path):
+    profiler.disable()
+    profiler.dump_stats(path)
@@ -0,0 +1,305 @@
+import re # splits text into word tokens
+import math
+import heapq # top-k results without sorting every match
+from bisect import bisect_left # binary search in the sorted vocabulary for prefix queries
+from sidecar import JournaledIndex
+from perf import timed
+from fuzzy import TrigramIndex, FUZZY_WEIGHT
+
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Ranking: Okapi BM25, with a word in the title counting 3 times and a word in the tags 2 times.
+K1 = 1.2 #how fast repeating a word stops adding to the score
+B = 0.75 #how much longer notes are penalized
+FIELD_BOOSTS = (3.0, 2.0, 1.0) #title, tags, content
+SNIPPET_WORDS = 24 #words shown around the matches
+HIGHLIGHT = ('**', '**') #put around every matching word in a snippet, markdown bold
+
+
+def tokenize(text):#"Hello, World!" -> ['hello', 'world']
+    return TOKEN_RE.findall(text.lower())
+
+
+def parse_query(query, fuzzy=False):#turns the search box text into a list of OR-ed groups, each group is a list of AND-ed clauses
+    # Supported syntax:
+    #   python java          either word (same as the old search)
+    #   python AND java      both words
+    #   python OR java       either word, spelled out
+    #   "hello world"        the words next to each other
+    #   pyth*                any word starting with pyth
+    #   pyhton~              the word or words a typo or two away from it (fuzzy=True does this for every word)
+    groups = []
+    join_next = False
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query):
+        if word == 'AND':
+            join_next = bool(groups)
+            continue
+        if word == 'OR':
+            join_next = False
+            continue
+        if phrase:
+            clause = ('phrase', tokenize(phrase))
+        elif word.endswith('*') and len(tokenize(word)) == 1:
+            clause = ('prefix', tokenize(word)[0])
+        elif (fuzzy or word.endswith('~')) and len(tokenize(word)) == 1:
+            clause = ('fuzzy', tokenize(word)[0])#SearchIndex.parse turns it into the words it stands for
+        else:
+            tokens = tokenize(word)
+            clause = ('term', tokens[0]) if len(tokens) == 1 else ('phrase', tokens)#"don't" -> don t, next to each other
+        if clause[0] == 'phrase' and not clause[1]:#only punctuation, nothing to look for
+            continue
+        if join_next:
+            groups[-1].append(clause)
+        else:
+            groups.append([clause])
+        join_next = False
+    return groups
+
+
+def snippet(text, groups, words=SNIPPET_WORDS, highlight=HIGHLIGHT):#the part of text with the most query words, matches highlighted
+    exact = set()
+    prefixes = []
+    for group in groups:
+        for kind, value in group:
+            if kind == 'prefix':
+                prefixes.append(value)
+            elif kind in ('phrase', 'words'):
+                exact.update(value)
+            else:
+                exact.add(value)
+    prefixes = tuple(prefixes)
+    found = list(TOKEN_RE.finditer(text))
+    if not found:
+        return ''
+    hits = [i for i, match in enumerate(found) if match.group().lower() in exact or match.group().lower().startswith(prefixes)]
+    start, best = 0, 0
+    last = 0
+    for first, hit in enumerate(hits):#the window starting at each hit, keep the one covering the most hits
+        while last < len(hits) and hits[last] < hit + words:
+            last += 1
+        if last - first > best:
+            start, best = hit, last - first
+    start = max(0, min(start - words // 4, len(found) - words))#a few words of context before the first match
+    end = min(start + words, len(found))
+    hits = set(hits)
+    parts = []
+    position = found[start].start() if start > 0 else 0
+    for i in range(start, end):
+        match = found[i]
+        parts.append(text[position:match.start()])
+        parts.append(highlight[0] + match.group() + highlight[1] if i in hits else match.group())
+        position = match.end()
+    if end == len(found):#keep the closing punctuation
+        parts.append(text[position:])
+    text_part = ' '.join(''.join(parts).split())#newlines and runs of spaces -> one space
+    return ('...' if start > 0 else '') + text_part + ('...' if end < len(found) else '')
+
+
+class SearchIndex(JournaledIndex):
+    # Inverted index: token -> {note file: [positions]}.
+    # Positions let us answer phrase queries, the number of positions is the term frequency.
+    # Title, tags and content are numbered one after the other with a gap in between,
+    # so a phrase never runs from the title into the content.
+    SNAPSHOT = '.search-index.json'
+    JOURNAL = '.search-index.log'
+
+    def reset(self):
+        self.postings = {} #token -> {file: [positions]}
+        self.docs = {} #file -> [title_end, tags_end, length]
+        self.doc_terms = {} #file -> tokens in that note, so remove() doesn't walk the whole vocabulary
+        self._vocabulary = None #sorted tokens, rebuilt lazily for prefix queries
+        self._trigrams = None #TrigramIndex of the tokens, made by the first fuzzy query and then kept up to date
+        self._fuzzy = {} #word -> what similar() found for it, until the vocabulary changes
+        self._norms = None #file -> BM25 length normalization, rebuilt lazily after notes change
+
+    def to_data(self):
+        return {'docs': self.docs, 'postings': self.postings}
+
+    def from_data(self, data):
+        self.docs = data['docs']
+        self.postings = data['postings']
+        for token, files in self.postings.items():
+            for file in files:
+                self.doc_terms.setdefault(file, []).append(token)
+
+    @classmethod
+    def extract(cls, note):
+        encryption = getattr(note, 'encryption', None)#encrypted text never goes into the index, see encryption.py
+        if encryption == 'note':
+            return {'lengths': [0, 1, 3], 'terms': {}}
+        title = tokenize(note.title or '')
+        tags = tokenize(' '.join(str(tag) for tag in note.tags))
+        content = tokenize(note.content or '') if not encryption else []
+        terms = {}
+        position = 0
+        for field in (title, tags, content):
+            for token in field:
+                terms.setdefault(token, []).append(position)
+                position += 1
+            position += 1 #the gap between fields
+        title_end = len(title)
+        tags_end = title_end + 1 + len(tags)
+        return {'lengths': [title_end, tags_end, position], 'terms': terms}
+
+    def add(self, filename, entry):
+        self.remove(filename)
+        self._norms = None
+        self.docs[filename] = entry['lengths']
+        self.doc_terms[filename] = list(entry['terms'])
+        for token, positions in entry['terms'].items():
+            if token not in self.postings:
+                self._new_word(token)
+            self.postings.setdefault(token, {})[filename] = positions
+
+    def remove(self, filename):
+        for token in self.doc_terms.pop(filename, []):
+            files = self.postings.get(token)
+            if files is None:
+                continue
+            files.pop(filename, None)
+            if not files:
+                del self.postings[token]
+                self._vocabulary = None
+                self._fuzzy = {}
+                if self._trigrams is not None:
+                    self._trigrams.remove(token)
+        if self.docs.pop(filename, None) is not None:
+            self._norms = None
+
+    def _new_word(self, token):
+        self._vocabulary = None
+        self._fuzzy = {}
+        if self._trigrams is not None:
+            self._trigrams.add(token)
+
+    # --- queries ---
+
+    def term_frequency(self, token, filename):
+        return len(self.postings.get(token, {}).get(filename, ()))
+
+    def parse(self, query, fuzzy=False):#parse_query, with every fuzzy word replaced by ('words', {word: typos}) from this index
+        return [[('words', self.similar(value)) if kind == 'fuzzy' else (kind, value) for kind, value in group]
+                for group in parse_query(query, fuzzy)]
+
+    def similar(self, word):#{indexed word: typos} within max_typos(word) of word, see fuzzy.py
+        found = self._fuzzy.get(word)
+        if found is None:
+            if self._trigrams is None:
+                self._trigrams = TrigramIndex(self.postings)
+            found = self._fuzzy[word] = self._trigrams.similar(word)
+        return found
+
+    @timed('SearchIndex.search')
+    def search(self, query, fuzzy=False):#returns the note files matching the query
+        return sorted(self._matches(self.parse(query, fuzzy)))
+
+    @timed('SearchIndex.ranked')
+    def ranked(self, query, limit=10, fuzzy=False):#[(file, score)] for the best limit matches, best first (limit=None: all of them)
+        groups = self.parse(query, fuzzy)
+        matches = self._matches(groups)
+        if not matches:
+            return []
+        tokens = {} #token -> weight, a word found through a typo counts less
+        for group in groups:
+            for kind, value in group:
+                if kind == 'prefix':
+                    tokens.update(dict.fromkeys(self._expand_prefix(value), 1.0))
+                elif kind == 'phrase':
+                    tokens.update(dict.fromkeys(value, 1.0))
+                elif kind == 'words':
+                    for token, typos in value.items():
+                        tokens[token] = max(tokens.get(token, 0.0), FUZZY_WEIGHT ** typos)
+                else:
+                    tokens[value] = 1.0
+        scores = dict.fromkeys(matches, 0.0)
+        norms = self._length_norms()
+        title_boost, tags_boost, content_boost = FIELD_BOOSTS
+        for token, weight in tokens.items():
+            files = self.postings.get(token)
+            if not files:
+                continue
+            idf = weight * math.log(1 + (len(self.docs) - len(files) + 0.5) / (len(files) + 0.5))
+            for file, positions in files.items():
+                if file not in scores:
+                    continue
+                title_end, tags_end, length = self.docs[file]
+                in_title = bisect_left(positions, title_end)#positions are in order, title first
+                in_tags = bisect_left(positions, tags_end) - in_title
+                tf = title_boost * in_title + tags_boost * in_tags + content_boost * (len(positions) - in_title - in_tags)
+                scores[file] += idf * tf * (K1 + 1) / (tf + norms[file])
+        limit = len(scores) if limit is None else limit
+        return heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def _length_norms(self):#file -> the BM25 length part, K1 * (1 - B + B * length / average length)
+        if self._norms is None:
+            average = sum(doc[2] for doc in self.docs.values()) / len(self.docs)
+            self._norms = {file: K1 * (1 - B + B * doc[2] / average) for file, doc in self.docs.items()}
+        return self._norms
+
+    def _matches(self, groups):#set of files matching parsed query groups
+        matches = set()
+        for group in groups:
+            files = None
+            for clause in group:
+                found = self._match(clause)
+                files = found if files is None else files & found
+                if not files:
+                    break
+            matches |= files
+        return matches
+
+    def _match(self, clause):
+        kind, value = clause
+        if kind == 'term':
+            return set(self.postings.get(value, ()))
+        if kind == 'prefix':
+            return self._match_prefix(value)
+        if kind == 'words':
+            files = set()
+            for token in value:
+                files.update(self.postings[token])
+            return files
+        return self._match_phrase(value)
+
+    def _match_prefix(self, prefix):
+        files = set()
+        for token in self._expand_prefix(prefix):
+            files.update(self.postings[token])
+        return files
+
+    def _expand_prefix(self, prefix):#every indexed word starting with prefix
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        i = bisect_left(self._vocabulary, prefix)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(prefix):
+            yield self._vocabulary[i]
+            i += 1
+
+    def _match_phrase(self, tokens):
+        candidates = None
+        for token in tokens:#only notes that contain every word can contain the phrase
+            files = set(self.postings.get(token, ()))
+            candidates = files if candidates is None else candidates & files
+            if not candidates:
+                return set()
+        if len(tokens) == 1:
+            return candidates
+        matches = set()
+        for file in candidates:
+            later = [set(self.postings[token][file]) for token in tokens[1:]]
+            for start in self.postings[tokens[0]][file]:
+                if all(start + offset in positions for offset, positions in enumerate(later, 1)):
+                    matches.add(file)
+                    break
+        return matches
+
+
+if __name__ == '__main__':#python search_index.py [notes folder] -> rebuilds the index from the note files
+    import sys
+    import Configurator
+    from notes import Notebook
+    folder = sys.argv[1] if len(sys.argv) > 1 else Configurator.get('ROOT_FOLDER')
+    notebook = Notebook(folder)
+    index = notebook.rebuild_index()
+    print(f"Indexed {len(index.docs)} note(s), {len(index.postings)} distinct words in {folder}")
@@ -0,0 +1,287 @@
+import sys
+import gzip # compresses responses for clients that send Accept-Encoding: gzip
+import json
+import asyncio # one event loop serves every connection, blocking notebook calls run in a thread pool
+import hashlib # ETags for list responses
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs, unquote
+
+import perf
+import Configurator
+from notes import Note, Notebook, open_notebook
+
+
+# Phase 3 REST API (see the README) on top of a Notebook, using only the standard library.
+#
+#   GET    /api/notes               list notes (?offset=0&limit=50, &sort=title|created|modified|priority&reverse=1)
+#   POST   /api/notes               create a note from JSON {"id", "title", "content", "tags", ...}
+#   GET    /api/notes/:id           one note
+#   PUT    /api/notes/:id           update a note from JSON
+#   DELETE /api/notes/:id           delete a note
+#   GET    /api/tags                every tag with its number of notes
+#   GET    /api/notes/tag/:tagid    notes with that tag (?offset=0&limit=50), :tagid can be several tags
+#                                   joined with + (notes with all of them) or , (notes with any of them)
+#   GET    /api/search?q=query      matching notes, best first, with score and snippet (?offset=0&limit=50),
+#                                   &fuzzy=1 also finds words with a typo or two
+#   GET    /api/search?complete=te  titles for autocompletion, [{"id", "title"}] best first (?limit=10)
+#
+# :id is the filename without .note. Every GET answers with an ETag and a 304 when the client's
+# If-None-Match still matches, notes use their modified time for it.
+
+MAX_HEADER = 64 * 1024 #bytes, larger requests are refused
+MAX_BODY = 10 * 1024 * 1024
+GZIP_MIN = 1024 #smaller bodies aren't worth compressing
+STATUS = {200: 'OK', 201: 'Created', 204: 'No Content', 304: 'Not Modified', 400: 'Bad Request',
+          404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class NotesAPI():#turns (method, path, query, body) into (status, payload, etag); runs in the worker threads
+
+    def __init__(self, notebook):#constructor
+        self.notebook = notebook
+        self.lock = threading.Lock() #the notebook's indexes aren't thread safe, reading note files is
+
+    def handle(self, method, path, query, body):
+        parts = [unquote(part) for part in path.strip('/').split('/')]
+        if parts[:1] != ['api']:
+            raise HTTPError(404, 'not found')
+        parts = parts[1:]
+        if parts == ['notes']:
+            if method == 'GET':
+                with self.lock:
+                    headers = self.notebook.note_headers()
+                    if query.get('sort'):#the sorted order is kept by the notebook until a note changes
+                        try:
+                            files = self.notebook.list_notes(query['sort'], reverse=query.get('reverse') in ('1', 'true'))
+                        except ValueError as error:
+                            raise HTTPError(400, str(error))
+                        by_file = {header['file']: header for header in headers}
+                        headers = [by_file[file] for file in files if file in by_file]
+                return self.page(headers, query)
+            if method == 'POST':
+                data = self.json_body(body)
+                if not data.get('id'):
+                    raise HTTPError(400, 'id is required')
+                return 201, self.save(data['id'], data), None
+        elif len(parts) == 2 and parts[0] == 'notes':
+            if method == 'GET':
+                note = self.load(parts[1])
+                return 200, dict(note.to_dict(), id=parts[1]), note_etag(note)
+            if method == 'PUT':
+                return 200, self.save(parts[1], self.json_body(body), existing=self.load(parts[1])), None
+            if method == 'DELETE':
+                self.check_id(parts[1])
+                self.load(parts[1])#404 for unknown notes
+                with self.lock:
+                    self.notebook.delete_note(parts[1])
+                return 204, None, None
+        elif parts == ['tags'] and method == 'GET':
+            with self.lock:
+                counts = self.notebook.tag_counts()
+            return 200, dict(sorted(counts.items(), key=lambda item: str(item[0]).lower())), None
+        elif len(parts) == 3 and parts[:2] == ['notes', 'tag'] and method == 'GET':
+            match, separator = ('any', ',') if ',' in parts[2] else ('all', '+')
+            tags = [tag for tag in parts[2].split(separator) if tag]
+            with self.lock:
+                files = self.notebook.notes_with_tags(tags, match)#tag index lookup, no note is opened
+            return self.page([{'file': file} for file in files], query)
+        elif parts == ['search'] and method == 'GET':
+            if 'complete' in query:
+                try:
+                    limit = max(int(query.get('limit', 10)), 0)
+                except ValueError:
+                    raise HTTPError(400, 'limit must be a number')
+                with self.lock:
+                    titles = self.notebook.complete_titles(query['complete'], limit)
+                return 200, [{'id': file[:-len('.note')], 'title': title} for file, title in titles], None
+            fuzzy = query.get('fuzzy') in ('1', 'true')
+            with self.lock:
+                results = self.notebook.search_ranked(query.get('q', ''), limit=None, snippets=False, fuzzy=fuzzy)
+                status, payload, etag = self.page(results, query)
+                for item in payload['items']:#only the notes on this page are opened for their snippet
+                    item['snippet'] = self.notebook.snippet(item['file'], query.get('q', ''), fuzzy)
+            return status, payload, etag
+        else:
+            raise HTTPError(404, 'not found')
+        raise HTTPError(405, 'method not allowed')
+
+    def page(self, items, query):
+        try:
+            offset = max(int(query.get('offset', 0)), 0)
+            limit = max(int(query.get('limit', Configurator.get('PAGE_SIZE'))), 0)
+        except ValueError:
+            raise HTTPError(400, 'offset and limit must be numbers')
+        for item in items:
+            item['id'] = item['file'][:-len('.note')]
+        return 200, {'total': len(items), 'offset': offset, 'limit': limit, 'items': items[offset:offset + limit]}, None
+
+    def check_id(self, note_id):#400 for ids that could point outside the notes folder ('..%2Fx' is unquoted to '../x')
+        if not isinstance(note_id, str) or not note_id or '/' in note_id or '\\' in note_id or note_id.startswith('.'):
+            raise HTTPError(400, 'invalid note id')
+
+    def check_fields(self, data):#400 before the note is touched, a bad type would be written to the file and break the indexes
+        for field in ('title', 'content', 'author', 'status'):
+            if field in data and not isinstance(data[field], str) and not (data[field] is None and field in ('author', 'status')):
+                raise HTTPError(400, f'{field} must be a string')
+        if 'tags' in data and not (isinstance(data['tags'], list) and all(isinstance(tag, str) for tag in data['tags'])):
+            raise HTTPError(400, 'tags must be a list of strings')
+        if 'priority' in data and not (data['priority'] is None or isinstance(data['priority'], (str, int)) and not isinstance(data['priority'], bool)):
+            raise HTTPError(400, 'priority must be a number or a string')
+
+    def load(self, note_id):
+        self.check_id(note_id)
+        try:
+            with self.lock:#the SQLite backend shares one connection between the worker threads
+                return self.notebook.get_note(f'{note_id}.note')
+        except FileNotFoundError:
+            raise HTTPError(404, f"note '{note_id}' not found")
+
+    def save(self, note_id, data, existing=None):
+        self.check_id(note_id)
+        self.check_fields(data)
+        note = existing or Note(data.get('title', note_id), '')
+        for field in ('title', 'content', 'tags', 'author', 'status', 'priority'):
+            if field in data:
+                setattr(note, field, data[field])
+        with self.lock:
+            self.notebook.save_note(note, note_id)
+        return dict(note.to_dict(), id=note_id)
+
+    def json_body(self, body):
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError:
+            raise HTTPError(400, 'body must be JSON')
+        if not isinstance(data, dict):
+            raise HTTPError(400, 'body must be a JSON object')
+        return data
+
+
+def note_etag(note):
+    return '"' + hashlib.sha1(str(note.modified).encode('utf-8')).hexdigest() + '"'
+
+
+def render(status, payload, etag, request_headers):#-> (status, response headers, body bytes); runs in a worker thread
+    if payload is None:
+        return status, {}, b''
+    body = json.dumps(payload, default=str).encode('utf-8')
+    etag = etag or '"' + hashlib.sha1(body).hexdigest() + '"'
+    headers = {'Content-Type': 'application/json; charset=utf-8', 'ETag': etag}
+    if status == 200 and etag in request_headers.get('if-none-match', ''):#the client's copy is still current
+        return 304, headers, b''
+    if len(body) >= GZIP_MIN and 'gzip' in request_headers.get('accept-encoding', ''):
+        body = gzip.compress(body, compresslevel=5)
+        headers['Content-Encoding'] = 'gzip'
+    headers['Vary'] = 'Accept-Encoding'
+    return status, headers, body
+
+
+class NotesServer():
+
+    def __init__(self, notebook, host=None, port=None, workers=8):#constructor
+        self.api = NotesAPI(notebook)
+        self.host = host or Configurator.get('SERVER_HOST')
+        self.port = Configurator.get('SERVER_PORT') if port is None else port
+        self.executor = ThreadPoolExecutor(workers)#file I/O and index work happen here, never on the event loop
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.serve_connection, self.host, self.port, limit=MAX_HEADER)
+        self.port = self.server.sockets[0].getsockname()[1]#the real port when port=0 picked a free one
+        return self
+
+    async def serve_forever(self):
+        await self.start()
+        print(f'Serving notes on http://{self.host}:{self.port}/api/notes')
+        async with self.server:
+            await self.server.serve_forever()
+
+    def close(self):
+        if self.server:
+            self.server.close()
+        self.executor.shutdown(wait=False)
+
+    async def serve_connection(self, reader, writer):#one client connection, several requests when it keeps the connection alive
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self.respond(writer, 413, {}, b'', keep_alive=False)
+                    break
+                method, target, version, headers = parse_head(head)
+                length = int(headers.get('content-length', 0) or 0)
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, {}, b'', keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                status, response_headers, response_body = await self.dispatch(method, target, headers, body)
+                await self.respond(writer, status, response_headers, response_body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, headers, body):
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        loop = asyncio.get_running_loop()
+
+        def work():
+            try:
+                status, payload, etag = self.api.handle(method, url.path, query, body)
+            except HTTPError as error:
+                status, payload, etag = error.status, {'error': str(error)}, None
+            except Exception as error:
+                status, payload, etag = 500, {'error': f'{type(error).__name__}: {error}'}, None
+            return render(status, payload, etag, headers)
+
+        return await loop.run_in_executor(self.executor, work)
+
+    async def respond(self, writer, status, headers, body, keep_alive):
+        lines = [f'HTTP/1.1 {status} {STATUS.get(status, "")}']
+        headers = dict(headers, **{'Content-Length': str(len(body)), 'Connection': 'keep-alive' if keep_alive else 'close'})
+        lines.extend(f'{name}: {value}' for name, value in headers.items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+
+def parse_head(head):#b'GET /api/notes HTTP/1.1\r\nHost: ...' -> (method, target, version, {lowercase header: value})
+    lines = head.decode('latin-1').split('\r\n')
+    method, target, version = lines[0].split(' ', 2)
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+def main(argv):#python server.py [port] [notes folder]
+    perf.setup()
+    port = int(argv[0]) if argv else None
+    notebook = Notebook(argv[1]) if len(argv) > 1 else open_notebook()
+    notebook.watch()#answer from memory, following changes other programs make to the folder
+    server = NotesServer(notebook, port=port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
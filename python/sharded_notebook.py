@@ -0,0 +1,320 @@
+import os
+import sys
+import json # the layout file
+import zlib # crc32, which shard a note goes to
+import heapq
+import shutil # moving notes (and their history) during a migration
+from collections import Counter
+from itertools import chain
+
+import Configurator
+from notes import Notebook, sync_folder, write_atomic
+from perf import timed
+from history import HISTORY_FOLDER, history_path
+from catalog import Catalog
+from search_index import SearchIndex
+from tag_index import TagIndex
+from duplicates import SignatureCache
+
+
+# A Notebook whose notes are spread over several folders, each one an ordinary folder Notebook (a shard)
+# with its own catalog, search index, tag index and history. A folder with 100,000s of files makes every
+# listdir, stat and open slower; with 16 or 256 shards each directory stays small.
+#
+#   root/.shards      {"shards": 16}: the notes are hashed into root/00 ... root/0f by file name
+#                     {"folders": ["/mnt/a/notes", "archive"]}: several folders (relative to root) used as one notebook
+#
+# A note is found without looking: the crc32 of its file name says which shard it is in. With mounted
+# folders a note stays where it was put, so the folders are checked in turn (new notes are hashed).
+# Listing, searching and stats ask every shard at the same time (LOAD_WORKERS threads) and merge the answers.
+# Ranked search scores each shard with its own BM25 statistics, which is close to, not exactly, the score
+# one big index would give.
+#
+# python sharded_notebook.py migrate <notes folder> [root] [shards] moves a flat folder into this layout.
+
+LAYOUT_FILE = '.shards'
+SIDECARS = (Catalog.FILENAME, SearchIndex.SNAPSHOT, SearchIndex.JOURNAL, TagIndex.SNAPSHOT, TagIndex.JOURNAL,
+            SignatureCache.FILENAME) #a flat folder's indexes, stale after a migration
+
+
+def shard_of(file, count):#'note-1.note', 16 -> 0..15, the same on every machine and Python version
+    return zlib.crc32(file.encode('utf-8')) % count
+
+
+def shard_folders(root, count):#root/00, root/01, ... (hex, so 256 shards are 00 .. ff)
+    width = max(2, len(f'{count - 1:x}'))
+    return [os.path.join(root, f'{i:0{width}x}') for i in range(count)]
+
+
+def read_layout(root):#the .shards file as a dictionary, None when root isn't sharded yet
+    try:
+        with open(os.path.join(root, LAYOUT_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_layout(root, layout):
+    os.makedirs(root, exist_ok=True)
+    write_atomic(os.path.join(root, LAYOUT_FILE), json.dumps(layout))
+
+
+class ShardedNotebook(Notebook):
+
+    def __init__(self, root):#constructor, a root without a layout file gets SHARDS hashed shards
+        super().__init__(root)
+        layout = read_layout(root)
+        if layout is None:
+            if os.path.isdir(root) and any(name.endswith('.note') for name in os.listdir(root)):
+                raise ValueError(f'{root} has notes in it, move them into shards with: python sharded_notebook.py migrate {root}')
+            layout = {'shards': Configurator.get('SHARDS')}
+            write_layout(root, layout)
+        if 'folders' in layout:
+            folders = [os.path.join(root, os.path.expanduser(folder)) for folder in layout['folders']]
+        else:
+            folders = shard_folders(root, layout['shards'])
+        self.hashed = 'folders' not in layout
+        for folder in folders:
+            os.makedirs(folder, exist_ok=True)
+        self.shards = [Notebook(folder) for folder in folders]
+        self._pool = None #threads for asking every shard at once, started on first use
+
+    def close(self):
+        self.unwatch()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _each(self, function):#[function(shard) for every shard], run on all shards at the same time
+        workers = min(len(self.shards), Configurator.get('LOAD_WORKERS'))
+        if workers <= 1:
+            return [function(shard) for shard in self.shards]
+        if self._pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._pool = ThreadPoolExecutor(workers)
+        return list(self._pool.map(function, self.shards))
+
+    def _shard_for(self, file):#the shard that has (or gets) file = 'name.note'
+        if not self.hashed:#mounted folders: wherever the note (or its history) already is
+            for shard in self.shards:
+                if os.path.exists(os.path.join(shard.notes_folder, file)) or os.path.exists(history_path(shard.notes_folder, file)):
+                    return shard
+        return self.shards[shard_of(file, len(self.shards))]
+
+    def _by_shard(self, files):#{shard: [files]}
+        groups = {}
+        for file in files:
+            groups.setdefault(self._shard_for(file), []).append(file)
+        return groups
+
+    # --- across every shard ---
+
+    @timed('ShardedNotebook.list_notes')
+    def list_notes(self, sort_by=None, offset=0, limit=None, reverse=False, **filters):
+        if sort_by or offset or limit is not None or filters:
+            return [file for file, title in self.list_titles(sort_by or 'file', offset, limit, reverse, **filters)]
+        return list(chain.from_iterable(self._each(lambda shard: shard.list_notes())))
+
+    def keyed_titles(self, sort_by='title', offset=0, limit=None, reverse=False, **filters):
+        # Every shard gives its first offset + limit notes, the page is cut from those once they are merged.
+        end = None if limit is None else offset + limit
+        titles = list(chain.from_iterable(self._each(lambda shard: shard.keyed_titles(sort_by, 0, end, reverse, **filters))))
+        titles.sort(key=lambda item: item[1])#ties stay in filename order, like in one folder
+        titles.sort(key=lambda item: item[0], reverse=reverse)
+        return titles[offset:end]
+
+    @timed('ShardedNotebook.search_notes')
+    def search_notes(self, query, fuzzy=False):
+        return sorted(chain.from_iterable(self._each(lambda shard: shard.search_notes(query, fuzzy))))
+
+    def search_ranked(self, query, limit=10, snippets=True, fuzzy=False):
+        found = chain.from_iterable(self._each(lambda shard: shard.search_ranked(query, limit, False, fuzzy)))
+        results = sorted(found, key=lambda result: (-result['score'], result['file']))[:limit]
+        if snippets:
+            for result in results:
+                result['snippet'] = self.snippet(result['file'], query, fuzzy)
+        return results
+
+    def complete_titles(self, text, limit=10):#titles starting with text first, then the other matches, by title
+        prefix = text.lstrip().lower()
+        found = chain.from_iterable(self._each(lambda shard: shard.complete_titles(text, limit)))
+        return heapq.nsmallest(limit, found, key=lambda item: (not str(item[1]).lower().startswith(prefix), str(item[1]).lower(), item[0]))
+
+    def note_headers(self):
+        return list(heapq.merge(*self._each(lambda shard: shard.note_headers()), key=lambda header: header['file']))
+
+    def iter_notes(self, files=None, header_only=False, workers=None, processes=None):#one shard after the other, each with its own pool
+        groups = [(shard, None) for shard in self.shards] if files is None else self._by_shard(files).items()
+        for shard, group in groups:
+            yield from shard.iter_notes(group, header_only, workers, processes)
+
+    def rebuild_index(self):
+        return self._each(lambda shard: shard.rebuild_index())
+
+    def rebuild_tag_index(self):
+        return self._each(lambda shard: shard.rebuild_tag_index())
+
+    def notes_with_tag(self, tag):
+        return sorted(chain.from_iterable(self._each(lambda shard: shard.notes_with_tag(tag))))
+
+    def notes_with_tags(self, tags, match='all'):
+        return sorted(chain.from_iterable(self._each(lambda shard: shard.notes_with_tags(tags, match))))
+
+    def tag_counts(self):#the shards' counts added up, tags that only differ in case count once
+        counts = {}
+        names = {}
+        for index in self._each(lambda shard: shard.tag_index()):
+            for tag, files in index.files.items():
+                counts[tag] = counts.get(tag, 0) + len(files)
+                names[tag] = min(names.get(tag, index.names[tag]), index.names[tag])
+        return Counter({names[tag]: count for tag, count in counts.items()})
+
+    def top_tags(self, n=10):
+        return heapq.nlargest(n, self.tag_counts().items(), key=lambda item: item[1])
+
+    @timed('ShardedNotebook.get_stats')
+    def get_stats(self):
+        def shard_stats(shard):
+            table = shard.header_table()
+            return len(table), [table.tag_names[number] for number in table.tag_ids], shard.tag_index().files.keys()
+        stats = self._each(shard_stats)
+        return {
+            'total_notes': sum(count for count, tags, normalized in stats),
+            'total_tags': len(set().union(*(normalized for count, tags, normalized in stats))),
+            'all_tags': [tag for count, tags, normalized in stats for tag in tags],
+        }
+
+    def note_stamps(self):
+        return dict(chain.from_iterable(stamps.items() for stamps in self._each(lambda shard: shard.note_stamps())))
+
+    def signatures(self):#every shard keeps its own cache, copies are looked for across all of them
+        return dict(chain.from_iterable(found.items() for found in self._each(lambda shard: shard.signatures())))
+
+    def watch(self, interval=None):
+        return self._each(lambda shard: shard.watch(interval))
+
+    def unwatch(self):
+        for shard in self.shards:
+            shard.unwatch()
+
+    # --- one note, in its shard ---
+
+    def get_note(self, filename):
+        return self._shard_for(filename).get_note(filename)
+
+    def snippet(self, file, query, fuzzy=False):
+        return self._shard_for(file).snippet(file, query, fuzzy)
+
+    def refresh_note(self, file):
+        self._shard_for(file).refresh_note(file)
+
+    def save_note(self, note, filename, touch=True, check=False):
+        self._shard_for(f'{filename}.note').save_note(note, filename, touch, check)
+
+    def save_many(self, notes, touch=True):
+        groups = {}
+        for note, filename in notes:
+            groups.setdefault(self._shard_for(f'{filename}.note'), []).append((note, filename))
+        return sum(shard.save_many(group, touch) for shard, group in groups.items())
+
+    def edit_note(self, file, editor):
+        self._shard_for(file).edit_note(file, editor)
+
+    def delete_note(self, filename):
+        self._shard_for(f'{filename}.note').delete_note(filename)
+
+    def history(self, file):
+        return self._shard_for(file).history(file)
+
+    def restore(self, file, version):
+        return self._shard_for(file).restore(file, version)
+
+    def unlock(self, passphrase):#one passphrase for every shard: the first shard's settings are copied to the others
+        from encryption import unlock_notebook, SETTINGS_FILE
+        unlock_notebook(self.shards[0].notes_folder, passphrase)
+        settings = os.path.join(self.shards[0].notes_folder, SETTINGS_FILE)
+        for shard in self.shards[1:]:
+            if not os.path.exists(os.path.join(shard.notes_folder, SETTINGS_FILE)):
+                shutil.copyfile(settings, os.path.join(shard.notes_folder, SETTINGS_FILE))
+            unlock_notebook(shard.notes_folder, passphrase)#same salt: the key is already cached
+
+    def export_pack(self, path, compression=None):
+        from pack import PackWriter, add_notes
+        with PackWriter(path, compression) as pack:
+            return sum(add_notes(pack, shard) for shard in self.shards)
+
+    def import_pack(self, path):
+        from pack import PackReader, write_notes, check_name
+        with PackReader(path) as pack:
+            for name in pack.names():
+                check_name(name)
+            return sum(write_notes(shard, ((file, pack.read(file)) for file in files))
+                       for shard, files in self._by_shard(pack.names()).items())
+
+    # Every Notebook method that reads an index, the catalog or the folder is overridden above to ask the
+    # shards (test_sharded_notebook checks that none is left), so the root's own indexes are never needed.
+    def _one_index(self, *args, **kwargs):
+        raise TypeError('a sharded notebook has an index per shard, use notebook.shards[i] for one of them')
+
+    search_index = tag_index = catalog = header_table = _one_index
+
+
+def migrate(folder, root=None, shards=None):#moves the notes of a flat folder (and their history) into hashed shards, returns how many
+    # root defaults to the folder itself. Moving is a rename, so it is quick on the same disk; running it
+    # again after an interruption moves whatever is left. The shards build their indexes on first use.
+    from encryption import SETTINGS_FILE
+    root = root or folder
+    shards = shards or Configurator.get('SHARDS')
+    layout = read_layout(root)
+    if layout is not None and layout != {'shards': shards}:
+        raise ValueError(f'{root} is already sharded as {layout}')
+    folders = shard_folders(root, shards)
+    for target in folders:
+        os.makedirs(target, exist_ok=True)
+    settings = os.path.join(folder, SETTINGS_FILE)
+    if os.path.exists(settings):#encrypted notes keep opening with the same passphrase
+        for target in folders:
+            shutil.copyfile(settings, os.path.join(target, SETTINGS_FILE))
+    count = 0
+    with os.scandir(folder) as entries:
+        notes = [entry.name for entry in entries if entry.name.endswith('.note') and entry.is_file()]
+    for file in notes:
+        shutil.move(os.path.join(folder, file), os.path.join(folders[shard_of(file, shards)], file))
+        count += 1
+    logs = os.path.join(folder, HISTORY_FOLDER)
+    if os.path.isdir(logs):#deleted notes' history too, restore() still finds it
+        for name in os.listdir(logs):
+            if name.endswith(('.note.log', '.note.log.idx')):#the log and the index of its versions' offsets
+                file = name[:name.index('.note.log') + len('.note')]
+                target = os.path.dirname(history_path(folders[shard_of(file, shards)], file))
+                os.makedirs(target, exist_ok=True)
+                shutil.move(os.path.join(logs, name), os.path.join(target, name))
+    for target in folders:
+        sync_folder(target)
+    for name in SIDECARS:
+        for path in (os.path.join(folder, name), os.path.join(folder, name + '.lock')):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    write_layout(root, {'shards': shards})
+    return count
+
+
+def main(argv):#python sharded_notebook.py migrate <notes folder> [root] [shards]  |  mount <root> <folder> ...
+    if 2 <= len(argv) <= 4 and argv[0] == 'migrate':
+        root = argv[2] if len(argv) > 2 else argv[1]
+        count = migrate(argv[1], root, int(argv[3]) if len(argv) > 3 else None)
+        print(f'Moved {count} note(s) from {argv[1]} into {read_layout(root)["shards"]} shards under {root}')
+        return 0
+    if len(argv) >= 3 and argv[0] == 'mount':
+        write_layout(argv[1], {'folders': [os.path.abspath(folder) for folder in argv[2:]]})
+        print(f'{argv[1]} now opens {len(argv) - 2} folder(s) as one notebook')
+        return 0
+    print('usage: python sharded_notebook.py migrate <notes folder> [root] [shards]')
+    print('       python sharded_notebook.py mount <root> <folder> [folder ...]')
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
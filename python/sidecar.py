@@ -0,0 +1,197 @@
+import os # file paths, stat and os.replace for swapping in a new snapshot
+import json # sidecar snapshots and journal lines are stored as JSON
+
+try:
+    import fcntl #advisory file locks (POSIX only)
+except ImportError: #Windows has no fcntl, so we just skip the locking there
+    fcntl = None
+
+from perf import timed
+
+
+# A sidecar index lives next to the notes as two hidden files:
+#   <snapshot>  one JSON document with the whole index
+#   <journal>   one JSON line per change made since the snapshot was written
+# Note.save and Notebook.delete_note only append a small line to the journal, so keeping
+# the index up to date costs the same whether the folder has 10 notes or 100,000.
+# Whoever has the index loaded folds the journal back into the snapshot once it grows too long.
+
+class JournaledIndex():
+    SNAPSHOT = None #filename of the snapshot, set by the subclass
+    JOURNAL = None #filename of the journal, set by the subclass
+    VERSION = 1 #bump in the subclass when the snapshot layout changes, old snapshots are then rebuilt
+    COMPACT_AFTER = 1000 #journal lines we replay before writing a fresh snapshot
+
+    def __init__(self, notes_folder):#constructor
+        self.notes_folder = notes_folder
+        self.snapshot_path = os.path.join(notes_folder, self.SNAPSHOT)
+        self.journal_path = os.path.join(notes_folder, self.JOURNAL)
+        self._snapshot_stamp = None #(inode, mtime, size) of the snapshot we loaded, tells us when another process compacted
+        self._journal_offset = 0 #how far into the journal we have already replayed
+        self._journal_lines = 0
+        self.reset()
+
+    # --- hooks for the subclass ---
+
+    def reset(self):#empty the in-memory index
+        raise NotImplementedError
+
+    def to_data(self):#in-memory index -> JSON-able snapshot
+        raise NotImplementedError
+
+    def from_data(self, data):#JSON snapshot -> in-memory index
+        raise NotImplementedError
+
+    def add(self, filename, entry):#apply one extracted note to the in-memory index (replacing any older entry)
+        raise NotImplementedError
+
+    def remove(self, filename):#drop a note from the in-memory index
+        raise NotImplementedError
+
+    @classmethod
+    def extract(cls, note):#Note -> the JSON-able entry that add() understands
+        raise NotImplementedError
+
+    # --- loading and saving ---
+
+    @classmethod
+    def exists(cls, notes_folder):
+        return os.path.exists(os.path.join(notes_folder, cls.SNAPSHOT))
+
+    def _stamp(self):
+        try:
+            st = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    @timed('index load')
+    def load(self):#read the snapshot and replay the journal, returns False when there is no usable snapshot
+        self.reset()
+        self._journal_offset = 0
+        self._journal_lines = 0
+        stamp = self._stamp()
+        if stamp is None:
+            return False
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except ValueError: #half written or corrupted snapshot, caller rebuilds it
+            return False
+        if data.get('version') != self.VERSION:
+            return False
+        self.from_data(data)
+        self._snapshot_stamp = stamp
+        self._replay()
+        return True
+
+    def refresh(self):#pick up changes other writers made since we loaded
+        if self._stamp() != self._snapshot_stamp:#someone wrote a new snapshot, start over from it
+            return self.load()
+        self._replay()
+        if self._journal_lines >= self.COMPACT_AFTER:
+            self.save()
+        return True
+
+    def _replay(self):#apply the journal lines we have not seen yet
+        try:
+            with open(self.journal_path, 'rb') as f:
+                f.seek(self._journal_offset)
+                for line in f:
+                    if not line.endswith(b'\n'):#a writer is still busy with this line, pick it up next time
+                        break
+                    self._journal_offset += len(line)
+                    self._journal_lines += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record['op'] == 'add':
+                        self.add(record['file'], record['entry'])
+                    elif record['op'] == 'remove':
+                        self.remove(record['file'])
+        except FileNotFoundError:
+            pass
+
+    def save(self):#write the whole index as a new snapshot and empty the journal
+        temp_path = self.snapshot_path + '.tmp'
+        with locked(self.journal_path):#hold off appenders so no journal line is lost between replay and truncate
+            self._replay()
+            data = self.to_data()
+            data['version'] = self.VERSION
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(temp_path, self.snapshot_path)#readers see either the old snapshot or the new one, never half of one
+            with open(self.journal_path, 'w'):
+                pass
+        self._snapshot_stamp = self._stamp()
+        self._journal_offset = 0
+        self._journal_lines = 0
+
+    def rebuild(self, notes):#notes = iterable of (filename, Note)
+        self.reset()
+        for filename, note in notes:
+            self.add(filename, self.extract(note))
+        self.save()
+
+    # --- incremental updates from Note.save / Notebook.delete_note ---
+
+    @classmethod
+    def record_save(cls, notes_folder, filename, note):
+        cls._append(notes_folder, {'op': 'add', 'file': filename, 'entry': cls.extract(note)})
+
+    @classmethod
+    def record_delete(cls, notes_folder, filename):
+        cls._append(notes_folder, {'op': 'remove', 'file': filename})
+
+    @classmethod
+    def record_saves(cls, notes_folder, saved):#saved = [(filename, Note)], one journal write for a whole batch
+        cls._append(notes_folder, *({'op': 'add', 'file': filename, 'entry': cls.extract(note)} for filename, note in saved))
+
+    @classmethod
+    def _append(cls, notes_folder, *records):
+        if not cls.exists(notes_folder):#nothing built yet, the first search builds it from the files anyway
+            return
+        lines = ''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in records)
+        journal_path = os.path.join(notes_folder, cls.JOURNAL)
+        with locked(journal_path):
+            with open(journal_path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+
+
+class locked():#exclusive advisory lock on path + '.lock' (a sidecar file, a note), a no-op where fcntl is missing
+    # remove=True deletes the lock file again on release, for locks per note that would otherwise pile up
+    # next to the notes. Whoever was waiting then holds a lock on a deleted file, so after getting the lock
+    # we check that path + '.lock' is still the file we locked, and start over if it isn't.
+    def __init__(self, path, remove=False):
+        self.path = path + '.lock'
+        self.remove = remove
+        self.file = None
+
+    def __enter__(self):
+        while fcntl is not None:
+            self.file = open(self.path, 'a')
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+            if not self.remove or self._still_there():
+                break
+            self.file.close()
+        return self
+
+    def _still_there(self):
+        try:
+            on_disk = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        mine = os.fstat(self.file.fileno())
+        return (on_disk.st_dev, on_disk.st_ino) == (mine.st_dev, mine.st_ino)
+
+    def __exit__(self, *exc):
+        if self.file is not None:
+            if self.remove:#still holding the lock, so nobody else has it yet
+                try:
+                    os.remove(self.path)
+                except FileNotFoundError:
+                    pass
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+        return False
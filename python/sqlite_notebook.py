@@ -0,0 +1,394 @@
+import os
+import sys
+import json # tags are kept as a JSON list so they come back exactly as they were saved
+import sqlite3 # the database, part of the Python standard library
+import tempfile # edit_note hands the editor a temporary .note file
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+from notes import Note, Notebook, ConflictError, pack_time, intern_tags
+from perf import timed
+from search_index import parse_query, tokenize, snippet, FIELD_BOOSTS, SNIPPET_WORDS, HIGHLIGHT
+from fuzzy import TrigramIndex
+from tag_index import TagIndex, normalize_tag
+
+
+# A Notebook that keeps its notes in one SQLite database instead of a folder of .note files.
+# It has the same methods as Notebook, so Application (and everything else) works with either one.
+# Searching, tag counts and stats are single SQL queries: the FTS5 full-text index covers
+# title, tags and content, and the note_tags table has an index on the case-folded tag (tag_index.normalize_tag,
+# like the folder's tag index; COLLATE NOCASE would only fold ASCII, so Straße and STRASSE would be two tags).
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL UNIQUE,
+    title TEXT,
+    created TEXT,
+    modified TEXT,
+    tags TEXT NOT NULL DEFAULT '[]',
+    tags_text TEXT NOT NULL DEFAULT '',
+    author TEXT,
+    status TEXT,
+    priority,
+    content TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS note_tags (
+    note_id INTEGER NOT NULL REFERENCES notes(id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    folded TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS note_tags_folded ON note_tags(folded);
+CREATE INDEX IF NOT EXISTS note_tags_note ON note_tags(note_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+    title, tags_text, content,
+    content='notes', content_rowid='id',
+    tokenize="unicode61 remove_diacritics 0 tokenchars '_'"
+);
+CREATE TRIGGER IF NOT EXISTS notes_ai AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_fts(rowid, title, tags_text, content) VALUES (new.id, new.title, new.tags_text, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_ad AFTER DELETE ON notes BEGIN
+    INSERT INTO notes_fts(notes_fts, rowid, title, tags_text, content) VALUES ('delete', old.id, old.title, old.tags_text, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_au AFTER UPDATE ON notes BEGIN
+    INSERT INTO notes_fts(notes_fts, rowid, title, tags_text, content) VALUES ('delete', old.id, old.title, old.tags_text, old.content);
+    INSERT INTO notes_fts(rowid, title, tags_text, content) VALUES (new.id, new.title, new.tags_text, new.content);
+END;
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts_words USING fts5vocab(notes_fts, 'row');
+'''
+
+COLUMNS = 'file, title, created, modified, tags, author, status, priority, content'
+SORT_COLUMNS = { #list_titles(sort_by=...) -> ORDER BY terms, the same order as the folder notebook's header table
+    'title': ['lower(COALESCE(title, file))'],
+    'file': ['file'],
+    'created': ['created'],
+    'modified': ['modified'],
+    'priority': ["CASE WHEN priority IS NULL THEN 2 WHEN typeof(priority) IN ('integer', 'real') THEN 0 ELSE 1 END", 'priority'],
+}
+
+
+def fts_query(query, fuzzy=False, similar=None):#our search syntax (see search_index.parse_query) -> FTS5 MATCH syntax
+    # similar(word) -> {word: typos} replaces fuzzy words with the indexed words they stand for
+    groups = []
+    for group in parse_query(query, fuzzy):
+        clauses = []
+        for kind, value in group:
+            if kind == 'prefix':
+                clauses.append(f'"{value}"*')
+            elif kind == 'phrase':
+                clauses.append('"' + ' '.join(value) + '"')
+            elif kind == 'fuzzy':
+                words = similar(value) if similar is not None else None
+                clauses.append('(' + ' OR '.join(f'"{word}"' for word in sorted(words)) + ')' if words else f'"{value}"')
+            else:
+                clauses.append(f'"{value}"')
+        groups.append('(' + ' AND '.join(clauses) + ')')
+    return ' OR '.join(groups)
+
+
+def _text(value):#unquoted YAML dates come back as datetime, the database stores text
+    return value if value is None or isinstance(value, (str, int)) else str(value)
+
+
+class SQLiteNotebook(Notebook):
+    keeps_history = False #history.py keeps versions next to note files, the database has no history table
+    encrypts_notes = False #save_note() refuses encrypted notes with a ValueError
+
+    def __init__(self, db_path):#constructor
+        super().__init__(db_path)#notes_folder is the database file, so folder-only methods fail loudly instead of using the wrong folder
+        self.db_path = db_path
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')#readers don't wait for the writer
+        self.db.execute('PRAGMA synchronous=NORMAL')#WAL stays crash-safe with fewer fsyncs
+        self.db.execute('PRAGMA foreign_keys=ON')
+        self.db.execute('DROP INDEX IF EXISTS note_tags_tag')#databases made before tags were case folded
+        columns = [row[1] for row in self.db.execute('PRAGMA table_info(note_tags)')]
+        if columns and 'folded' not in columns:
+            with self.db:
+                self.db.execute("ALTER TABLE note_tags ADD COLUMN folded TEXT NOT NULL DEFAULT ''")
+                self.db.executemany('UPDATE note_tags SET folded = ? WHERE rowid = ?',
+                                    [(normalize_tag(tag), rowid) for rowid, tag in self.db.execute('SELECT rowid, tag FROM note_tags').fetchall()])
+                self.db.execute('DELETE FROM note_tags WHERE rowid NOT IN (SELECT MIN(rowid) FROM note_tags GROUP BY note_id, folded)')#the first spelling per note
+        self.db.executescript(SCHEMA)
+        self._in_batch = False
+        self._trigrams = None #TrigramIndex of the FTS vocabulary, for fuzzy search
+        self._trigrams_stamp = None #(our changes, other connections' changes) it was made at
+        self._fuzzy = {}
+
+    def close(self):
+        self.db.close()
+
+    @contextmanager
+    def batch(self):#with notebook.batch(): ... saves many notes in a single transaction
+        if self._in_batch:#already inside one, the outer batch commits
+            yield self
+            return
+        self._in_batch = True
+        try:
+            yield self
+            self.db.commit()
+        except BaseException:
+            self.db.rollback()
+            raise
+        finally:
+            self._in_batch = False
+
+    def _commit(self):
+        if not self._in_batch:
+            self.db.commit()
+
+    @timed('list_notes')
+    def list_notes(self, sort_by=None, offset=0, limit=None, reverse=False, **filters):
+        if sort_by or offset or limit is not None or filters:
+            return [file for file, title in self.list_titles(sort_by or 'file', offset, limit, reverse, **filters)]
+        return [file for (file,) in self.db.execute('SELECT file FROM notes ORDER BY file')]
+
+    def get_note(self, filename):
+        row = self.db.execute(f'SELECT {COLUMNS} FROM notes WHERE file = ?', (filename,)).fetchone()
+        if row is None:#same error the folder notebook gives for a missing file
+            raise FileNotFoundError(filename)
+        return self._note(row)
+
+    def _note(self, row):
+        file, title, created, modified, tags, author, status, priority, content = row
+        note = Note(title, content, intern_tags(json.loads(tags)), author, status, priority)
+        note.created = created
+        note.modified = modified
+        note._disk_modified = note._modified
+        return note
+
+    def iter_notes(self, files=None, header_only=False, workers=None, processes=None):#same as Notebook.iter_notes, the pool options don't apply here
+        if files is None:
+            rows = self.db.execute(f'SELECT {COLUMNS} FROM notes ORDER BY file')
+        else:
+            rows = (self.db.execute(f'SELECT {COLUMNS} FROM notes WHERE file = ?', (file,)).fetchone() for file in files)
+        for row in rows:
+            if row is not None:
+                yield row[0], self._note(row)
+
+    def save_note(self, note, filename, touch=True, check=False):
+        if note.encryption:#the columns hold plain text for FTS, a sealed body would be indexed as gibberish
+            raise ValueError(f'{filename}.note is encrypted, encrypted notes need a folder notebook (not {self.db_path})')
+        if check:#same optimistic check as Note.save(check=True), the transaction keeps other writers out
+            row = self.db.execute('SELECT modified FROM notes WHERE file = ?', (f'{filename}.note',)).fetchone()
+            if (pack_time(row[0]) if row else None) != note._disk_modified:
+                raise ConflictError(f'{filename}.note was changed since it was loaded')
+        if touch:
+            note.modified = datetime.now().isoformat() + 'Z'
+        file = f'{filename}.note'
+        tags = [str(tag) for tag in note.tags]
+        values = (file, note.title, _text(note.created), _text(note.modified), json.dumps(note.tags, default=str),
+                  ' '.join(tags), note.author, note.status, _text(note.priority), note.content or '')
+        note_id = self.db.execute('''
+            INSERT INTO notes (file, title, created, modified, tags, tags_text, author, status, priority, content) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(file) DO UPDATE SET title = excluded.title, created = excluded.created, modified = excluded.modified,
+                tags = excluded.tags, tags_text = excluded.tags_text, author = excluded.author, status = excluded.status,
+                priority = excluded.priority, content = excluded.content
+            RETURNING id''', values).fetchone()[0]
+        self.db.execute('DELETE FROM note_tags WHERE note_id = ?', (note_id,))
+        self.db.executemany('INSERT INTO note_tags (note_id, tag, folded) VALUES (?, ?, ?)',
+                            [(note_id, tag, normalize_tag(tag)) for tag in TagIndex.extract(note)])#one row per tag ignoring case, like the tag index
+        self._commit()
+        note._disk_modified = note._modified
+
+    def save_many(self, notes, touch=True):#one transaction for the whole batch
+        count = 0
+        with self.batch():
+            for note, filename in notes:
+                self.save_note(note, filename, touch)
+                count += 1
+        return count
+
+    def delete_note(self, filename):
+        file = f'{filename}.note'
+        deleted = self.db.execute('DELETE FROM notes WHERE file = ?', (file,)).rowcount
+        self._commit()
+        if not deleted:
+            raise FileNotFoundError(file)
+
+    def edit_note(self, file, editor):#the editor works on a temporary .note file that is read back afterwards
+        note = self.get_note(file)
+        with tempfile.NamedTemporaryFile('w', suffix='.note', delete=False, encoding='utf-8') as temp_file:
+            temp_file.write(note.to_text())
+            temp_path = temp_file.name
+        try:
+            editor(temp_path)
+            edited = Note.load_note(temp_path)
+        finally:
+            os.remove(temp_path)
+        self.save_note(edited, file[:-len('.note')])
+
+    def refresh_note(self, file):#nothing is cached outside the database
+        pass
+
+    def watch(self, interval=None):#every query goes to the database, there is nothing to keep up to date
+        return None
+
+    def similar(self, word):#{indexed word: typos} for fuzzy queries, see fuzzy.py
+        stamp = (self.db.total_changes, self.db.execute('PRAGMA data_version').fetchone()[0])
+        if stamp != self._trigrams_stamp:#the vocabulary may have changed, read it again
+            self._trigrams = TrigramIndex(term for (term,) in self.db.execute('SELECT term FROM notes_fts_words'))
+            self._trigrams_stamp = stamp
+            self._fuzzy = {}
+        found = self._fuzzy.get(word)
+        if found is None:
+            found = self._fuzzy[word] = self._trigrams.similar(word)
+        return found
+
+    def _groups(self, query, fuzzy):#parse_query with the fuzzy words looked up, for snippets
+        return [[('words', self.similar(value)) if kind == 'fuzzy' else (kind, value) for kind, value in group]
+                for group in parse_query(query, fuzzy)]
+
+    def snippet(self, file, query, fuzzy=False):
+        try:
+            note = self.get_note(file)
+        except FileNotFoundError:
+            return ''
+        return snippet(note.content or note.title or '', self._groups(query, fuzzy))
+
+    def complete_titles(self, text, limit=10):#same order as Notebook.complete_titles
+        prefix = text.lstrip().lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        results = self.db.execute('''
+            SELECT file, COALESCE(title, file) FROM notes WHERE lower(COALESCE(title, file)) LIKE ? ESCAPE '\\'
+            ORDER BY lower(COALESCE(title, file)), file LIMIT ?''', (prefix + '%', limit)).fetchall()
+        tokens = tokenize(text)
+        if len(results) < limit and tokens:
+            *words, last = tokens
+            found = self._title_query(words + [last], True, limit)
+            if not found:#a typo in the word being typed
+                for word in sorted(self.similar(last)):
+                    found += self._title_query(words + [word], False, limit)
+            seen = {file for file, _ in results}
+            for file, title in found:
+                if file not in seen and len(results) < limit:
+                    seen.add(file)
+                    results.append((file, title))
+        return results
+
+    def _title_query(self, words, prefix, limit):#[(file, title)] whose title has words next to each other, the last one maybe as a prefix
+        match = 'title : "' + ' '.join(words) + ('"*' if prefix else '"')
+        return self.db.execute('''
+            SELECT notes.file, COALESCE(notes.title, notes.file) FROM notes_fts JOIN notes ON notes.id = notes_fts.rowid
+            WHERE notes_fts MATCH ? ORDER BY lower(COALESCE(notes.title, notes.file)), notes.file LIMIT ?''',
+            (match, limit)).fetchall()
+
+    @timed('search_notes')
+    def search_notes(self, query, fuzzy=False):
+        match = fts_query(query, fuzzy, self.similar)
+        if not match:
+            return []
+        rows = self.db.execute('''
+            SELECT notes.file FROM notes_fts JOIN notes ON notes.id = notes_fts.rowid
+            WHERE notes_fts MATCH ? ORDER BY notes.file''', (match,))
+        return [file for (file,) in rows]
+
+    def search_ranked(self, query, limit=10, snippets=True, fuzzy=False):#FTS5's bm25() with the same field boosts as the folder index
+        match = fts_query(query, fuzzy, self.similar)
+        if not match:
+            return []
+        rank = 'bm25(notes_fts, {}, {}, {})'.format(*FIELD_BOOSTS)
+        snippet = f", snippet(notes_fts, -1, ?, ?, '...', {SNIPPET_WORDS})" if snippets else ''
+        sql = f'''
+            SELECT notes.file, -{rank}{snippet} FROM notes_fts JOIN notes ON notes.id = notes_fts.rowid
+            WHERE notes_fts MATCH ? ORDER BY {rank}, notes.file'''
+        params = (list(HIGHLIGHT) if snippets else []) + [match]
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        results = []
+        for row in self.db.execute(sql, params):
+            result = {'file': row[0], 'score': round(row[1], 4)}
+            if snippets:
+                result['snippet'] = ' '.join(row[2].split())
+            results.append(result)
+        return results
+
+    def rebuild_index(self):#rebuilds the FTS index from the notes table
+        self.db.execute("INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')")
+        self.db.commit()
+
+    def note_headers(self):
+        rows = self.db.execute('SELECT file, title, tags, author, status, priority, created, modified FROM notes ORDER BY file')
+        return [{'file': file, 'title': title, 'tags': json.loads(tags), 'author': author, 'status': status,
+                 'priority': priority, 'created': created, 'modified': modified}
+                for file, title, tags, author, status, priority, created, modified in rows]
+
+    def note_stamps(self):#every save sets modified, nothing changes a note behind the database's back
+        return dict(self.db.execute('SELECT file, modified FROM notes'))
+
+    def list_titles(self, sort_by='title', offset=0, limit=None, reverse=False, **filters):#one page, sorted and filtered by SQLite
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"can't sort by {sort_by!r}")
+        where, params = [], []
+        for name, value in filters.items():
+            if name in ('tag', 'tags'):
+                for tag in [value] if isinstance(value, str) else value:
+                    where.append('id IN (SELECT note_id FROM note_tags WHERE folded = ?)')
+                    params.append(normalize_tag(tag))
+            elif name in ('author', 'status', 'priority'):
+                where.append(f'CAST({name} AS TEXT) = ?')
+                params.append(str(value))
+            else:
+                raise ValueError(f"can't filter notes by {name!r}")
+        order = ', '.join([term + (' DESC' if reverse else '') for term in SORT_COLUMNS[sort_by]] + ['file'])#ties in filename order
+        sql = f"SELECT file, COALESCE(title, file) FROM notes {'WHERE ' + ' AND '.join(where) if where else ''} ORDER BY {order} LIMIT ? OFFSET ?"
+        rows = self.db.execute(sql, params + [-1 if limit is None else limit, offset])
+        return [(file, title) for file, title in rows]
+
+    @timed('get_stats')
+    def get_stats(self):
+        total_notes, = self.db.execute('SELECT COUNT(*) FROM notes').fetchone()
+        total_tags, = self.db.execute("SELECT COUNT(DISTINCT folded) FROM note_tags WHERE folded != ''").fetchone()
+        return {
+            'total_notes': total_notes,
+            'total_tags': total_tags,#tags that only differ in case count once, blank tags not at all
+            'all_tags': [tag for (tags,) in self.db.execute('SELECT tags FROM notes') for tag in json.loads(tags)]
+        }
+
+    def tag_counts(self):#tags that differ only in case count as one, like the folder notebook's tag index
+        return Counter(dict(self.db.execute("SELECT MIN(tag), COUNT(DISTINCT note_id) FROM note_tags WHERE folded != '' GROUP BY folded")))
+
+    def rebuild_tag_index(self):#note_tags is kept up to date by save_note, nothing to rebuild
+        pass
+
+    def notes_with_tag(self, tag):
+        return self.notes_with_tags([tag])
+
+    def notes_with_tags(self, tags, match='all'):
+        tags = sorted({normalize_tag(tag) for tag in tags} - {''})#'Python' and 'python' are one tag
+        if not tags:
+            return []
+        marks = ', '.join('?' * len(tags))
+        having = f'HAVING COUNT(DISTINCT note_tags.folded) = {len(tags)}' if match == 'all' else ''
+        rows = self.db.execute(f'''
+            SELECT notes.file FROM note_tags JOIN notes ON notes.id = note_tags.note_id
+            WHERE note_tags.folded IN ({marks}) GROUP BY notes.id {having} ORDER BY notes.file''', tags)
+        return [file for (file,) in rows]
+
+    def top_tags(self, n=10):
+        return self.tag_counts().most_common(n)
+
+
+def copy_notes(source, target):#copies every note from one notebook into another, keeping the timestamps
+    return target.save_many(((note, file[:-len('.note')]) for file, note in source.iter_notes()), touch=False)
+
+
+def main(argv):#python sqlite_notebook.py import <notes folder> <database>  |  export <database> <notes folder>
+    if len(argv) != 3 or argv[0] not in ('import', 'export'):
+        print('usage: python sqlite_notebook.py import <notes folder> <database>')
+        print('       python sqlite_notebook.py export <database> <notes folder>')
+        return 2
+    if argv[0] == 'import':
+        source, target = Notebook(argv[1]), SQLiteNotebook(argv[2])
+    else:
+        os.makedirs(argv[2], exist_ok=True)
+        source, target = SQLiteNotebook(argv[1]), Notebook(argv[2])
+    count = copy_notes(source, target)
+    print(f'Copied {count} note(s) from {argv[1]} to {argv[2]}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,122 @@
+from sidecar import JournaledIndex
+
+
+def normalize_tag(tag):#' Python ' -> 'python', so tags match whatever their case
+    return str(tag).strip().casefold()
+
+
+class TagIndex(JournaledIndex):
+    # Tag -> set of note files, kept next to the notes like the search index.
+    # Tags are stored case-folded, the spelling we show is the one that sorts first ('Python' before 'python'),
+    # so it doesn't depend on the order the notes were loaded in. Every spelling in use is counted, so when the
+    # last note with the shown spelling goes, the next one still in use is shown instead.
+    # The snapshot only lists a note's spelling where it isn't the shown one, most notes spell a tag the same way.
+    # Looking up a tag is one dictionary lookup, counting its notes is len() of the set.
+    SNAPSHOT = '.tag-index.json'
+    JOURNAL = '.tag-index.log'
+    VERSION = 2 #2: spellings per note
+
+    def reset(self):
+        self.files = {} #normalized tag -> set of note files
+        self.names = {} #normalized tag -> spelling shown to the user
+        self.spellings = {} #normalized tag -> {spelling: number of notes that spell it so}
+        self.doc_tags = {} #file -> that note's tags as spelled there, so remove() knows where to look
+
+    def to_data(self):
+        others = {} #normalized tag -> {file: spelling} for notes that don't use the shown spelling
+        for file, names in self.doc_tags.items():
+            for name in names:
+                tag = normalize_tag(name)
+                if name != self.names[tag]:
+                    others.setdefault(tag, {})[file] = name
+        return {'names': self.names, 'tags': {tag: sorted(files) for tag, files in self.files.items()}, 'spellings': others}
+
+    def from_data(self, data):
+        self.names = data['names']
+        others = data['spellings']
+        for tag, files in data['tags'].items():
+            self.files[tag] = set(files)
+            spelled = others.get(tag, {})
+            counts = self.spellings[tag] = {}
+            for file in files:
+                name = spelled.get(file, self.names[tag])
+                counts[name] = counts.get(name, 0) + 1
+                self.doc_tags.setdefault(file, []).append(name)
+
+    @classmethod
+    def extract(cls, note):#the note's tags without blanks and without repeats (ignoring case)
+        tags = {}
+        if getattr(note, 'encryption', None) == 'note':#the real tags are encrypted
+            return []
+        for tag in note.tags or []:
+            name = str(tag).strip()
+            if name:
+                tags.setdefault(normalize_tag(name), name)
+        return list(tags.values())
+
+    def add(self, filename, entry):
+        self.remove(filename)
+        for name in entry:
+            tag = normalize_tag(name)
+            if tag not in self.names or name < self.names[tag]:
+                self.names[tag] = name
+            counts = self.spellings.setdefault(tag, {})
+            counts[name] = counts.get(name, 0) + 1
+            self.files.setdefault(tag, set()).add(filename)
+        self.doc_tags[filename] = list(entry)
+
+    def remove(self, filename):
+        for name in self.doc_tags.pop(filename, []):
+            tag = normalize_tag(name)
+            files = self.files.get(tag)
+            if files is None:
+                continue
+            files.discard(filename)
+            if not files:
+                del self.files[tag]
+                self.names.pop(tag, None)
+                self.spellings.pop(tag, None)
+                continue
+            counts = self.spellings[tag]
+            counts[name] = counts.get(name, 0) - 1
+            if counts[name] <= 0:
+                del counts[name]
+                if self.names.get(tag) == name and counts:#nobody spells it so any more
+                    self.names[tag] = min(counts)
+
+    # --- queries ---
+
+    def notes(self, tag):#set of files with this tag, don't change it
+        return self.files.get(normalize_tag(tag), set())
+
+    def matching(self, tags, match='all'):#files with every tag ('all') or with at least one of them ('any')
+        sets = [self.notes(tag) for tag in tags]
+        if not sets:
+            return set()
+        if match == 'any':
+            return set().union(*sets)
+        sets.sort(key=len)#start from the rarest tag, the intersection only gets smaller
+        files = set(sets[0])
+        for other in sets[1:]:
+            files &= other
+            if not files:
+                break
+        return files
+
+    def counts(self):#Counter of tag -> number of notes
+        from collections import Counter
+        return Counter({self.names[tag]: len(files) for tag, files in self.files.items()})
+
+    def top(self, n=10):#[(tag, count)] for the n most used tags
+        import heapq
+        best = heapq.nlargest(n, self.files.items(), key=lambda item: len(item[1]))
+        return [(self.names[tag], len(files)) for tag, files in best]
+
+
+if __name__ == '__main__':#python tag_index.py [notes folder] -> rebuilds the tag index from the note files
+    import sys
+    import Configurator
+    from notes import Notebook
+    folder = sys.argv[1] if len(sys.argv) > 1 else Configurator.get('ROOT_FOLDER')
+    index = Notebook(folder).rebuild_tag_index()
+    print(f"Indexed {len(index.doc_tags)} note(s), {len(index.files)} distinct tags in {folder}")
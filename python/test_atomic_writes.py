@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+import notes
+from notes import Note, Notebook, ConflictError
+
+
+def test_save_replaces_the_file_in_one_step(tmp_path, monkeypatch):
+    notebook = Notebook(str(tmp_path))
+    notebook.save_note(Note('First', 'old body'), 'a')
+
+    def crash(source, target):
+        raise OSError('disk full')
+    monkeypatch.setattr(notes.os, 'replace', crash)
+    with pytest.raises(OSError):
+        notebook.save_note(Note('Second', 'new body'), 'a')
+    monkeypatch.undo()
+    assert notebook.get_note('a.note').content == 'old body'
+    assert sorted(os.listdir(tmp_path)) == ['.history', 'a.note']#the temporary file was cleaned up
+
+def test_check_refuses_to_overwrite_newer_changes(tmp_path):
+    notebook = Notebook(str(tmp_path))
+    notebook.save_note(Note('Shared', 'v1'), 'shared')
+    mine = notebook.get_note('shared.note')
+    theirs = notebook.get_note('shared.note')
+    theirs.content = 'their edit'
+    notebook.save_note(theirs, 'shared', check=True)
+
+    mine.content = 'my edit'
+    with pytest.raises(ConflictError):
+        notebook.save_note(mine, 'shared', check=True)
+    assert notebook.get_note('shared.note').content == 'their edit'
+
+    mine = notebook.get_note('shared.note')#reload, then it goes through
+    mine.content = 'my edit'
+    notebook.save_note(mine, 'shared', check=True)
+    notebook.save_note(mine, 'shared', check=True)#our own last save doesn't count as a conflict
+    with pytest.raises(ConflictError):#a new note must not replace an existing file
+        notebook.save_note(Note('Other', 'x'), 'shared', check=True)
+
+def test_locks_per_note_leave_no_files_behind(tmp_path):
+    notebook = Notebook(str(tmp_path))
+    for i in range(3):
+        note = Note(f'Note {i}', 'body')
+        notebook.save_note(note, f'n{i}', check=True)
+        note.content = 'changed'
+        notebook.save_note(note, f'n{i}', check=True)
+    notebook.restore('n0.note', 1)
+    assert not [name for name in os.listdir(tmp_path) + os.listdir(tmp_path / '.history') if name.endswith('.lock')]
+
+def test_removed_lock_files_still_keep_writers_apart(tmp_path):
+    import threading
+    from sidecar import locked
+    counter = tmp_path / 'counter'
+    counter.write_text('0')
+    def add():
+        for _ in range(50):
+            with locked(str(counter), remove=True):#read, then write: two writers at once would lose counts
+                value = int(counter.read_text())
+                counter.write_text(str(value + 1))
+    threads = [threading.Thread(target=add) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.read_text() == '400'
+    assert not os.path.exists(str(counter) + '.lock')
+
+def test_save_many_syncs_the_folder_once_per_batch(tmp_path, monkeypatch):
+    notebook = Notebook(str(tmp_path))
+    assert notebook.search_notes('anything') == []#builds the (empty) index
+    syncs = []
+    monkeypatch.setattr(notes, 'sync_folder', syncs.append)
+    monkeypatch.setattr(notes, 'SAVE_BATCH', 20)
+    count = notebook.save_many((Note(f'Note {i}', f'word{i} shared'), f'n{i}') for i in range(50))
+    assert count == 50
+    assert len(syncs) == 3
+    assert len(notebook.list_notes()) == 50
+    assert notebook.search_notes('word42') == ['n42.note']
+    assert len(notebook.search_notes('shared')) == 50
@@ -0,0 +1,55 @@
+import os
+
+from catalog import Catalog
+from notes import Note, Notebook
+
+
+def test_get_stats_uses_catalog(tmp_path):
+    folder = str(tmp_path)
+    Note('One', 'first', ['a', 'b'], author='Ann', priority=2).save('one', folder)
+    Note('Two', 'second', ['b']).save('two', folder)
+    stats = Notebook(folder).get_stats()
+    assert stats['total_notes'] == 2
+    assert stats['total_tags'] == 2
+    assert sorted(stats['all_tags']) == ['a', 'b', 'b']
+
+    catalog = Catalog(folder)
+    catalog.load()#cold start: the sidecar already has everything
+    assert catalog.entries['one.note']['author'] == 'Ann'
+    assert catalog.entries['one.note']['priority'] == 2
+    assert catalog.entries['two.note']['title'] == 'Two'
+
+def test_catalog_only_rereads_changed_notes(tmp_path):
+    folder = str(tmp_path)
+    Note('One', 'first', ['a']).save('one', folder)
+    Note('Two', 'second', ['b']).save('two', folder)
+    notebook = Notebook(folder)
+    notebook.get_stats()
+
+    loaded = []
+    def load_notes(files):
+        loaded.extend(files)
+        return notebook.iter_notes(files, header_only=True)
+
+    Note('Two again', 'changed body', ['c']).save('two', folder)
+    os.remove(os.path.join(folder, 'one.note'))
+    catalog = notebook.catalog()
+    catalog.refresh(load_notes)
+    assert loaded == []#notebook.catalog() already picked the changes up
+    assert list(catalog.entries) == ['two.note']
+    assert catalog.entries['two.note']['tags'] == ['c']
+
+    assert not Catalog(folder).refresh(load_notes)#nothing changed since the last save
+    assert loaded == []
+
+def test_broken_notes_are_counted_without_tags(tmp_path):
+    (tmp_path / 'broken.note').write_text('no header here')
+    stats = Notebook(str(tmp_path)).get_stats()
+    assert stats['total_notes'] == 1
+    assert stats['all_tags'] == []
+
+def test_list_titles_sorted_by_title(tmp_path):
+    folder = str(tmp_path)
+    Note('zebra', '', []).save('a', folder)
+    Note('Apple', '', []).save('b', folder)
+    assert Notebook(folder).list_titles() == [('b.note', 'Apple'), ('a.note', 'zebra')]
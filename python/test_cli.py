@@ -0,0 +1,90 @@
+import io
+import json
+
+from cli import main, run_batch
+from notes import Notebook
+
+
+def run(capsys, *argv):
+    code = main(list(argv))
+    return code, capsys.readouterr().out
+
+def test_create_show_list_search(tmp_path, capsys):
+    folder = str(tmp_path)
+    assert run(capsys, '--folder', folder, 'create', 'ideas', '--title', 'Ideas', '--content', 'build a rocket', '--tags', 'space, fun')[0] == 0
+    code, out = run(capsys, '--folder', folder, '--json', 'show', 'ideas')
+    note = json.loads(out)
+    assert note['metadata']['tags'] == ['space', 'fun']
+    assert note['content'] == 'build a rocket'
+
+    code, out = run(capsys, '--folder', folder, '--ndjson', 'list', '--tag', 'fun')
+    assert [json.loads(line)['id'] for line in out.splitlines()] == ['ideas']
+    code, out = run(capsys, '--folder', folder, 'search', 'rocket')
+    assert out.split() == ['ideas']
+    code, out = run(capsys, '--folder', folder, 'search', 'rokcet', '--fuzzy')
+    assert out.split() == ['ideas']
+
+def test_edit_delete_and_errors(tmp_path, capsys):
+    folder = str(tmp_path)
+    run(capsys, '--folder', folder, 'create', 'a', '--title', 'A')
+    run(capsys, '--folder', folder, 'edit', 'a', '--status', 'done')
+    assert Notebook(folder).get_note('a.note').status == 'done'
+    assert run(capsys, '--folder', folder, 'delete', 'a')[0] == 0
+    assert run(capsys, '--folder', folder, 'show', 'a')[0] == 1
+    code, out = run(capsys, '--folder', folder, 'history', 'a')
+    assert [line.split('\t')[2] for line in out.splitlines()] == ['snapshot', 'delta', 'deleted']
+    assert run(capsys, '--folder', folder, 'restore', 'a', '3')[0] == 1
+    assert run(capsys, '--folder', folder, 'restore', 'a', '1')[0] == 0
+    assert Notebook(folder).get_note('a.note').status is None
+
+def test_batch_runs_many_commands_in_one_notebook(tmp_path):
+    notebook = Notebook(str(tmp_path))
+    lines = [f'{{"op": "create", "id": "n{i}", "title": "Note {i}", "tags": ["bulk"]}}' for i in range(50)]
+    lines += ['create shell-style --title "From a shell line" --tags x,y', 'show missing', 'bogus', 'tags']
+    out = io.StringIO()
+    assert run_batch(notebook, lines, out) == 1#two of the lines fail
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert len(results) == 54
+    assert all(result['ok'] for result in results[:51])
+    assert results[51]['ok'] is False and results[52]['ok'] is False
+    assert results[53]['result'] == {'bulk': 50, 'x': 1, 'y': 1}
+
+def test_duplicates_command(tmp_path, capsys):
+    folder = str(tmp_path)
+    text = 'the quick brown fox jumps over the lazy dog while the cat sleeps on the warm mat by the door'
+    for name, content in [('a', text), ('b', text), ('c', text + ' today'), ('d', 'something else entirely')]:
+        run(capsys, '--folder', folder, 'create', name, '--title', name, '--content', content)
+    code, out = run(capsys, '--folder', folder, '--json', 'duplicates')
+    assert [group['ids'] for group in json.loads(out)] == [['a', 'b', 'c']]
+    code, out = run(capsys, '--folder', folder, 'duplicates', '--threshold', '1')
+    assert out.split() == ['same', 'a', 'b']
+
+def test_history_is_refused_without_history_logs(tmp_path):
+    from sqlite_notebook import SQLiteNotebook
+    notebook = SQLiteNotebook(str(tmp_path / 'notes.sqlite3'))
+    out = io.StringIO()
+    assert run_batch(notebook, ['create a --title A', 'history a', 'restore a 1'], out) == 1
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [result['ok'] for result in results] == [True, False, False]
+    assert 'keeps no note history' in results[1]['error']
+    notebook.close()
+
+def test_batch_saves_creates_together_and_survives_bad_lines(tmp_path, monkeypatch):
+    notebook = Notebook(str(tmp_path))
+    calls = []
+    save_many = notebook.save_many
+    monkeypatch.setattr(notebook, 'save_many', lambda notes, touch=True: calls.append(len(notes)) or save_many(notes, touch))
+    lines = [f'create n{i} --title "Note {i}"' for i in range(5)]
+    lines += ['{"op": "list", "tag": 5}', 'create --help', 'show n3', '{"op": "create", "id": "bad", "title": "Bad", "tags": 5}',
+              '{"op": "create", "id": "good", "title": "Good"}', '{"op": "create", "id": "no/such/folder", "title": "Lost"}',
+              '{"op": "create", "id": "after", "title": "After"}', 'tags', 'edit n1']
+    out = io.StringIO()
+    assert run_batch(notebook, lines, out) == 1
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [result['ok'] for result in results] == [True] * 5 + [False, False, True, False, True, False, True, True, False]
+    assert results[7]['result']['metadata']['title'] == 'Note 3'#the creates were saved before the show
+    assert calls == [5, 3]#one save_many per run of creates, what the failed one didn't get to was saved note by note
+    assert len(notebook.history('good.note')) == 1#written by save_many before the failure, not saved again
+    assert sorted(notebook.list_notes()) == ['after.note', 'good.note'] + [f'n{i}.note' for i in range(5)]
+    assert notebook.search_notes('good') == ['good.note']
+    assert 'nothing to change' in results[-1]['error']#a batch never opens nano
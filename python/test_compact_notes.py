@@ -0,0 +1,54 @@
+import datetime
+
+import pytest
+
+from notes import Note, Notebook, pack_time, unpack_time
+from header_table import HeaderTable, NO_TIME, to_micros
+
+
+def test_notes_have_no_dict():
+    note = Note('Title', 'body')
+    assert not hasattr(note, '__dict__')
+    with pytest.raises(AttributeError):
+        note.colour = 'red'
+
+@pytest.mark.parametrize('value', ['2025-05-18T09:15:00.123456Z', '2025-05-18T09:15:00Z'])
+def test_our_timestamps_are_packed(value):
+    packed = pack_time(value)
+    assert isinstance(packed, int)
+    assert unpack_time(packed) == value
+
+@pytest.mark.parametrize('value', ['2025-05-18T09:15:00.100Z', '2025-05-18', 'yesterday', 17, None,
+                                   datetime.datetime(2025, 5, 18, tzinfo=datetime.timezone.utc)])
+def test_other_values_come_back_unchanged(value):
+    assert unpack_time(pack_time(value)) == value
+
+def test_round_trip_and_interned_tags(tmp_path):
+    note = Note('Title', 'body', ['python'])
+    note.save('a', str(tmp_path))
+    text = (tmp_path / 'a.note').read_text()
+    first, second = Note.load_note(str(tmp_path / 'a.note')), Note.load_header(str(tmp_path / 'a.note'))
+    assert first.modified == note.modified
+    assert first.to_text() == text
+    assert first.tags[0] is second.tags[0]
+
+def test_header_table(tmp_path):
+    notebook = Notebook(str(tmp_path))
+    Note('Banana', 'b', ['fruit', 'yellow']).save('b', str(tmp_path))
+    Note('apple', 'a', ['fruit'], author='Ann').save('a', str(tmp_path))
+    (tmp_path / 'broken.note').write_text('not a note')
+    table = notebook.header_table()
+    assert table.files == ['a.note', 'b.note', 'broken.note']
+    assert table.tags(1) == ['fruit', 'yellow']
+    assert table.tag_counts() == {'fruit': 2, 'yellow': 1}
+    assert [table.files[row] for row in table.order('title')] == ['a.note', 'b.note', 'broken.note']
+    assert [table.files[row] for row in table.order('modified', reverse=True)][:2] == ['a.note', 'b.note']
+    assert table.authors[0] == 'Ann' and table.authors[1] is None
+    assert notebook.header_table() is table#unchanged catalog, same table
+    assert notebook.list_titles() == [('a.note', 'apple'), ('b.note', 'Banana'), ('broken.note', 'broken.note')]
+
+def test_to_micros():
+    assert to_micros('1970-01-01T00:00:01Z') == 1000000
+    assert to_micros(datetime.datetime(1970, 1, 1, 0, 0, 2, tzinfo=datetime.timezone.utc)) == 2000000
+    assert to_micros('soon') == NO_TIME
+    assert HeaderTable({}).order() == []
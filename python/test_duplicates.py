@@ -0,0 +1,72 @@
+import os
+import random
+
+from duplicates import SignatureCache, content_hash, find_duplicates, signature, similarity, NUM_HASHES
+from notes import Note, Notebook
+from sharded_notebook import ShardedNotebook
+
+
+WORDS = [f'word{i}' for i in range(500)]
+
+def text(rng, count=200):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+def edited(rng, body, changes):#body with a few words replaced
+    words = body.split()
+    for _ in range(changes):
+        words[rng.randrange(len(words))] = 'changed'
+    return ' '.join(words)
+
+def test_signatures_estimate_similarity():
+    rng = random.Random(1)
+    body = text(rng)
+    assert content_hash(body) == content_hash('  ' + body.replace(' ', '\n '))#spacing doesn't matter
+    assert len(signature(body)) == NUM_HASHES * 4
+    assert similarity(signature(body), signature(body)) == 1.0
+    assert similarity(signature(body), signature(edited(rng, body, 2))) > 0.8
+    assert similarity(signature(body), signature(text(rng))) < 0.2
+    assert signature('') is None
+
+def test_find_duplicates_groups_exact_and_near_copies():
+    rng = random.Random(2)
+    originals = [text(rng) for _ in range(300)]
+    fingerprints = {f'n{i:03d}.note': (content_hash(body), signature(body)) for i, body in enumerate(originals)}
+    fingerprints['copy.note'] = fingerprints['n007.note']
+    near = edited(rng, originals[42], 2)
+    fingerprints['near.note'] = (content_hash(near), signature(near))
+    fingerprints['empty.note'] = (None, None)
+    groups = find_duplicates(fingerprints)
+    assert groups == [{'files': ['copy.note', 'n007.note'], 'exact': True, 'similarity': 1.0},
+                      {'files': ['n042.note', 'near.note'], 'exact': False, 'similarity': groups[1]['similarity']}]
+    assert 0.8 <= groups[1]['similarity'] < 1.0
+    assert find_duplicates(fingerprints, threshold=1.0) == groups[:1]
+
+def test_signatures_are_cached_by_modified(tmp_path):
+    rng = random.Random(3)
+    notebook = Notebook(str(tmp_path))
+    body = text(rng)
+    notebook.save_note(Note('A', body), 'a')
+    notebook.save_note(Note('B', body), 'b')
+    notebook.save_note(Note('C', body), 'c')
+    assert notebook.find_duplicates() == [{'files': ['a.note', 'b.note', 'c.note'], 'exact': True, 'similarity': 1.0}]
+    assert os.path.exists(tmp_path / SignatureCache.FILENAME)
+    loaded = []
+    def load_notes(files):
+        loaded.extend(files)
+        return notebook.iter_notes(files)
+    cache = SignatureCache(str(tmp_path))
+    cache.update(notebook.note_stamps(), load_notes)
+    assert loaded == []#everything came from the file
+    notebook.save_note(Note('B', text(rng)), 'b')
+    notebook.delete_note('c')
+    assert set(cache.update(notebook.note_stamps(), load_notes)) == {'a.note', 'b.note'}
+    assert loaded == ['b.note']
+    assert notebook.find_duplicates() == []
+
+def test_sharded_notebook_finds_copies_across_shards(tmp_path):
+    rng = random.Random(4)
+    notebook = ShardedNotebook(str(tmp_path / 'root'))
+    body = text(rng)
+    notebook.save_many([(Note(f'Copy {i}', body), f'copy{i}') for i in range(5)] + [(Note('Other', text(rng)), 'other')])
+    assert len({notebook._shard_for(f'copy{i}.note').notes_folder for i in range(5)}) > 1
+    assert notebook.find_duplicates()[0]['files'] == [f'copy{i}.note' for i in range(5)]
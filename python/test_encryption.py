@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+pytest.importorskip('cryptography')
+
+import encryption
+from encryption import LockedError, DecryptionError, ENCRYPTED_TITLE
+from notes import Note, Notebook
+
+
+@pytest.fixture(autouse=True)
+def cheap_kdf(monkeypatch):#a real scrypt cost makes every test 0.1 s slower, and the key must not leak into the next test
+    monkeypatch.setattr(encryption, 'SCRYPT', (2 ** 10, 8, 1))
+    yield
+    encryption.lock()
+
+def read_file(tmp_path, name):
+    return (tmp_path / name).read_text(encoding='utf-8')
+
+def test_body_encryption(tmp_path):
+    notebook = Notebook(str(tmp_path))
+    notebook.unlock('correct horse')
+    note = Note('Bank details', 'account 12345 secretword', ['money'])
+    note.encryption = 'body'
+    notebook.save_note(note, 'bank')
+    text = read_file(tmp_path, 'bank.note')
+    assert 'Bank details' in text and 'secretword' not in text
+    assert notebook.get_note('bank.note').content == 'account 12345 secretword'
+    assert notebook.search_notes('bank') == ['bank.note']#the header is still searchable
+    assert notebook.search_notes('secretword') == []#the body never reaches the index
+    assert 'secretword' not in notebook.search_ranked('bank')[0]['snippet']
+    assert notebook.tag_counts()['money'] == 1
+
+    notebook.lock()
+    locked = notebook.get_note('bank.note')
+    assert locked.title == 'Bank details'
+    with pytest.raises(LockedError):
+        locked.content
+    locked.title = 'Bank'#saved while locked: the encrypted body goes back untouched
+    notebook.save_note(locked, 'bank')
+    notebook.unlock('correct horse')
+    assert notebook.get_note('bank.note').content == 'account 12345 secretword'
+
+def test_whole_note_encryption(tmp_path):
+    notebook = Notebook(str(tmp_path))
+    notebook.unlock('pw')
+    note = Note('Diary', 'dear diary', ['private'], author='Ann')
+    note.encryption = 'note'
+    notebook.save_note(note, 'diary')
+    text = read_file(tmp_path, 'diary.note')
+    assert 'Diary' not in text and 'private' not in text and 'Ann' not in text
+    assert notebook.list_titles() == [('diary.note', ENCRYPTED_TITLE)]
+    assert notebook.search_notes('diary') == [] and notebook.tag_counts() == {}
+    opened = notebook.get_note('diary.note')
+    assert (opened.title, opened.content, opened.tags, opened.author) == ('Diary', 'dear diary', ['private'], 'Ann')
+
+def test_wrong_passphrase_and_damaged_files(tmp_path):
+    notebook = Notebook(str(tmp_path))
+    notebook.unlock('right')
+    note = Note('Big', 'x' * (3 * encryption.CHUNK + 10))
+    note.encryption = 'body'
+    notebook.save_note(note, 'big')
+    notebook.lock()
+    with pytest.raises(DecryptionError):
+        notebook.unlock('wrong')
+    notebook.unlock('right')
+    assert len(notebook.get_note('big.note').content) == 3 * encryption.CHUNK + 10
+    path = tmp_path / 'big.note'
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert len(lines) > 4#one line per chunk
+    path.write_text('\n'.join(lines[:-1]) + '\n', encoding='utf-8')#the last chunk is gone
+    with pytest.raises(DecryptionError):
+        notebook.get_note('big.note')
+
+def test_key_is_derived_once(tmp_path, monkeypatch):
+    calls = []
+    derive = encryption.derive
+    monkeypatch.setattr(encryption, 'derive', lambda kdf, passphrase: calls.append(kdf) or derive(kdf, passphrase))
+    notebook = Notebook(str(tmp_path))
+    notebook.unlock('pw')
+    for i in range(5):
+        note = Note(f'n{i}', f'body {i}')
+        note.encryption = 'body'
+        notebook.save_note(note, f'n{i}')
+    assert [notebook.get_note(f'n{i}.note').content for i in range(5)] == [f'body {i}' for i in range(5)]
+    assert len(calls) == 1
+    notebook.unlock('pw')#unlocking again with the same passphrase reuses the key
+    assert len(calls) == 1
+
+def test_history_and_restore(tmp_path):
+    notebook = Notebook(str(tmp_path))
+    notebook.unlock('pw')
+    note = Note('Plans', 'first')
+    note.encryption = 'body'
+    notebook.save_note(note, 'plans')
+    note.content = 'second'
+    notebook.save_note(note, 'plans')
+    history = open(os.path.join(tmp_path, '.history', 'plans.note.log'), encoding='utf-8').read()
+    assert 'first' not in history and 'second' not in history
+    assert notebook.restore('plans.note', 1).content == 'first'
@@ -0,0 +1,50 @@
+import os
+
+import yaml
+
+import frontmatter
+from notes import Note
+
+NOTES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'notes')
+
+HEADERS = [
+    {'title': 'My Test Note', 'created': '2025-11-19T14:07:21.863265Z', 'modified': '2025-11-19T14:07:21.863265Z', 'tags': ['testing', 'example']},
+    {'title': 'Test', 'created': '2025-11-19T13:41:37Z', 'modified': '2025-11-19T13:41:37Z', 'tags': []},
+    {'title': "Bob's list, part 2", 'created': 'x', 'modified': 'y', 'tags': ['a b'], 'author': 'Bob', 'status': 'draft', 'priority': 3},
+    {'title': 'yes', 'created': '2025', 'modified': '12:30', 'tags': ['on', 'null'], 'priority': '3'},
+    {'title': 'Café: notes # with everything', 'created': '1.2.3', 'modified': None, 'tags': [1, True]},
+    {'title': ' '.join(['long'] * 30), 'created': '', 'modified': ' padded ', 'tags': [['nested']]},
+]
+
+
+def test_dump_matches_yaml_dump():
+    for metadata in HEADERS:
+        assert frontmatter.dump(metadata) == yaml.dump(metadata)
+
+def test_load_matches_yaml_load():
+    for metadata in HEADERS:
+        text = yaml.dump(metadata)
+        assert frontmatter.load(text) == yaml.safe_load(text)
+
+def test_load_handles_readme_style_headers():
+    text = 'title: Data Structures\ntags: [coursework, computer science]\npriority: 2\nempty:\n'
+    assert frontmatter.load(text) == yaml.safe_load(text)
+    text = 'title: Dates\ncreated: 2025-05-18T09:15:00Z\n# a comment\n'
+    assert frontmatter.load(text) == yaml.safe_load(text)#unquoted dates go through YAML and come back as datetime
+
+def test_fast_path_covers_app_headers():
+    frontmatter._fast_dump(HEADERS[0])#raises Fallback if the common case ever stops taking the fast path
+    frontmatter._fast_load(yaml.dump(HEADERS[2]))
+
+def test_existing_notes_round_trip_byte_identical():
+    checked = 0
+    for name in sorted(os.listdir(NOTES)):
+        path = os.path.join(NOTES, name)
+        try:
+            note = Note.load_note(path)
+        except ValueError:#my-first-note.note has no YAML header at all
+            continue
+        with open(path, encoding='utf-8') as f:
+            assert note.to_text() == f.read()
+        checked += 1
+    assert checked == 3
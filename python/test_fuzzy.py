@@ -0,0 +1,84 @@
+import pytest
+
+from fuzzy import TrigramIndex, trigrams, distance, max_typos
+from notes import Note, Notebook
+from sqlite_notebook import SQLiteNotebook
+
+
+def test_trigrams_and_typo_budget():
+    assert trigrams('cat') == {'$ca', 'cat', 'at$'}
+    assert [max_typos(word) for word in ('cat', 'java', 'python', 'algorithms')] == [0, 1, 1, 2]
+
+def test_distance_counts_a_swap_as_one_typo():
+    assert distance('pyhton', 'python', 2) == 1
+    assert distance('python', 'pythons', 2) == 1
+    assert distance('python', 'pithon', 2) == 1
+    assert distance('kitten', 'sitting', 3) == 3
+    assert distance('python', 'java', 2) == 3#over the limit stops early
+
+def test_similar_words():
+    index = TrigramIndex(['python', 'pythons', 'typhoon', 'java', 'algorithm', 'logarithm'])
+    assert index.similar('pyhton') == {'python': 1}
+    assert index.similar('python') == {'python': 0, 'pythons': 1}
+    assert index.similar('algoritm') == {'algorithm': 1}
+    assert index.similar('jav') == {}#too short to guess
+    index.remove('python')
+    index.add('pithon')
+    assert index.similar('pyhton') == {}
+    assert index.similar('python') == {'pythons': 1, 'pithon': 1}
+
+def test_similar_finds_swaps_that_share_no_trigram():
+    index = TrigramIndex(['test', 'java', 'jam', 'algorithms', 'rhythms'])
+    assert index.similar('tset') == {'test': 1}
+    assert index.similar('jvaa') == {'java': 1}
+    assert index.similar('lagorithsm') == {'algorithms': 2}
+    index.remove('test')
+    assert index.similar('tset') == {}
+
+@pytest.fixture(params=['folder', 'sqlite'])
+def notebook(request, tmp_path):
+    if request.param == 'sqlite':
+        notebook = SQLiteNotebook(str(tmp_path / 'notes.sqlite3'))
+    else:
+        notebook = Notebook(str(tmp_path))
+    notebook.save_note(Note('Python Programming', 'Learn about functions', ['python']), 'python')
+    notebook.save_note(Note('Python Packaging', 'wheels and setuptools', []), 'packaging')
+    notebook.save_note(Note('Learning Java', 'Learn about classes', ['java']), 'java')
+    notebook.save_note(Note('Algorithms', 'sorting and searching', []), 'algorithms')
+    return notebook
+
+def test_fuzzy_search(notebook):
+    assert notebook.search_notes('pyhton') == []
+    assert notebook.search_notes('pyhton', fuzzy=True) == ['packaging.note', 'python.note']
+    assert notebook.search_notes('pyhton~ AND functoins~') == ['python.note']
+    assert notebook.search_notes('sortnig~') == ['algorithms.note']
+    results = notebook.search_ranked('lern', fuzzy=True)
+    assert {result['file'] for result in results} == {'java.note', 'python.note'}
+    assert '**Learn**' in notebook.snippet('java.note', 'lern', fuzzy=True)
+    notebook.save_note(Note('Haskell', 'monads', []), 'haskell')#new words are found right away
+    assert notebook.search_notes('mondas', fuzzy=True) == ['haskell.note']
+
+def test_fuzzy_ranks_exact_words_first(tmp_path):
+    notebook = Notebook(str(tmp_path))
+    notebook.save_note(Note('Notes', 'paython', []), 'typo')
+    notebook.save_note(Note('Notes', 'python', []), 'exact')
+    assert [result['file'] for result in notebook.search_ranked('python', fuzzy=True)] == ['exact.note', 'typo.note']
+
+def test_complete_titles(notebook):
+    assert notebook.complete_titles('py') == [('packaging.note', 'Python Packaging'), ('python.note', 'Python Programming')]
+    assert notebook.complete_titles('Python Pr') == [('python.note', 'Python Programming')]
+    assert notebook.complete_titles('ja') == [('java.note', 'Learning Java')]#a later word of the title
+    assert notebook.complete_titles('pyhton', limit=1) == [('packaging.note', 'Python Packaging')]
+    assert notebook.complete_titles('') == [('algorithms.note', 'Algorithms'), ('java.note', 'Learning Java'),
+                                            ('packaging.note', 'Python Packaging'), ('python.note', 'Python Programming')]
+
+def test_menu_search_falls_back_to_fuzzy(tmp_path, monkeypatch, capsys):
+    from notes import Application
+    notebook = Notebook(str(tmp_path))
+    notebook.save_note(Note('Python Programming', 'Learn about functions'), 'python')
+    answers = iter(['pyhton', ''])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+    Application(notebook).handle_search()
+    out = capsys.readouterr().out
+    assert "No exact matches for 'pyhton', showing close matches:" in out
+    assert 'python.note' in out
@@ -0,0 +1,118 @@
+import os
+
+import pytest
+
+import history
+from history import NoteHistory, make_delta, apply_delta
+from notes import Note, Notebook
+
+
+def test_delta_round_trip():
+    old = ['a\n', 'b\n', 'c\n', 'd\n']
+    new = ['a\n', 'B\n', 'c\n', 'd\n', 'e\n']
+    delta = make_delta(old, new)
+    assert apply_delta(old, delta) == new
+    assert [0, 1] in delta and [2, 4] in delta#unchanged lines are stored as ranges, not text
+
+def test_every_version_can_be_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.setattr(history, 'SNAPSHOT_EVERY', 4)
+    log = NoteHistory(str(tmp_path), 'big.note')
+    lines = [f'line {i}\n' for i in range(200)]
+    texts = []
+    for version in range(1, 12):
+        lines[version * 7] = f'edited in version {version}\n'
+        texts.append(''.join(lines))
+        assert log.record(texts[-1]) == version
+    kinds = [item['kind'] for item in log.versions()]
+    assert kinds == ['snapshot', 'delta', 'delta', 'delta'] * 2 + ['snapshot', 'delta', 'delta']
+    for version, text in enumerate(texts, 1):
+        assert log.text(version) == text
+    with pytest.raises(KeyError):
+        log.text(12)
+
+def test_notebook_history_and_restore(tmp_path):
+    notebook = Notebook(str(tmp_path))
+    note = Note('Plan', 'first draft', ['work'])
+    notebook.save_note(note, 'plan')
+    note.content = 'second draft'
+    notebook.save_note(note, 'plan')
+    assert [item['version'] for item in notebook.history('plan.note')] == [1, 2]
+
+    restored = notebook.restore('plan.note', 1)
+    assert restored.content == 'first draft'
+    assert notebook.get_note('plan.note').content == 'first draft'
+    assert notebook.search_notes('first') == ['plan.note']
+    assert len(notebook.history('plan.note')) == 3#restoring is a new version, version 2 is still there
+
+def test_deleted_notes_can_be_restored(tmp_path):
+    notebook = Notebook(str(tmp_path))
+    notebook.save_note(Note('Gone', 'keep me'), 'gone')
+    notebook.delete_note('gone')
+    assert [item['kind'] for item in notebook.history('gone.note')] == ['snapshot', 'deleted']
+    with pytest.raises(KeyError):
+        notebook.restore('gone.note', 2)
+    notebook.restore('gone.note', 1)
+    assert notebook.list_notes() == ['gone.note']
+    assert notebook.history('gone.note')[-1]['kind'] == 'snapshot'#nothing to diff against after a deletion
+
+def test_edits_outside_the_app_are_kept(tmp_path):
+    notebook = Notebook(str(tmp_path))
+    notebook.save_note(Note('Edited', 'before'), 'edited')
+
+    def editor(path):
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text.replace('before', 'after'))
+    notebook.edit_note('edited.note', editor)
+    assert len(notebook.history('edited.note')) == 2
+    notebook.restore('edited.note', 1)
+    assert notebook.get_note('edited.note').content == 'before'
+
+def test_history_can_be_turned_off(tmp_path, monkeypatch):
+    monkeypatch.setenv('NOTES_KEEP_HISTORY', '0')
+    import Configurator
+    Configurator.reset()
+    try:
+        notebook = Notebook(str(tmp_path))
+        notebook.save_note(Note('Quiet', 'no history'), 'quiet')
+        assert notebook.history('quiet.note') == []
+    finally:
+        monkeypatch.delenv('NOTES_KEEP_HISTORY')
+        Configurator.reset()
+
+def test_text_reads_from_the_offset_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(history, 'SNAPSHOT_EVERY', 4)
+    log = NoteHistory(str(tmp_path), 'indexed.note')
+    texts = [f'version {version}\n' * 50 for version in range(1, 10)]
+    for text in texts:
+        log.record(text)
+    assert os.path.getsize(log.index_path) == 9 * history.OFFSET_SIZE
+    read = []
+    original = NoteHistory._read_lines
+    monkeypatch.setattr(NoteHistory, '_read_lines', lambda self, offset: read.append(offset) or original(self, offset))
+    assert log.text(6) == texts[5]
+    assert read == [log._record_at(6)['base']] and read[0] > 0#started at version 5's snapshot, not at the top of the log
+
+def test_missing_or_stale_index_is_rebuilt(tmp_path):
+    log = NoteHistory(str(tmp_path), 'old.note')
+    for version in range(1, 4):
+        log.record(f'text {version}\n')
+    os.remove(log.index_path)#a log from before the index
+    assert log.text(2) == 'text 2\n'
+    assert os.path.getsize(log.index_path) == 3 * history.OFFSET_SIZE
+    with open(log.index_path, 'r+b') as f:#cut short, as by a crash between the log and the index write
+        f.truncate(history.OFFSET_SIZE)
+    assert log.record('text 4\n') == 4
+    assert [log.text(version) for version in range(1, 5)] == [f'text {version}\n' for version in range(1, 5)]
+
+def test_unfinished_last_line_is_cut_off(tmp_path):
+    notebook = Notebook(str(tmp_path))
+    notebook.save_note(Note('A', 'first'), 'a')
+    log = NoteHistory(str(tmp_path), 'a.note')
+    with open(log.path, 'ab') as f:#a crash in the middle of an append
+        f.write(b'{"partial": ')
+    assert [item['version'] for item in log.versions()] == [1]
+    notebook.save_note(Note('A', 'second'), 'a')
+    assert [item['version'] for item in log.versions()] == [1, 2]
+    assert log.text(1).endswith('first') and log.text(2).endswith('second')
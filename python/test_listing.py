@@ -0,0 +1,70 @@
+import pytest
+
+import header_table
+from notes import Note, Notebook, Application
+from sqlite_notebook import SQLiteNotebook
+
+NOTES = [ #(filename, title, created, priority, tags)
+    ('delta', 'delta', '2025-01-04T00:00:00Z', 3, ['work']),
+    ('alpha', 'Alpha', '2025-01-02T00:00:00Z', 1, ['work', 'urgent']),
+    ('charlie', 'charlie', '2025-01-01T00:00:00Z', None, ['home']),
+    ('bravo', 'Bravo', '2025-01-03T00:00:00Z', 'high', ['Work']),
+    ('echo', 'Echo', '2025-01-02T00:00:00Z', 2, []),
+]
+
+
+def fill(notebook):
+    for filename, title, created, priority, tags in NOTES:
+        note = Note(title, f'about {title}', tags, author='Ann' if priority == 1 else None, priority=priority)
+        note.created = created
+        notebook.save_note(note, filename)
+    return notebook
+
+@pytest.fixture(params=['folder', 'sqlite'])
+def notebook(request, tmp_path):
+    if request.param == 'sqlite':
+        return fill(SQLiteNotebook(str(tmp_path / 'notes.sqlite3')))
+    return fill(Notebook(str(tmp_path)))
+
+def test_sorted_pages(notebook):
+    assert notebook.list_notes(sort_by='title') == ['alpha.note', 'bravo.note', 'charlie.note', 'delta.note', 'echo.note']
+    assert notebook.list_notes(sort_by='title', offset=1, limit=2) == ['bravo.note', 'charlie.note']
+    assert notebook.list_notes(sort_by='created') == ['charlie.note', 'alpha.note', 'echo.note', 'bravo.note', 'delta.note']
+    assert notebook.list_notes(sort_by='created', reverse=True, limit=2) == ['delta.note', 'bravo.note']
+    assert notebook.list_notes(sort_by='priority') == ['alpha.note', 'echo.note', 'delta.note', 'bravo.note', 'charlie.note']
+    assert notebook.list_titles(limit=2) == [('alpha.note', 'Alpha'), ('bravo.note', 'Bravo')]
+    with pytest.raises(ValueError):
+        notebook.list_notes(sort_by='colour')
+
+def test_filters(notebook):
+    assert notebook.list_notes(sort_by='title', tag='work') == ['alpha.note', 'bravo.note', 'delta.note']
+    assert notebook.list_notes(tags=['WORK', 'urgent']) == ['alpha.note']
+    assert notebook.list_notes(author='Ann') == ['alpha.note']
+    assert notebook.list_notes(priority=2) == ['echo.note']
+    assert notebook.list_notes(sort_by='created', tag='work', offset=1) == ['bravo.note', 'delta.note']
+    with pytest.raises(ValueError):
+        notebook.list_notes(colour='red')
+
+def test_top_k_pages_match_the_full_sort(tmp_path, monkeypatch):
+    notebook = Notebook(str(tmp_path))
+    for i in range(100):
+        note = Note(f'Note {i % 7}', 'x')
+        note.created = f'2025-01-{i % 5 + 1:02d}T00:00:00Z'#lots of ties
+        notebook.save_note(note, f'n{i:02d}')
+    pages = {by: [notebook.list_notes(sort_by=by, offset=offset, limit=5) for offset in (0, 5)] for by in ('title', 'created')}
+    assert notebook.header_table()._orders == {}#small first pages never sorted everything
+    monkeypatch.setattr(header_table, 'TOP_K_RATIO', 10 ** 6)#now every page comes from a full sort
+    for by, expected in pages.items():
+        assert [notebook.list_notes(sort_by=by, offset=offset, limit=5) for offset in (0, 5)] == expected
+        assert notebook.list_notes(sort_by=by)[:10] == expected[0] + expected[1]
+
+def test_menu_pages_through_notes(tmp_path, monkeypatch, capsys):
+    notebook = Notebook(str(tmp_path))
+    for i in range(45):
+        notebook.save_note(Note(f'Note {i:02d}', f'body {i}'), f'n{i:02d}')
+    answers = iter(['n', 'n', 'p', '23', ''])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+    Application(notebook).handle_read()
+    out = capsys.readouterr().out
+    assert '  41. Note 40 (n40.note)' in out
+    assert '--- Note 22 ---' in out#numbers go on across pages
@@ -0,0 +1,64 @@
+import os
+import shutil
+
+from notes import Note, HEADER_CHUNK
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'test-notes')
+
+
+def test_load_note_keeps_dashes_in_body(tmp_path):
+    path = tmp_path / 'dashes.note'
+    path.write_text("---\ntitle: Dashes\ncreated: 'a'\nmodified: 'b'\n---\n\nabove\n---\nbelow\n")
+    note = Note.load_note(str(path))
+    assert note.title == 'Dashes'
+    assert note.content == 'above\n---\nbelow'
+
+def test_load_note_reads_what_save_wrote(tmp_path):
+    Note('Saved', 'line one\n---\nline two', ['x'], status='draft').save('saved', str(tmp_path))
+    note = Note.load_note(str(tmp_path / 'saved.note'))
+    assert note.content == 'line one\n---\nline two'
+    assert note.tags == ['x']
+    assert note.status == 'draft'
+
+def test_load_header_defers_body(tmp_path):
+    path = tmp_path / 'hamlet.note'
+    shutil.copy(os.path.join(SAMPLES, 'shakespeare-hamlet.md'), path)
+    note = Note.load_header(str(path))
+    assert note.title
+    assert note._body_source is not None#nothing read past the header yet
+    assert note._body_source[2] <= HEADER_CHUNK
+    assert note.content == Note.load_note(str(path)).content
+    assert note._body_source is None
+
+def test_load_header_body_follows_file_changes(tmp_path):
+    Note('Before', 'short', []).save('n', str(tmp_path))
+    note = Note.load_header(str(tmp_path / 'n.note'))
+    Note('A much longer title than before', 'changed body', ['t']).save('n', str(tmp_path))
+    assert note.content == 'changed body'
+
+def test_setting_content_skips_lazy_read(tmp_path):
+    Note('T', 'on disk', []).save('n', str(tmp_path))
+    note = Note.load_header(str(tmp_path / 'n.note'))
+    note.content = 'in memory'
+    assert note.content == 'in memory'
+
+def make_folder(tmp_path, count):
+    for i in range(count):
+        Note(f'Note {i}', f'body {i}', [f'tag{i % 3}']).save(f'n{i}', str(tmp_path))
+    (tmp_path / 'broken.note').write_text('no header')
+
+def test_iter_notes_threads_match_serial(tmp_path):
+    from notes import Notebook
+    make_folder(tmp_path, 25)
+    notebook = Notebook(str(tmp_path))
+    serial = {file: note.title for file, note in notebook.iter_notes(workers=1)}
+    pooled = {file: note.title for file, note in notebook.iter_notes(workers=4)}
+    assert len(serial) == 25#the broken note is skipped
+    assert pooled == serial
+
+def test_iter_notes_with_process_pool(tmp_path):
+    from notes import Notebook
+    make_folder(tmp_path, 6)
+    notes = Notebook(str(tmp_path)).load_all(workers=2, processes=2, header_only=True)
+    assert sorted(notes) == [f'n{i}.note' for i in range(6)]
+    assert notes['n3.note'].content == 'body 3'
@@ -1,8 +1,16 @@
-from notes import read_note, list_files, save_note, delete_note, get_stats, edit_note, search_notes, Note
-from Configurator import ROOT_FOLDER
+import pytest
 
-def test_list_files_returns_note_files():
-    files = list_files()
+from notes import Note, Notebook
+
+
+@pytest.fixture
+def notebook(tmp_path):
+    notebook = Notebook(str(tmp_path))
+    notebook.save_note(Note('Test this note', 'Some content', ['test']), 'Test this note')
+    return notebook
+
+def test_list_notes_returns_note_files(notebook):
+    files = notebook.list_notes()
 
     # Check that it returns a list
     assert isinstance(files, list)
@@ -14,81 +22,85 @@ def test_list_files_returns_note_files():
     for file in files:
         assert file.endswith('.note')
 
-def test_save_note_creates_file_with_yaml():
+def test_save_note_creates_file_with_yaml(notebook):
     # Save a new note
-    save_note('test-note', 'My Test Note', 'This is test content', ['testing', 'example'])
+    notebook.save_note(Note('My Test Note', 'This is test content', ['testing', 'example']), 'test-note')
+
+    # The file starts with the YAML header
+    with open(f'{notebook.notes_folder}/test-note.note', encoding='utf-8') as f:
+        assert f.readline() == '---\n'
 
     # Read it back
-    result = read_note(f'{ROOT_FOLDER}/test-note.note')
+    result = notebook.get_note('test-note.note').to_dict()
 
     # Verify the metadata
     assert result['metadata']['title'] == 'My Test Note'
     assert result['metadata']['tags'] == ['testing', 'example']
     assert result['content'] == 'This is test content'
 
-def test_delete_note_removes_file():
+def test_delete_note_removes_file(notebook):
     # First, create a test note
-    save_note('temp-delete-test', 'Delete Test', 'This will be deleted', [])
+    notebook.save_note(Note('Delete Test', 'This will be deleted', []), 'temp-delete-test')
 
     # Verify it exists
-    files = list_files()
-    assert 'temp-delete-test.note' in files
+    assert 'temp-delete-test.note' in notebook.list_notes()
 
     # Delete it
-    delete_note('temp-delete-test')
+    notebook.delete_note('temp-delete-test')
 
     # Verify it's gone
-    files = list_files()
-    assert 'temp-delete-test.note' not in files
+    assert 'temp-delete-test.note' not in notebook.list_notes()
 
-def test_stats_returns_note_count():
-    stats = get_stats()
+def test_stats_returns_note_count(notebook):
+    stats = notebook.get_stats()
 
     # Check that it returns a dictionary with stats
     assert 'total_notes' in stats
     assert isinstance(stats['total_notes'], int)
-    assert stats['total_notes'] >= 0
+    assert stats['total_notes'] == 1
 
-def test_edit_note_updates_content():
+def test_edit_note_updates_content(notebook):
     # Create a test note
-    save_note('edit-test', 'Original Title', 'Original content', ['test'])
+    notebook.save_note(Note('Original Title', 'Original content', ['test']), 'edit-test')
 
     # Edit it
-    edit_note('edit-test', title='Updated Title', content='New content', tags=['updated'])
+    note = notebook.get_note('edit-test.note')
+    note.update(title='Updated Title', content='New content', tags=['updated'])
+    notebook.save_note(note, 'edit-test')
 
     # Read it back
-    result = read_note(f'{ROOT_FOLDER}/edit-test.note')
+    result = notebook.get_note('edit-test.note').to_dict()
 
     # Verify changes
     assert result['metadata']['title'] == 'Updated Title'
     assert result['content'] == 'New content'
     assert result['metadata']['tags'] == ['updated']
 
-def test_search_notes_finds_matching_notes():
+def test_search_notes_finds_matching_notes(notebook):
     # Create some test notes
-    save_note('search-test-1', 'Python Programming', 'Learn about functions', ['python', 'coding'])
-    save_note('search-test-2', 'Java Basics', 'Learn about classes', ['java', 'coding'])
-    save_note('search-test-3', 'Cooking Tips', 'How to bake bread', ['cooking', 'recipes'])
+    notebook.save_note(Note('Python Programming', 'Learn about functions', ['python', 'coding']), 'search-test-1')
+    notebook.save_note(Note('Java Basics', 'Learn about classes', ['java', 'coding']), 'search-test-2')
+    notebook.save_note(Note('Cooking Tips', 'How to bake bread', ['cooking', 'recipes']), 'search-test-3')
 
     # Search for 'python'
-    results = search_notes('python')
+    results = notebook.search_notes('python')
 
-    # Should find the first note
-    assert len(results) > 0
-    assert any('search-test-1.note' in result for result in results)
+    # Should find the first note only
+    assert results == ['search-test-1.note']
 
-def test_note_update_method():
+def test_note_update_method(tmp_path):
     # Create and save a note
     note = Note('Original Title', 'Original content', ['test'])
-    note.save('update-test')
+    note.save('update-test', str(tmp_path))
 
     # Load it back
-    loaded_note = Note.load_from_file(f'{ROOT_FOLDER}/update-test.note')
+    loaded_note = Note.load_note(f'{tmp_path}/update-test.note')
 
     # Update it
     loaded_note.update(title='New Title')
-    loaded_note.save('update-test')
+    loaded_note.save('update-test', str(tmp_path))
 
     # Load again and verify
-    final_note = Note.load_from_file(f'{ROOT_FOLDER}/update-test.note')
-    assert final_note.title == 'New Title'
\ No newline at end of file
+    final_note = Note.load_note(f'{tmp_path}/update-test.note')
+    assert final_note.title == 'New Title'
+    assert final_note.content == 'Original content'
@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from notes import Note, Notebook
+from pack import PackNotebook, PackReader, PackWriter
+
+
+def make_notebook(folder, count=30):
+    folder.mkdir()
+    notebook = Notebook(str(folder))
+    for i in range(count):
+        Note(f'Note {i}', f'body {i} ' + 'words ' * 50, ['even' if i % 2 == 0 else 'odd']).save(f'n{i:02d}', str(folder))
+    (folder / 'broken.note').write_text('not a note')
+    return notebook
+
+@pytest.mark.parametrize('compression', [None, 'gzip'])
+def test_export_import_round_trip(tmp_path, compression):
+    source = make_notebook(tmp_path / 'source')
+    pack_path = str(tmp_path / 'notes.pack')
+    assert source.export_pack(pack_path, compression) == 31
+    target = Notebook(str(tmp_path / 'target'))
+    os.makedirs(target.notes_folder)
+    assert target.search_notes('words') == []#the index exists, the import has to update it
+    assert target.import_pack(pack_path) == 31
+    for file in source.list_notes():
+        assert (tmp_path / 'target' / file).read_bytes() == (tmp_path / 'source' / file).read_bytes()
+    assert len(target.search_notes('words')) == 30
+
+def test_pack_notebook_reads_without_unpacking(tmp_path):
+    make_notebook(tmp_path / 'source').export_pack(str(tmp_path / 'notes.pack'), 'gzip')
+    notebook = PackNotebook(str(tmp_path / 'notes.pack'))
+    assert notebook.get_note('n07.note').title == 'Note 7'
+    assert len(notebook.note_headers()) == 30#broken.note is in the pack but has no header
+    assert notebook.notes_with_tag('odd')[:2] == ['n01.note', 'n03.note']
+    assert notebook.search_ranked('body AND 12', snippets=False)[0]['file'] == 'n12.note'
+    assert notebook.get_stats()['total_notes'] == 31
+    with pytest.raises(FileNotFoundError):
+        notebook.get_note('missing.note')
+    with pytest.raises(PermissionError):
+        notebook.save_note(Note('x', 'y'), 'x')
+    notebook.close()
+
+def test_append_and_small_blocks(tmp_path):
+    path = str(tmp_path / 'notes.pack')
+    with PackWriter(path, block_size=10) as pack:
+        pack.add('a.note', b'first')
+        pack.add('b.note', b'second')
+    with PackWriter(path, append=True) as pack:
+        pack.add('a.note', b'replaced')
+        pack.remove('b.note')
+        pack.add('c.note', b'third')
+    with PackReader(path) as pack:
+        assert sorted(pack.names()) == ['a.note', 'c.note']
+        assert pack.read('a.note') == b'replaced'
+        assert list(pack.items()) == [('a.note', b'replaced'), ('c.note', b'third')]
+
+def test_crash_while_appending_keeps_the_old_pack(tmp_path):
+    path = str(tmp_path / 'notes.pack')
+    with PackWriter(path, block_size=10) as pack:
+        pack.add('a.note', b'first')
+    crashed = PackWriter(path, append=True, block_size=10)
+    crashed.add('b.note', b'NOTEPACK in a block that is written before the crash')
+    crashed.file.close()#the process died before close() wrote the new index and trailer
+    with PackReader(path) as pack:
+        assert pack.names() == ['a.note'] and pack.read('a.note') == b'first'
+    with PackWriter(path, append=True) as pack:
+        pack.add('c.note', b'third')
+    with PackReader(path) as pack:
+        assert sorted(pack.names()) == ['a.note', 'c.note']
+        assert pack.read('c.note') == b'third'
+
+def test_unfinished_pack_is_rejected(tmp_path):
+    path = tmp_path / 'notes.pack'
+    with pytest.raises(RuntimeError):
+        with PackWriter(str(path)) as pack:
+            pack.add('a.note', b'data')
+            raise RuntimeError('interrupted')
+    assert not path.exists()#the temporary file is gone, no half pack
+    path.write_bytes(b'NOTEPACK' + b'\0' * 40)
+    with pytest.raises(ValueError):
+        PackReader(str(path))
+    path.write_bytes(b'NOTEPACK')#shorter than a header and a trailer
+    with pytest.raises(ValueError):
+        PackReader(str(path))
+
+@pytest.mark.parametrize('name', ['../escaped.note', 'sub/x.note', 'a\\b.note', '.hidden.note', 'x.txt'])
+def test_import_refuses_names_outside_the_folder(tmp_path, name):
+    path = str(tmp_path / 'bad.pack')
+    with PackWriter(path) as pack:
+        pack.add('fine.note', b'---\ntitle: fine\n---\n\nok')
+        pack.add(name, b'---\ntitle: bad\n---\n\nbad')
+    (tmp_path / 'target').mkdir()
+    with pytest.raises(ValueError):
+        Notebook(str(tmp_path / 'target')).import_pack(path)
+    assert os.listdir(tmp_path / 'target') == [] and not (tmp_path / 'escaped.note').exists()
@@ -0,0 +1,76 @@
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+import perf
+from cli import main
+from notes import Note, Notebook
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture(autouse=True)
+def timers_off():
+    perf.disable()
+    perf.reset()
+    yield
+    perf.disable()
+    perf.reset()
+
+def test_timers_only_count_while_enabled():
+    @perf.timed('work')
+    def work(x):
+        return x * 2
+
+    assert work(2) == 4
+    assert perf.snapshot() == {}
+    perf.enable()
+    work(1)
+    work(2)
+    assert perf.snapshot()['work']['calls'] == 2
+
+def test_timers_count_every_call_from_many_threads():
+    import threading
+    def count():
+        for _ in range(20000):
+            perf.record('threads', 0.0)
+    threads = [threading.Thread(target=count) for _ in range(8)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)#switch threads as often as possible, so lost updates would show
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert perf.snapshot()['threads']['calls'] == 160000
+
+def test_hot_paths_are_timed(tmp_path):
+    perf.enable()
+    notebook = Notebook(str(tmp_path))
+    notebook.save_note(Note('Timed', 'some words'), 'timed')
+    Note.load_note(f'{tmp_path}/timed.note')
+    notebook.search_notes('words')
+    notebook.get_stats()
+    names = set(perf.snapshot())
+    assert {'Note.save', 'Note.load_note', 'list_notes', 'search_notes', 'get_stats', 'frontmatter.load'} <= names
+
+def test_stats_perf_command(tmp_path, capsys):
+    Notebook(str(tmp_path)).save_note(Note('One', 'body'), 'one')
+    assert main(['--folder', str(tmp_path), '--json', 'stats', '--perf']) == 0
+    result = json.loads(capsys.readouterr().out)
+    assert result['total_notes'] == 1
+    assert result['perf']['get_stats']['calls'] == 1
+
+def test_profile_setting_writes_cprofile_stats(tmp_path):
+    Notebook(str(tmp_path)).save_note(Note('One', 'body'), 'one')
+    env = dict(os.environ, NOTES_PROFILE=str(tmp_path / 'run.prof'))
+    subprocess.run([sys.executable, 'notes.py', '--folder', str(tmp_path), 'stats'], cwd=HERE, env=env,
+                   capture_output=True, check=True)
+    import pstats
+    stats = pstats.Stats(str(tmp_path / 'run.prof'))
+    assert any(function[2] == 'get_stats' for function in stats.stats)
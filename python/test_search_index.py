@@ -0,0 +1,81 @@
+from notes import Note, Notebook
+from search_index import SearchIndex, parse_query, snippet, tokenize
+
+
+def make_notebook(tmp_path):
+    notebook = Notebook(str(tmp_path))
+    Note('Python Programming', 'Learn about functions and concatenate strings', ['python', 'coding']).save('python', str(tmp_path))
+    Note('Java Basics', 'Learn about classes', ['java', 'coding']).save('java', str(tmp_path))
+    Note('Cooking Tips', 'How to bake bread. The cat sat on the mat.', ['cooking']).save('cooking', str(tmp_path))
+    return notebook
+
+def test_tokenize_lowercases_and_drops_punctuation():
+    assert tokenize("Hello, World! it's") == ['hello', 'world', 'it', 's']
+
+def test_parse_query_groups_and_or():
+    assert parse_query('a b AND c') == [[('term', 'a')], [('term', 'b'), ('term', 'c')]]
+    assert parse_query('"hello world" pre*') == [[('phrase', ['hello', 'world'])], [('prefix', 'pre')]]
+
+def test_search_matches_whole_words_only(tmp_path):
+    notebook = make_notebook(tmp_path)
+    assert notebook.search_notes('cat') == ['cooking.note']
+    assert notebook.search_notes('python') == ['python.note']
+
+def test_search_or_and_phrase_prefix(tmp_path):
+    notebook = make_notebook(tmp_path)
+    assert notebook.search_notes('python java') == ['java.note', 'python.note']
+    assert notebook.search_notes('learn AND classes') == ['java.note']
+    assert notebook.search_notes('"bake bread"') == ['cooking.note']
+    assert notebook.search_notes('"bread bake"') == []
+    assert notebook.search_notes('concat*') == ['python.note']
+    assert notebook.search_notes('cod*') == ['java.note', 'python.note']
+
+def test_save_and_delete_update_index_incrementally(tmp_path):
+    notebook = make_notebook(tmp_path)
+    assert notebook.search_notes('rust') == []#builds the index
+
+    Note('Rust Notes', 'Ownership and borrowing', ['rust']).save('rust', str(tmp_path))
+    assert notebook.search_notes('borrowing') == ['rust.note']
+    assert SearchIndex.exists(str(tmp_path))
+
+    notebook.delete_note('rust')
+    assert notebook.search_notes('borrowing') == []
+
+def test_index_survives_reload_and_compaction(tmp_path):
+    notebook = make_notebook(tmp_path)
+    notebook.search_notes('python')
+    for i in range(5):
+        Note(f'Extra {i}', 'zebra stripes', []).save(f'extra-{i}', str(tmp_path))
+
+    index = SearchIndex(str(tmp_path))
+    assert index.load()
+    assert len(index.search('zebra')) == 5
+    index.save()#folds the journal into the snapshot
+
+    fresh = SearchIndex(str(tmp_path))
+    assert fresh.load()
+    assert fresh.search('zebra') == index.search('zebra')
+    assert fresh.term_frequency('zebra', 'extra-0.note') == 1
+
+def test_ranked_prefers_title_and_repeated_words(tmp_path):
+    notebook = make_notebook(tmp_path)
+    Note('Notes on bread', 'bread bread bread, all about bread', ['cooking']).save('bread', str(tmp_path))
+    Note('Groceries', 'milk, eggs, bread', []).save('groceries', str(tmp_path))
+    ranked = notebook.search_ranked('bread', snippets=False)
+    assert [result['file'] for result in ranked][0] == 'bread.note'#in the title, and four times in the body
+    assert sorted(result['file'] for result in ranked[1:]) == ['cooking.note', 'groceries.note']
+    assert ranked[0]['score'] > ranked[1]['score'] >= ranked[2]['score'] > 0
+    assert [result['file'] for result in notebook.search_ranked('bread', limit=1)] == ['bread.note']
+    assert notebook.search_ranked('rust') == []
+
+def test_snippet_highlights_the_best_window():
+    text = 'intro ' * 50 + 'the cat sat on the mat with another cat' + ' outro' * 50
+    assert snippet(text, parse_query('cat'), words=8) == '...intro the **cat** sat on the mat with...'
+    assert snippet('Learn to concatenate', parse_query('concat*')) == 'Learn to **concatenate**'
+    assert snippet('no match here', parse_query('zebra')) == 'no match here'
+
+def test_search_results_carry_snippets(tmp_path):
+    notebook = make_notebook(tmp_path)
+    result, = notebook.search_ranked('"bake bread"')
+    assert result['file'] == 'cooking.note'
+    assert result['snippet'] == 'How to **bake** **bread**. The cat sat on the mat.'
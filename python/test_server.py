@@ -0,0 +1,106 @@
+import gzip
+import json
+import asyncio
+import threading
+import http.client
+
+import pytest
+
+from notes import Note, Notebook
+from server import NotesServer
+
+
+@pytest.fixture
+def server(tmp_path):
+    for i in range(5):
+        Note(f'Note {i}', f'body number {i} ' + 'filler ' * 300, ['even' if i % 2 == 0 else 'odd']).save(f'note-{i}', str(tmp_path))
+    loop = asyncio.new_event_loop()
+    notes_server = NotesServer(Notebook(str(tmp_path)), port=0)
+    loop.run_until_complete(notes_server.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield notes_server
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    notes_server.close()
+
+def request(server, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection('127.0.0.1', server.port)
+    connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers or {})
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    return response, data
+
+def test_list_notes_paginates(server):
+    response, data = request(server, 'GET', '/api/notes?offset=1&limit=2')
+    page = json.loads(data)
+    assert response.status == 200
+    assert page['total'] == 5
+    assert [item['id'] for item in page['items']] == ['note-1', 'note-2']
+    response, data = request(server, 'GET', '/api/notes?sort=title&reverse=1&limit=2')
+    assert [item['id'] for item in json.loads(data)['items']] == ['note-4', 'note-3']
+    assert request(server, 'GET', '/api/notes?sort=colour')[0].status == 400
+
+def test_get_note_with_etag(server):
+    response, data = request(server, 'GET', '/api/notes/note-3')
+    assert json.loads(data)['metadata']['title'] == 'Note 3'
+    etag = response.getheader('ETag')
+    response, data = request(server, 'GET', '/api/notes/note-3', headers={'If-None-Match': etag})
+    assert response.status == 304
+    assert data == b''
+
+def test_tags_search_and_tag_filter(server):
+    assert json.loads(request(server, 'GET', '/api/tags')[1]) == {'even': 3, 'odd': 2}
+    page = json.loads(request(server, 'GET', '/api/notes/tag/odd')[1])
+    assert [item['id'] for item in page['items']] == ['note-1', 'note-3']
+    page = json.loads(request(server, 'GET', '/api/notes/tag/odd,even?limit=3')[1])
+    assert page['total'] == 5
+    assert [item['id'] for item in page['items']] == ['note-0', 'note-1', 'note-2']
+    assert json.loads(request(server, 'GET', '/api/notes/tag/odd+even')[1])['total'] == 0
+    page = json.loads(request(server, 'GET', '/api/search?q=number%20AND%204')[1])
+    assert [item['id'] for item in page['items']] == ['note-4']
+    page = json.loads(request(server, 'GET', '/api/search?q=numbre&fuzzy=1&limit=1')[1])
+    assert page['total'] == 5 and '**number**' in page['items'][0]['snippet']
+    assert json.loads(request(server, 'GET', '/api/search?complete=note%203')[1]) == [{'id': 'note-3', 'title': 'Note 3'}]
+    assert len(json.loads(request(server, 'GET', '/api/search?complete=no&limit=2')[1])) == 2
+
+def test_gzip_when_accepted(server):
+    response, data = request(server, 'GET', '/api/notes/note-0', headers={'Accept-Encoding': 'gzip'})
+    assert response.getheader('Content-Encoding') == 'gzip'
+    assert json.loads(gzip.decompress(data))['metadata']['title'] == 'Note 0'
+
+def test_create_update_delete(server):
+    response, _ = request(server, 'POST', '/api/notes', {'id': 'new', 'title': 'New', 'content': 'hello', 'tags': ['x']})
+    assert response.status == 201
+    response, data = request(server, 'PUT', '/api/notes/new', {'content': 'changed'})
+    assert json.loads(data)['metadata']['title'] == 'New'
+    assert json.loads(request(server, 'GET', '/api/notes/new')[1])['content'] == 'changed'
+    assert request(server, 'DELETE', '/api/notes/new')[0].status == 204
+    assert request(server, 'GET', '/api/notes/new')[0].status == 404
+
+def test_note_ids_cannot_leave_the_folder(server, tmp_path):
+    victim = tmp_path.parent / 'victim.note'
+    Note('Victim', 'outside').save('victim', str(tmp_path.parent))
+    for method in ('GET', 'DELETE', 'PUT'):
+        for path in ('/api/notes/..%2Fvictim', '/api/notes/..%5Cvictim', '/api/notes/.hidden'):
+            assert request(server, method, path, {} if method == 'PUT' else None)[0].status == 400
+    assert request(server, 'POST', '/api/notes', {'id': '../victim', 'title': 'x'})[0].status == 400
+    assert victim.exists()
+
+def test_bad_field_types_are_refused_before_saving(server, tmp_path):
+    before = (tmp_path / 'note-1.note').read_text()
+    for body in ({'tags': 5}, {'tags': ['ok', 3]}, {'title': ['x']}, {'content': {'a': 1}}, {'priority': [1]}):
+        assert request(server, 'PUT', '/api/notes/note-1', body)[0].status == 400
+    assert request(server, 'POST', '/api/notes', {'id': 'bad', 'title': 'Bad', 'tags': 'x'})[0].status == 400
+    assert (tmp_path / 'note-1.note').read_text() == before and not (tmp_path / 'bad.note').exists()
+    assert json.loads(request(server, 'GET', '/api/tags')[1]) == {'even': 3, 'odd': 2}
+
+def test_keep_alive_serves_several_requests(server):
+    connection = http.client.HTTPConnection('127.0.0.1', server.port)
+    for path in ('/api/tags', '/api/notes', '/api/nope'):
+        connection.request('GET', path)
+        response = connection.getresponse()
+        response.read()
+    assert response.status == 404
+    connection.close()
@@ -0,0 +1,120 @@
+import os
+
+import pytest
+
+import Configurator
+from notes import Note, Notebook, open_notebook
+from sharded_notebook import ShardedNotebook, migrate, read_layout, shard_of, main
+
+
+def make_flat(folder, count=40):
+    folder.mkdir()
+    for i in range(count):
+        note = Note(f'Note {i:02d}', f'body {i} shared words', ['Even' if i % 2 == 0 else 'odd'], priority=i % 3)
+        note.save(f'n{i:02d}', str(folder))
+    return Notebook(str(folder))
+
+def test_migrate_moves_notes_and_history_into_shards(tmp_path):
+    flat = make_flat(tmp_path / 'notes')
+    flat.search_notes('body')#leaves index files behind that the migration removes
+    flat.find_duplicates()
+    flat.delete_note('n39')
+    assert migrate(flat.notes_folder, shards=4) == 39
+    assert read_layout(flat.notes_folder) == {'shards': 4}
+    assert not [name for name in os.listdir(flat.notes_folder) if name.endswith('.note') or name.startswith(('.search', '.signatures'))]
+    notebook = ShardedNotebook(flat.notes_folder)
+    assert sorted(notebook.list_notes()) == [f'n{i:02d}.note' for i in range(39)]
+    for shard in notebook.shards:#every note is in the shard its name hashes to
+        assert all(shard_of(file, 4) == notebook.shards.index(shard) for file in shard.list_notes())
+    assert notebook.history('n05.note')[0]['version'] == 1
+    notebook.restore('n39.note', 1)#deleted before the migration, its history moved too
+    assert notebook.get_note('n39.note').title == 'Note 39'
+
+def test_queries_fan_out_and_merge(tmp_path):
+    migrate(make_flat(tmp_path / 'notes').notes_folder, shards=4)
+    notebook = ShardedNotebook(str(tmp_path / 'notes'))
+    assert notebook.search_notes('shared') == [f'n{i:02d}.note' for i in range(40)]
+    assert notebook.search_ranked('body AND 12', snippets=False)[0]['file'] == 'n12.note'
+    assert notebook.list_titles(limit=3) == [('n00.note', 'Note 00'), ('n01.note', 'Note 01'), ('n02.note', 'Note 02')]
+    assert notebook.list_notes('title', offset=37, limit=5, reverse=True) == ['n02.note', 'n01.note', 'n00.note']
+    assert notebook.list_notes('priority', limit=3) == ['n00.note', 'n03.note', 'n06.note']#ties in filename order across shards
+    assert notebook.list_notes('file', tag='EVEN')[:2] == ['n00.note', 'n02.note']
+    assert notebook.notes_with_tag('odd')[:2] == ['n01.note', 'n03.note']
+    assert notebook.tag_counts() == {'Even': 20, 'odd': 20}
+    assert notebook.complete_titles('Note 1', 2) == [('n10.note', 'Note 10'), ('n11.note', 'Note 11')]
+    stats = notebook.get_stats()
+    assert stats['total_notes'] == 40 and stats['total_tags'] == 2 and len(stats['all_tags']) == 40
+    assert [header['file'] for header in notebook.note_headers()] == [f'n{i:02d}.note' for i in range(40)]
+
+def test_save_and_delete_go_to_the_right_shard(tmp_path):
+    notebook = ShardedNotebook(str(tmp_path / 'root'))#a new root gets SHARDS shards
+    assert len(notebook.shards) == Configurator.get('SHARDS')
+    notebook.save_note(Note('Hello', 'new note'), 'hello')
+    shard = notebook.shards[shard_of('hello.note', len(notebook.shards))]
+    assert os.path.exists(os.path.join(shard.notes_folder, 'hello.note'))
+    assert notebook.search_notes('new') == ['hello.note']
+    assert notebook.save_many([(Note(f'Bulk {i}', 'bulk'), f'bulk{i}') for i in range(20)]) == 20
+    assert len(notebook.search_notes('bulk')) == 20
+    notebook.delete_note('hello')
+    assert notebook.search_notes('new') == []
+    with pytest.raises(FileNotFoundError):
+        notebook.get_note('hello.note')
+
+def test_mounted_folders_and_watch_mode(tmp_path):
+    make_flat(tmp_path / 'a', 5)
+    (tmp_path / 'b').mkdir()
+    Note('Elsewhere', 'in b').save('n03', str(tmp_path / 'b'))#same name as a note in a: the first folder wins
+    assert main(['mount', str(tmp_path / 'root'), str(tmp_path / 'a'), str(tmp_path / 'b')]) == 0
+    notebook = ShardedNotebook(str(tmp_path / 'root'))
+    notebook.watch(0)
+    try:
+        assert notebook.get_note('n03.note').title == 'Note 03'
+        assert len(notebook.list_notes()) == 6
+        Note('Late', 'added behind our back').save('late', str(tmp_path / 'b'))
+        assert notebook.search_notes('behind') == ['late.note']
+        notebook.save_note(Note('Late', 'changed'), 'late')#stays in b, where it already is
+        assert os.path.exists(tmp_path / 'b' / 'late.note') and not os.path.exists(tmp_path / 'a' / 'late.note')
+    finally:
+        notebook.close()
+
+def test_flat_folder_is_not_opened_as_sharded(tmp_path, monkeypatch):
+    make_flat(tmp_path / 'notes', 2)
+    with pytest.raises(ValueError):
+        ShardedNotebook(str(tmp_path / 'notes'))
+    monkeypatch.setenv('NOTES_ROOT_FOLDER', str(tmp_path / 'fresh'))
+    Configurator.reset()
+    try:
+        assert isinstance(open_notebook('sharded'), ShardedNotebook)
+    finally:
+        Configurator.reset()
+
+def test_pack_round_trip(tmp_path):
+    source = make_flat(tmp_path / 'notes', 10)
+    source.export_pack(str(tmp_path / 'flat.pack'))
+    notebook = ShardedNotebook(str(tmp_path / 'root'))
+    assert notebook.import_pack(str(tmp_path / 'flat.pack')) == 10
+    assert len(notebook.search_notes('shared')) == 10
+    assert notebook.export_pack(str(tmp_path / 'sharded.pack')) == 10
+
+def test_pack_import_refuses_names_outside_the_shards(tmp_path):
+    from pack import PackWriter
+    with PackWriter(str(tmp_path / 'bad.pack')) as pack:
+        pack.add('../../escaped.note', b'---\ntitle: bad\n---\n\nbad')
+    notebook = ShardedNotebook(str(tmp_path / 'root'))
+    with pytest.raises(ValueError):
+        notebook.import_pack(str(tmp_path / 'bad.pack'))
+    assert not (tmp_path / 'escaped.note').exists() and notebook.list_notes() == []
+
+def test_inherited_methods_only_use_overridden_ones(tmp_path):
+    import inspect
+    inherited = sorted(name for name, value in inspect.getmembers(Notebook)
+                       if callable(value) and not name.startswith('__') and name not in ShardedNotebook.__dict__)
+    assert inherited == ['_seen', '_sync', 'find_duplicates', 'list_titles', 'load_all', 'lock']#a new one: override it or add it here
+    migrate(make_flat(tmp_path / 'notes', 6).notes_folder, shards=4)
+    notebook = ShardedNotebook(str(tmp_path / 'notes'))
+    notebook.save_note(Note('Copy', 'body 1 shared words'), 'copy')
+    assert sorted(notebook.note_stamps()) == ['copy.note'] + [f'n{i:02d}.note' for i in range(6)]
+    assert notebook.find_duplicates() == [{'files': ['copy.note', 'n01.note'], 'exact': True, 'similarity': 1.0}]
+    assert len(notebook.load_all()) == 7 and notebook.list_titles(limit=1) == [('copy.note', 'Copy')]
+    with pytest.raises(TypeError):
+        notebook.catalog()
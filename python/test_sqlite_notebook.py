@@ -0,0 +1,124 @@
+import pytest
+
+from notes import Note, Notebook, ConflictError, open_notebook
+from sqlite_notebook import SQLiteNotebook, copy_notes, fts_query
+
+
+def make_notebook(tmp_path):
+    notebook = SQLiteNotebook(str(tmp_path / 'notes.sqlite3'))
+    notebook.save_note(Note('Python Programming', 'Learn about functions', ['python', 'coding'], author='Ann', priority=2), 'python')
+    notebook.save_note(Note('Java Basics', 'Learn about classes', ['java', 'coding']), 'java')
+    notebook.save_note(Note('Cooking Tips', 'How to bake bread', ['cooking']), 'cooking')
+    return notebook
+
+def test_fts_query_translation():
+    assert fts_query('a b AND c') == '("a") OR ("b" AND "c")'
+    assert fts_query('"hello world" pre*') == '("hello world") OR ("pre"*)'
+    assert fts_query('') == ''
+
+def test_save_get_list_delete(tmp_path):
+    notebook = make_notebook(tmp_path)
+    assert notebook.list_notes() == ['cooking.note', 'java.note', 'python.note']
+    note = notebook.get_note('python.note')
+    assert (note.title, note.tags, note.author, note.priority) == ('Python Programming', ['python', 'coding'], 'Ann', 2)
+
+    notebook.save_note(Note('Python 3', 'New body', ['python']), 'python')
+    assert notebook.get_note('python.note').content == 'New body'
+
+    notebook.delete_note('python')
+    assert notebook.list_notes() == ['cooking.note', 'java.note']
+
+def test_search_matches_folder_notebook_syntax(tmp_path):
+    notebook = make_notebook(tmp_path)
+    assert notebook.search_notes('python java') == ['java.note', 'python.note']
+    assert notebook.search_notes('learn AND classes') == ['java.note']
+    assert notebook.search_notes('"bake bread"') == ['cooking.note']
+    assert notebook.search_notes('cod*') == ['java.note', 'python.note']
+    notebook.save_note(Note('Java Basics', 'Now about streams', ['java']), 'java')
+    assert notebook.search_notes('classes') == []#the update replaced the old FTS entry
+
+def test_stats_and_tag_counts(tmp_path):
+    notebook = make_notebook(tmp_path)
+    stats = notebook.get_stats()
+    assert stats['total_notes'] == 3
+    assert stats['total_tags'] == 4
+    assert notebook.tag_counts()['coding'] == 2
+    assert notebook.list_titles()[0] == ('cooking.note', 'Cooking Tips')
+    notebook.save_note(Note('Shouting', 'loud', ['PYTHON', 'Straße', 'STRASSE']), 'loud')
+    (tmp_path / 'folder').mkdir()
+    folder = Notebook(str(tmp_path / 'folder'))
+    copy_notes(notebook, folder)
+    assert notebook.get_stats()['total_tags'] == folder.get_stats()['total_tags'] == 5#tags that only differ in case count once
+    assert notebook.tag_counts() == folder.tag_counts()
+    assert notebook.notes_with_tag('strasse') == folder.notes_with_tag('strasse') == ['loud.note']
+    assert notebook.list_notes('file', tag='STRASSE') == ['loud.note']
+
+def test_old_databases_get_folded_tags(tmp_path):
+    import sqlite3
+    path = str(tmp_path / 'notes.sqlite3')
+    make_notebook(tmp_path).close()
+    db = sqlite3.connect(path)#as made before the folded column
+    db.execute('DROP INDEX note_tags_folded')
+    db.execute('ALTER TABLE note_tags DROP COLUMN folded')
+    db.execute('CREATE INDEX note_tags_tag ON note_tags(tag COLLATE NOCASE)')
+    db.commit()
+    db.close()
+    notebook = SQLiteNotebook(path)
+    assert notebook.notes_with_tag('CODING') == ['java.note', 'python.note']
+    assert notebook.get_stats()['total_tags'] == 4
+    notebook.close()
+
+def test_copy_between_backends_keeps_notes(tmp_path):
+    folder = tmp_path / 'folder'
+    folder.mkdir()
+    Note('One', 'first body', ['a'], status='draft').save('one', str(folder))
+    original = Note.load_note(str(folder / 'one.note'))
+
+    database = SQLiteNotebook(str(tmp_path / 'copy.sqlite3'))
+    assert copy_notes(Notebook(str(folder)), database) == 1
+    back = tmp_path / 'back'
+    back.mkdir()
+    assert copy_notes(database, Notebook(str(back))) == 1
+    assert (back / 'one.note').read_text() == original.to_text()
+
+def test_open_notebook_picks_backend(tmp_path, monkeypatch):
+    import Configurator
+    monkeypatch.setenv('NOTES_SQLITE_PATH', str(tmp_path / 'picked.sqlite3'))
+    Configurator.reset()
+    try:
+        assert isinstance(open_notebook('sqlite'), SQLiteNotebook)
+    finally:
+        Configurator.reset()
+
+def test_tag_lookups(tmp_path):
+    notebook = SQLiteNotebook(str(tmp_path / 'notes.sqlite3'))
+    notebook.save_note(Note('A', 'a', ['Python', 'coding']), 'a')
+    notebook.save_note(Note('B', 'b', ['python']), 'b')
+    assert notebook.notes_with_tag('PYTHON') == ['a.note', 'b.note']
+    assert notebook.notes_with_tags(['python', 'coding']) == ['a.note']
+    assert notebook.notes_with_tags(['coding', 'missing'], match='any') == ['a.note']
+    assert notebook.top_tags(1) == [('Python', 2)]
+
+def test_check_and_save_many(tmp_path):
+    notebook = SQLiteNotebook(str(tmp_path / 'notes.sqlite3'))
+    assert notebook.save_many([(Note('A', 'a'), 'a'), (Note('B', 'b'), 'b')]) == 2
+    mine, theirs = notebook.get_note('a.note'), notebook.get_note('a.note')
+    notebook.save_note(theirs, 'a', check=True)
+    with pytest.raises(ConflictError):
+        notebook.save_note(mine, 'a', check=True)
+
+def test_encrypted_notes_are_refused(tmp_path):
+    notebook = SQLiteNotebook(str(tmp_path / 'notes.sqlite3'))
+    note = Note('Secret', 'hidden')
+    note.encryption = 'body'
+    with pytest.raises(ValueError):
+        notebook.save_note(note, 'secret')
+    assert notebook.list_notes() == [] and not notebook.encrypts_notes
+
+def test_search_ranked(tmp_path):
+    notebook = make_notebook(tmp_path)
+    notebook.save_note(Note('Learn', 'learn learn learn', []), 'learn')
+    results = notebook.search_ranked('learn')
+    assert [result['file'] for result in results] == ['learn.note', 'java.note', 'python.note']
+    assert results[1]['snippet'] == '**Learn** about classes'
+    assert len(notebook.search_ranked('learn', limit=2)) == 2
@@ -0,0 +1,31 @@
+import os
+import sys
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SLOW_MODULES = ['yaml', 'subprocess', 'tempfile', 'concurrent.futures', 'sqlite3', 'asyncio']
+IMPORT_BUDGET = 0.15 #seconds for "import notes" with warm .pyc files, a few times what it takes today
+
+
+def import_notes(code):#runs code after "import notes" in a fresh interpreter, returns (stdout, stderr)
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)#measure the normal case, where the .pyc files exist
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import notes\n' + code],
+                            cwd=HERE, env=env, capture_output=True, text=True, check=True)
+    return result.stdout, result.stderr
+
+
+def test_import_skips_slow_modules():
+    out, _ = import_notes(f"import sys; print(' '.join(m for m in {SLOW_MODULES!r} if m in sys.modules))")
+    assert out.split() == []
+
+def test_import_reads_no_settings():
+    out, _ = import_notes("import Configurator; print(len(Configurator._settings))")
+    assert out.strip() == '0'
+
+def test_import_time_budget():
+    import_notes('')#writes the .pyc files
+    _, err = import_notes('')
+    line = [line for line in err.splitlines() if line.endswith('| notes')][-1]
+    cumulative = int(line.split('|')[1]) / 1e6
+    assert cumulative < IMPORT_BUDGET
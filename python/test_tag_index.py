@@ -0,0 +1,53 @@
+from notes import Note, Notebook
+from tag_index import TagIndex, normalize_tag
+
+
+def make_notebook(tmp_path):
+    Note('Python Programming', 'functions', ['Python', 'coding']).save('python', str(tmp_path))
+    Note('Java Basics', 'classes', ['java', 'Coding']).save('java', str(tmp_path))
+    Note('Cooking Tips', 'bread', ['cooking', ' python ']).save('cooking', str(tmp_path))
+    return Notebook(str(tmp_path))
+
+def test_normalize_tag():
+    assert normalize_tag(' PyThon ') == 'python'
+
+def test_lookup_ignores_case(tmp_path):
+    notebook = make_notebook(tmp_path)
+    assert notebook.notes_with_tag('python') == ['cooking.note', 'python.note']
+    assert notebook.notes_with_tag('CODING') == ['java.note', 'python.note']
+    assert notebook.notes_with_tag('rust') == []
+
+def test_and_or_filters_and_counts(tmp_path):
+    notebook = make_notebook(tmp_path)
+    assert notebook.notes_with_tags(['python', 'coding']) == ['python.note']
+    assert notebook.notes_with_tags(['java', 'cooking'], match='any') == ['cooking.note', 'java.note']
+    assert notebook.tag_counts() == {'Python': 2, 'Coding': 2, 'java': 1, 'cooking': 1}
+    assert sorted(notebook.top_tags(2)) == [('Coding', 2), ('Python', 2)]
+
+def test_save_and_delete_update_the_index(tmp_path):
+    notebook = make_notebook(tmp_path)
+    assert notebook.notes_with_tag('rust') == []#builds the index
+    Note('Rust', 'ownership', ['rust', 'coding']).save('rust', str(tmp_path))
+    Note('Java Basics', 'classes', ['java']).save('java', str(tmp_path))
+    assert notebook.notes_with_tag('coding') == ['python.note', 'rust.note']
+    notebook.delete_note('rust')
+    assert notebook.notes_with_tag('rust') == []
+    assert 'rust' not in notebook.tag_counts()
+
+    index = TagIndex(str(tmp_path))#a fresh process sees the same index from the snapshot and journal
+    assert index.load()
+    assert index.notes('coding') == {'python.note'}
+
+def test_shown_spelling_follows_the_notes_that_use_it(tmp_path):
+    notebook = make_notebook(tmp_path)
+    Note('Shout', 'loud', ['CODING']).save('shout', str(tmp_path))
+    assert notebook.tag_counts()['CODING'] == 3
+    notebook.delete_note('shout')
+    assert notebook.tag_counts() == {'Python': 2, 'Coding': 2, 'java': 1, 'cooking': 1}
+
+    index = TagIndex(str(tmp_path))#spellings come back from the snapshot too
+    assert index.load()
+    index.remove('python.note')#the only 'Python', cooking.note spells it in lower case
+    assert index.counts() == {'python': 1, 'Coding': 1, 'java': 1, 'cooking': 1}
+    notebook.delete_note('python')
+    assert notebook.tag_counts() == {'python': 1, 'Coding': 1, 'java': 1, 'cooking': 1}
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from notes import Note, Notebook
+from watcher import FolderWatcher
+
+
+def write(folder, name, title, tags=()):#a note written by "another program", not through Note.save
+    note = Note(title, f'body of {title}', list(tags))
+    with open(os.path.join(folder, name), 'w', encoding='utf-8') as f:
+        f.write(note.to_text())
+
+@pytest.mark.parametrize('use_inotify', [True, False])
+def test_watcher_reports_added_changed_removed(tmp_path, use_inotify):
+    folder = str(tmp_path)
+    write(folder, 'a.note', 'A')
+    watcher = FolderWatcher(folder, interval=0, use_inotify=use_inotify)
+    assert not watcher.changes()
+
+    write(folder, 'b.note', 'B')
+    write(folder, 'a.note', 'A changed')
+    (tmp_path / 'ignored.txt').write_text('x')
+    assert sorted(watcher.changes().changed) == ['a.note', 'b.note']
+
+    os.remove(os.path.join(folder, 'a.note'))
+    changes = watcher.changes()
+    assert changes.removed == ['a.note'] and not changes.changed
+    watcher.close()
+
+def test_interval_bounds_how_often_we_look(tmp_path):
+    watcher = FolderWatcher(str(tmp_path), interval=3600, use_inotify=False)
+    watcher.changes()
+    write(str(tmp_path), 'a.note', 'A')
+    assert not watcher.changes()#still within the interval
+    watcher.expire()
+    assert list(watcher.changes().changed) == ['a.note']
+
+def test_watched_notebook_follows_outside_edits(tmp_path):
+    folder = str(tmp_path)
+    Note('Python', 'functions', ['coding']).save('python', folder)
+    notebook = Notebook(folder)
+    notebook.watch(interval=0)
+    assert notebook.search_notes('functions') == ['python.note']
+    assert notebook.notes_with_tag('coding') == ['python.note']
+
+    write(folder, 'rust.note', 'Rust', ['coding'])#nano, git pull, another process...
+    write(folder, 'python.note', 'Python', ['snakes'])
+    assert sorted(notebook.list_notes()) == ['python.note', 'rust.note']
+    assert [title for file, title in notebook.list_titles()] == ['Python', 'Rust']
+    assert notebook.notes_with_tag('coding') == ['rust.note']
+    assert notebook.search_notes('body') == ['python.note', 'rust.note']
+
+    os.remove(os.path.join(folder, 'rust.note'))
+    notebook.save_note(Note('Java', 'classes', ['coding']), 'java')
+    assert notebook.get_stats()['total_notes'] == 2
+    assert notebook.tag_counts() == {'coding': 1, 'snakes': 1}
+    notebook.unwatch()
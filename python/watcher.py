@@ -0,0 +1,135 @@
+import os # scandir/stat for the polling watcher, read() for inotify events
+import time
+import struct # unpacks the inotify event records
+
+
+# Tells a long-running Notebook (the menu loop, the server) which .note files were added, changed or
+# deleted since it last asked, including changes made by nano or any other program.
+# On Linux the kernel reports them through inotify, elsewhere we fall back to comparing stat() results.
+# Nothing runs in the background: changes() does the work when it is called, at most once per interval,
+# so answers are never more than interval seconds out of date.
+
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT = struct.Struct('iIII') #wd, mask, cookie, length of the name that follows
+
+
+class Changes():
+    def __init__(self, changed=None, removed=None):#constructor
+        self.changed = changed or {} #file -> os.stat_result, new or modified notes
+        self.removed = removed or [] #files that are gone
+
+    def __bool__(self):
+        return bool(self.changed or self.removed)
+
+
+class FolderWatcher():
+
+    def __init__(self, notes_folder, interval=1.0, use_inotify=True):#constructor
+        self.notes_folder = notes_folder
+        self.interval = interval #seconds between two looks at the folder
+        self.files = {} #file -> (mtime_ns, size) as of the last look
+        self._folder_mtime = None
+        self._checked = None #time.monotonic() of the last look, None = look on the next call
+        self._inotify = _open_inotify(notes_folder) if use_inotify else None
+        self.scan()
+
+    def close(self):
+        if self._inotify is not None:
+            os.close(self._inotify)
+            self._inotify = None
+
+    @property
+    def uses_inotify(self):
+        return self._inotify is not None
+
+    def expire(self):#the next changes() call looks at the folder, e.g. right after we saved a note ourselves
+        self._checked = None
+
+    def changes(self):#Changes since the last call, empty when we looked less than interval seconds ago
+        now = time.monotonic()
+        if self._checked is not None and now - self._checked < self.interval:
+            return Changes()
+        self._checked = now
+        if self._inotify is not None:
+            names = self._read_events()
+            if names is not None:
+                return self._restat(names)
+        return self.scan()
+
+    def scan(self):#compares every note's stat() with the last look
+        folder_mtime = os.stat(self.notes_folder).st_mtime_ns
+        if folder_mtime == self._folder_mtime:#no file was added, removed or renamed, only the known ones can have changed
+            return self._restat(list(self.files))
+        self._folder_mtime = folder_mtime
+        changes = Changes()
+        seen = set()
+        for entry in os.scandir(self.notes_folder):
+            if not entry.name.endswith('.note'):
+                continue
+            seen.add(entry.name)
+            self._compare(entry.name, entry.stat(), changes)
+        for name in list(self.files):
+            if name not in seen:
+                del self.files[name]
+                changes.removed.append(name)
+        return changes
+
+    def _restat(self, names):
+        changes = Changes()
+        for name in names:
+            try:
+                st = os.stat(os.path.join(self.notes_folder, name))
+            except FileNotFoundError:
+                if self.files.pop(name, None) is not None:
+                    changes.removed.append(name)
+                continue
+            self._compare(name, st, changes)
+        return changes
+
+    def _compare(self, name, st, changes):
+        stamp = (st.st_mtime_ns, st.st_size)
+        if self.files.get(name) != stamp:
+            self.files[name] = stamp
+            changes.changed[name] = st
+
+    def _read_events(self):#names of the notes inotify reported since last time, None = the queue overflowed, rescan
+        names = set()
+        while True:
+            try:
+                data = os.read(self._inotify, 64 * 1024)
+            except BlockingIOError:#nothing more queued
+                return names
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = EVENT.unpack_from(data, offset)
+                offset += EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'surrogateescape')
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    return None
+                if name.endswith('.note'):
+                    names.add(name)
+
+
+def _open_inotify(folder):#file descriptor watching folder, or None where inotify isn't available
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    except (OSError, AttributeError):#not Linux
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(folder), WATCH_MASK) < 0:#e.g. out of watches, polling still works
+        os.close(fd)
+        return None
+    return fd